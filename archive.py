@@ -0,0 +1,60 @@
+# archive.py - АРХИВ КЕЙСОВ (один файл данных + индекс смещений)
+import argparse
+import sys
+import time
+
+from modules.case_archive import INDEX_SUFFIX, CaseArchive, pack_directory
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Упаковка каталога кейсов в архив и чтение кейсов из архива (для batch.py --archive)"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack = commands.add_parser('pack', help="упаковать каталог кейсов")
+    pack.add_argument('root', help="каталог кейсов")
+    pack.add_argument('archive', help=f"файл архива (индекс - рядом, с суффиксом {INDEX_SUFFIX})")
+    pack.add_argument('--suffix', default='.txt', help="расширение файлов кейсов")
+
+    info = commands.add_parser('info', help="сведения об архиве")
+    info.add_argument('archive', help="файл архива")
+    info.add_argument('--ids', action='store_true', help="вывести идентификаторы кейсов")
+
+    get = commands.add_parser('get', help="вывести текст кейса по идентификатору")
+    get.add_argument('archive', help="файл архива")
+    get.add_argument('case_ids', nargs='+', help="идентификаторы кейсов")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == 'pack':
+        started = time.perf_counter()
+        count = pack_directory(args.root, args.archive, args.suffix)
+        print(f"📦 Упаковано кейсов: {count} в {args.archive} за {time.perf_counter() - started:.2f} с",
+              file=sys.stderr)
+        return 0
+
+    with CaseArchive(args.archive) as archive:
+        if args.command == 'info':
+            print(f"Кейсов: {len(archive)}, байт текста: {archive.size}")
+            if args.ids:
+                for position in range(len(archive)):
+                    print(archive.case_id(position))
+            return 0
+
+        status = 0
+        for case_id in args.case_ids:
+            text = archive.get(case_id)
+            if text is None:
+                print(f"❌ Кейс не найден: {case_id}", file=sys.stderr)
+                status = 1
+                continue
+            print(text)
+        return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+# batch.py - ПАКЕТНАЯ ОБРАБОТКА КЕЙСОВ
+import argparse
+import json
+import os
+import sys
+
+from modules.batch_runner import BatchStats, discover_cases, read_case_text, read_manifest, run_batch
+from modules.case_context import CHECKS, checks_argument
+from modules.instrumentation import INSTRUMENTATION
+from modules.output_sinks import DETAILED_SINKS, SINKS, create_sink
+
+# Результатов на одно обновление счетчиков сигналов
+SIGNAL_BATCH = 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Пакетный анализ кейсов в пуле процессов (результат - JSONL)"
+    )
+    parser.add_argument('paths', nargs='*', default=['data/cases'],
+                        help="каталоги или файлы кейсов (по умолчанию data/cases)")
+    parser.add_argument('--manifest', help="файл со списком путей к кейсам")
+    parser.add_argument('--archive', metavar='PATH',
+                        help="архив кейсов (archive.py pack) вместо файлов: процессы получают "
+                             "диапазоны архива")
+    parser.add_argument('--suffix', default='.txt', help="расширение файлов кейсов")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--shared-kb', action='store_true',
+                        help="построить базу знаний один раз и передать процессам через fork "
+                             "(общая память copy-on-write)")
+    parser.add_argument('--chunksize', type=int, default=16,
+                        help="кейсов на одну задачу процесса")
+    parser.add_argument('--unordered', action='store_true',
+                        help="выводить результаты по мере готовности")
+    parser.add_argument('--events', choices=['common', 'basic'], default='common',
+                        help="словарь нежелательных явлений")
+    parser.add_argument('--checks', type=checks_argument, default=CHECKS, metavar='СПИСОК',
+                        help=f"проверки через запятую ({','.join(CHECKS)}) или all")
+    parser.add_argument('--cache', metavar='PATH',
+                        help="файл SQLite кэша результатов (неизмененные кейсы берутся из кэша)")
+    parser.add_argument('--store', metavar='PATH',
+                        help="файл SQLite хранилища результатов: при изменении базы знаний "
+                             "пересчитываются только затронутые кейсы")
+    parser.add_argument('--db', metavar='PATH',
+                        help="база кейсов SQLite с полнотекстовым индексом (запросы - cases.py)")
+    parser.add_argument('--dedup', action='store_true',
+                        help="искать почти-дубликаты кейсов (MinHash/LSH): похожие ранее "
+                             "обработанные кейсы - в поле duplicates результата")
+    parser.add_argument('--dedup-index', metavar='PATH',
+                        help="файл .npz индекса дубликатов: пополняется кейсами пакета (включает --dedup)")
+    parser.add_argument('--dedup-threshold', type=float,
+                        help="порог сходства описаний (оценка меры Жаккара, по умолчанию 0.8)")
+    parser.add_argument('--dedup-report', metavar='PATH',
+                        help="сохранить группы дубликатов в JSON (включает --dedup)")
+    parser.add_argument('--signals', metavar='PATH',
+                        help="файл .npz счетчиков для signals.py: дополняется результатами пакета")
+    parser.add_argument('--profile', action='store_true',
+                        help="замеры проверяльщиков и подпроверок (сводка в stderr)")
+    parser.add_argument('--format', choices=[name for name in SINKS if name not in DETAILED_SINKS],
+                        default='json',
+                        help="формат результата: json - компактный JSONL, csv - строка на событие, "
+                             "null - без вывода (замеры)")
+    parser.add_argument('--output', '-o', help="файл результата (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+    if args.archive and (args.manifest or args.store):
+        parser.error("--archive несовместим с --manifest и --store")
+    if args.store and args.checks != CHECKS:
+        parser.error("--store хранит полные результаты и несовместим с --checks")
+    args.dedup = args.dedup or bool(args.dedup_index or args.dedup_report)
+    if args.store and args.dedup:
+        parser.error("--store несовместим с поиском дубликатов")
+    if args.signals and 'expectedness' not in args.checks:
+        parser.error("--signals требует проверки expectedness (препараты кейса)")
+    return args
+
+
+def collect_paths(args):
+    """Собирает пути к кейсам из манифеста и/или каталогов (или открывает архив кейсов)"""
+    if args.archive:
+        from modules.case_archive import CaseArchive
+        return CaseArchive(args.archive)
+    if args.manifest:
+        return read_manifest(args.manifest)
+
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(discover_cases(path, args.suffix))
+        else:
+            paths.append(path)
+    return paths
+
+
+def format_refresh_report(report):
+    """Краткий отчет о пересчете после изменения базы знаний"""
+    if not report['sources']:
+        return "База знаний не изменилась"
+    return (f"Изменено в базе знаний ({', '.join(report['sources'])}): препаратов {len(report['drugs'])}, "
+            f"терминов IME {len(report['ime_terms'])}; пересчитано кейсов: "
+            f"распознавание препаратов {report['drug_recognition']}, "
+            f"ожидаемость {report['expectedness']}, IME {report['ime']}")
+
+
+def report_duplicates(dedup, args):
+    """Группы дубликатов по всему индексу (включая кейсы прошлых пакетов)"""
+    clusters = dedup.clusters()
+    print(f"👯 {dedup.report(clusters)}", file=sys.stderr)
+    if args.dedup_index:
+        dedup.save(args.dedup_index)
+    if args.dedup_report:
+        with open(args.dedup_report, 'w', encoding='utf-8') as f:
+            json.dump({'threshold': dedup.threshold, 'clusters': clusters}, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = collect_paths(args)
+
+    if args.profile:
+        INSTRUMENTATION.enable()
+
+    print(f"📂 Кейсов к обработке: {len(paths)}, процессов: {args.workers}", file=sys.stderr)
+
+    # Результаты пишутся блоками через буфер отображения (modules/output_sinks.py)
+    sink = create_sink(args.format, args.output)
+    stats = BatchStats()
+
+    dedup = None
+    if args.dedup:
+        from modules.dedup import DuplicateIndex
+        dedup = DuplicateIndex.open(args.dedup_index, args.dedup_threshold)
+
+    engine = None
+    if args.store:
+        from modules.incremental import IncrementalEngine
+        engine = IncrementalEngine(args.store, event_lexicon=args.events)
+        print(f"🔄 {format_refresh_report(engine.refresh_knowledge())}", file=sys.stderr)
+        results = engine.run(paths, workers=args.workers, chunksize=args.chunksize, stats=stats,
+                             shared=args.shared_kb)
+    else:
+        results = run_batch(paths, workers=args.workers, chunksize=args.chunksize,
+                            ordered=not args.unordered, event_lexicon=args.events,
+                            stats=stats, cache_path=args.cache, checks=args.checks, dedup=dedup,
+                            shared=args.shared_kb)
+
+    signal_counts = None
+    if args.signals:
+        from modules.signal_detection import SignalCounts
+        signal_counts = SignalCounts.open(args.signals)
+
+    case_store = None
+    if args.db:
+        from modules.case_store import CaseStore
+        case_store = CaseStore(args.db)
+    # Текст кейса для базы: из архива или из файла
+    read_text = paths.get if args.archive else read_case_text
+
+    try:
+        pending = []
+        for result in results:
+            sink.write_case({'result': result})
+            if case_store is not None and 'error' not in result:
+                text = read_text(result['case_id'])
+                if text is not None:
+                    case_store.add(result['case_id'], text, result)
+            if signal_counts is not None and 'error' not in result:
+                pending.append(result)
+                if len(pending) >= SIGNAL_BATCH:
+                    signal_counts.add_results(pending)
+                    pending = []
+        if signal_counts is not None:
+            signal_counts.add_results(pending)
+            signal_counts.save(args.signals)
+            print(f"📊 Счетчики сигналов: {signal_counts.report()}", file=sys.stderr)
+    finally:
+        sink.close()
+        if engine is not None:
+            engine.close()
+        if case_store is not None:
+            case_store.close()
+            print(f"🗃️  В базу кейсов записано: {case_store.written}", file=sys.stderr)
+        if args.archive:
+            paths.close()
+
+    if dedup is not None:
+        report_duplicates(dedup, args)
+
+    print(f"📈 {stats.report()}", file=sys.stderr)
+    if stats.worker_memory:
+        from modules.shared_kb import format_memory
+        print(f"🧠 {format_memory(stats.worker_memory)}", file=sys.stderr)
+    if args.profile:
+        print(INSTRUMENTATION.format_summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench.py - БЕНЧМАРКИ ПРОИЗВОДИТЕЛЬНОСТИ
+import argparse
+import json
+import sys
+
+from modules.benchmark import (DEFAULT_THRESHOLD, compare_results, format_comparison,
+                               format_memory, format_results, has_regressions,
+                               measure_result_memory, run_benchmarks)
+from modules.narrative_generator import NarrativeGenerator
+
+
+def parse_threshold(value):
+    """'pipeline=0.05' → ('pipeline', 0.05)"""
+    name, _, limit = value.partition('=')
+    try:
+        return name, float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ожидается ИМЯ=ДОЛЯ, получено: {value}")
+
+
+def add_corpus_args(parser):
+    parser.add_argument('--cases', type=int, default=200, help="число синтетических кейсов")
+    parser.add_argument('--length', type=int, default=3000, help="длина кейса в символах")
+    parser.add_argument('--density', type=float, default=2.0, help="явлений на 1000 символов")
+    parser.add_argument('--seed', type=int, default=0, help="зерно генератора")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки проверяльщиков на синтетических кейсах")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="замерить проверяльщики и весь конвейер")
+    add_corpus_args(run)
+    run.add_argument('--repeat', type=int, default=3, help="повторов (берется лучший)")
+    run.add_argument('--output', '-o', help="сохранить результат в JSON")
+    run.add_argument('--baseline', help="сравнить с сохраненным результатом")
+    run.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                     help="допустимое замедление (доля, по умолчанию 0.10)")
+    run.add_argument('--threshold-for', type=parse_threshold, action='append', default=[],
+                     metavar='ИМЯ=ДОЛЯ', help="порог для отдельного замера")
+
+    compare = commands.add_parser('compare', help="сравнить два сохраненных результата")
+    compare.add_argument('baseline', help="JSON базового результата")
+    compare.add_argument('current', help="JSON нового результата")
+    compare.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help="допустимое замедление (доля, по умолчанию 0.10)")
+    compare.add_argument('--threshold-for', type=parse_threshold, action='append', default=[],
+                         metavar='ИМЯ=ДОЛЯ', help="порог для отдельного замера")
+
+    memory = commands.add_parser('memory', help="память результатов: компактные объекты и словари")
+    add_corpus_args(memory)
+
+    generate = commands.add_parser('generate', help="сохранить синтетические кейсы в JSONL")
+    add_corpus_args(generate)
+    generate.add_argument('--output', '-o', help="файл JSONL (по умолчанию stdout)")
+
+    return parser.parse_args(argv)
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def report_comparison(baseline, current, args):
+    """Печатает сравнение; возвращает код выхода (1 - есть регрессии)"""
+    try:
+        rows = compare_results(baseline, current, args.threshold, dict(args.threshold_for))
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    print(format_comparison(rows))
+    if has_regressions(rows):
+        print("🔴 Обнаружены регрессии производительности")
+        return 1
+    print("✅ Регрессий нет")
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == 'generate':
+        generator = NarrativeGenerator(seed=args.seed)
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            for case in generator.generate_corpus(args.cases, args.length, args.density):
+                output.write(json.dumps(case, ensure_ascii=False) + '\n')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return 0
+
+    if args.command == 'memory':
+        print(format_memory(measure_result_memory(args.cases, args.length, args.density, args.seed)))
+        return 0
+
+    if args.command == 'compare':
+        return report_comparison(load_results(args.baseline), load_results(args.current), args)
+
+    results = run_benchmarks(args.cases, args.length, args.density, args.repeat, args.seed)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результат сохранен: {args.output}")
+
+    if args.baseline:
+        return report_comparison(load_results(args.baseline), results, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# cases.py - ЗАПРОСЫ К БАЗЕ ПРОАНАЛИЗИРОВАННЫХ КЕЙСОВ
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from modules.case_store import CaseStore
+
+
+def parse_bool(value):
+    value = value.lower()
+    if value in ('1', 'yes', 'true', 'да'):
+        return True
+    if value in ('0', 'no', 'false', 'нет'):
+        return False
+    raise argparse.ArgumentTypeError(f"Ожидается yes/no, получено: {value}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Поиск кейсов в базе, заполненной batch.py --db / main.py --jsonl --db"
+    )
+    parser.add_argument('--db', required=True, help="файл базы кейсов SQLite")
+    parser.add_argument('--drug', help="препарат кейса")
+    parser.add_argument('--suspect', action='store_true', help="препарат - подозреваемый (первый упомянутый)")
+    parser.add_argument('--serious', type=parse_bool, metavar='yes/no', help="серьезный кейс")
+    parser.add_argument('--flag', help="критерий серьезности (death, hospitalization, ...)")
+    parser.add_argument('--event', help="нежелательное явление")
+    parser.add_argument('--ime', type=parse_bool, metavar='yes/no', help="явление из списка IME")
+    parser.add_argument('--expected', type=parse_bool, metavar='yes/no', help="явление предвиденное")
+    parser.add_argument('--causality', help="уровень причинности (Вероятная, Возможная, ...)")
+    parser.add_argument('--text', help="полнотекстовый запрос FTS5 по описанию ('сыпь OR крапив*')")
+    parser.add_argument('--count', action='store_true', help="вывести только число кейсов")
+    parser.add_argument('--limit', type=int, default=50, help="кейсов в выводе (по умолчанию 50)")
+    parser.add_argument('--format', choices=['table', 'jsonl'], default='table', help="формат вывода")
+    args = parser.parse_args(argv)
+    # Иначе опечатка в пути создала бы пустую базу и запрос вернул бы 0 кейсов
+    if not os.path.isfile(args.db):
+        parser.error(f"база кейсов не найдена: {args.db}")
+    return args
+
+
+def format_case(row):
+    result = row['result']
+    events = ', '.join(
+        f"{event['event']}" + (' ⚠️' if event.get('is_expected') is False else '')
+        for event in result.get('events', [])
+    )
+    serious = '🔴' if result.get('is_serious') else '🟢' if 'is_serious' in result else '  '
+    return f"{serious} {row['case_id']:<32} {result.get('drug', '-'):<18} {events}"
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    filters = {
+        'drug': args.drug, 'suspect_only': args.suspect, 'serious': args.serious,
+        'flag': args.flag, 'event': args.event, 'ime': args.ime, 'expected': args.expected,
+        'causality': args.causality, 'text': args.text
+    }
+
+    store = CaseStore(args.db)
+    try:
+        started = time.perf_counter()
+        count = store.count(**filters)
+        rows = [] if args.count else store.find(limit=args.limit, **filters)
+        elapsed = time.perf_counter() - started
+    except sqlite3.OperationalError as e:
+        print(f"❌ Ошибка запроса: {e}", file=sys.stderr)
+        return 2
+    finally:
+        store.close()
+
+    if args.count:
+        print(count)
+    elif args.format == 'jsonl':
+        for row in rows:
+            print(json.dumps({'case_id': row['case_id'], **row['result']}, ensure_ascii=False))
+    else:
+        for row in rows:
+            print(format_case(row))
+
+    print(f"🔎 Найдено кейсов: {count} (показано {len(rows)}) за {elapsed * 1000:.1f} мс", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
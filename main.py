@@ -1,57 +1,110 @@
 # main.py
+import argparse
 import os
-from modules.seriousness_checker import SeriousnessChecker
-from modules.ime_checker import IMEChecker
-from modules.expectedness_checker import ExpectednessChecker
-from modules.causality_checker import CausalityChecker
-from modules.missing_info_checker import MissingInfoChecker
+import sys
+from modules.case_context import CHECKS, CaseAnalyzer, checks_argument
+from modules.result_cache import CachedAnalyzer, ResultCache
+from modules.stream_pipeline import stream_analyze
+from modules.output_sinks import SINKS, create_sink, case_report
+from modules.instrumentation import INSTRUMENTATION
 
-def extract_adverse_events(text):
-    """Извлекает нежелательные явления из текста с улучшенным поиском"""
-    # Расширенный список медицинских терминов
-    common_events = [
-        # Кардиологические
-        'инфаркт миокарда', 'ишемия миокарда', 'перикардиальный выпот', 
-        'тромбоз коронарных артерий', 'артериальный тромбоз', 'тромбоэмболия',
-        'атриовентрикулярная блокада', 'желудочковые экстрасистолы', 'сердцебиение',
-        'удлинение интервала qt', 'артериальная гипертензия', 'хсн',
-        'суправентрикулярная тахикардия', 'венозная тромбоэмболия',
-        'артериальная тромбоэмболия', 'тромбоз глубоких вен', 'тэла',
-        
-        # Неврологические
-        'психотическое расстройство', 'галлюцинации', 'гипестезия', 'тремор',
-        'летаргия', 'периферическая нейропатия', 'головокружение', 'головная боль',
-        'сонливость', 'заторможенность', 'инсульт', 'синкопе', 
-        'гипертензивная энцефалопатия',
-        
-        # Общие серьезные
-        'смерть', 'летальный', 'погиб', 'умер', 'госпитализирован', 
-        'реанимация', 'угроза жизни'
-    ]
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Фармаконадзорный ассистент")
+    parser.add_argument('--jsonl', metavar='PATH',
+                        help="потоковый режим: кейсы из JSONL-файла ('-' - stdin), "
+                             "по одной компактной JSON-строке результата на кейс")
+    parser.add_argument('--text-field', default='text', help="поле с текстом кейса")
+    parser.add_argument('--id-field', default='case_id', help="поле с идентификатором кейса")
+    parser.add_argument('--checks', type=checks_argument, default=CHECKS, metavar='СПИСОК',
+                        help=f"проверки через запятую ({','.join(CHECKS)}) или all; "
+                             "загружаются только нужные проверяльщики и база знаний")
+    parser.add_argument('--cache', metavar='PATH',
+                        help="файл SQLite кэша результатов для потокового режима")
+    parser.add_argument('--db', metavar='PATH',
+                        help="база кейсов SQLite для потокового режима (запросы - cases.py)")
+    parser.add_argument('--profile', action='store_true',
+                        help="замеры проверяльщиков в потоковом режиме (сводка в stderr)")
+    parser.add_argument('--format', choices=list(SINKS), default='pretty',
+                        help="вывод демонстрационного режима: pretty - отчет для терминала, "
+                             "color - цветной отчет, json - компактный JSON, csv, null - без вывода")
+    parser.add_argument('--renderer', choices=['inline', 'thread', 'process'], default='inline',
+                        help="где форматировать вывод: в основном потоке, в отдельном потоке или процессе")
+    parser.add_argument('--output', '-o', help="файл результата (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+    if args.format == 'color' and args.checks != CHECKS:
+        parser.error("--format color требует всех проверок")
+    return args
+
+def stream_main(args):
+    """Потоковый режим: JSONL на входе, JSONL на выходе, без вывода отчета"""
+    if args.jsonl == '-':
+        input_stream = open(sys.stdin.fileno(), 'r', encoding='utf-8', closefd=False)
+    else:
+        input_stream = open(args.jsonl, 'r', encoding='utf-8')
+    
+    if args.output:
+        output_stream = open(args.output, 'w', encoding='utf-8')
+    else:
+        output_stream = open(sys.stdout.fileno(), 'w', encoding='utf-8', closefd=False)
+    
+    if args.profile:
+        INSTRUMENTATION.enable()
+    
+    analyzer = CaseAnalyzer(checks=args.checks)
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache)
+        analyzer = CachedAnalyzer(analyzer, cache)
     
-    found_events = []
-    text_lower = text.lower()
+    case_store = None
+    if args.db:
+        from modules.case_store import CaseStore
+        case_store = CaseStore(args.db)
     
-    for event in common_events:
-        if event in text_lower:
-            found_events.append(event)
+    try:
+        with input_stream, output_stream:
+            stats = stream_analyze(input_stream, output_stream, analyzer,
+                                   text_field=args.text_field, id_field=args.id_field,
+                                   case_store=case_store)
+    finally:
+        if cache is not None:
+            cache.close()
+        if case_store is not None:
+            case_store.close()
     
-    return found_events if found_events else ['неизвестное событие']
+    print(f"📈 {stats.report()}", file=sys.stderr)
+    if cache is not None:
+        print(f"🗄️  {cache.report()}", file=sys.stderr)
+    if case_store is not None:
+        print(f"🗃️  В базу кейсов записано: {case_store.written}", file=sys.stderr)
+    if args.profile:
+        print(INSTRUMENTATION.format_summary(), file=sys.stderr)
 
-def main():
-    print("🚀 ФАРМАКОНАДЗОРНЫЙ АССИСТЕНТ v5.0 - ПОЛНАЯ ВЕРСИЯ")
-    print("=" * 70)
+def main(argv=None):
+    args = parse_args(argv)
+    if args.jsonl:
+        return stream_main(args)
     
-    # Создаем проверяльщики
-    seriousness_checker = SeriousnessChecker()
-    ime_checker = IMEChecker()
-    expectedness_checker = ExpectednessChecker()
-    causality_checker = CausalityChecker()
-    missing_info_checker = MissingInfoChecker()
+    # Анализ и вывод разделены: отчеты кейсов уходят в отображение (modules/output_sinks.py)
+    sink = create_sink(args.format, args.output, args.renderer)
+    try:
+        analyze_cases(args, sink)
+    finally:
+        sink.close()
+
+def analyze_cases(args, sink):
+    """Демонстрационный режим: 6 кейсов из data/cases в выбранное отображение"""
+    sink.write_note("🚀 ФАРМАКОНАДЗОРНЫЙ АССИСТЕНТ v5.0 - ПОЛНАЯ ВЕРСИЯ")
+    sink.write_note("=" * 70)
+    
+    # Создаем проверяльщики (один раз на запуск, только выбранные)
+    analyzer = CaseAnalyzer(checks=args.checks)
+    checks = analyzer.checks
     
     # Показываем доступные препараты
-    available_drugs = expectedness_checker.get_available_drugs()
-    print(f"💊 Препараты в базе: {', '.join(available_drugs)}")
+    if 'expectedness' in checks:
+        available_drugs = analyzer.expectedness_checker.get_available_drugs()
+        sink.write_note(f"💊 Препараты в базе: {', '.join(available_drugs)}")
     
     # Проверяем все 6 кейсов
     for i in range(1, 7):
@@ -62,63 +115,18 @@ def main():
             with open(filename, 'r', encoding='utf-8') as f:
                 case_text = f.read().strip()
             
-            # Извлекаем нежелательные явления
-            adverse_events = extract_adverse_events(case_text)
-            
-            # Выводим результат
-            print(f"\n{'='*70}")
-            print(f"📋 КЕЙС {i}:")
-            print(f"📄 Текст: {case_text}")
-            print(f"🔍 Выявленные события: {', '.join(adverse_events)}")
-            
-            # Проверяем недостающую информацию
-            missing_info_result = missing_info_checker.check_missing_information(case_text, adverse_events[0] if adverse_events else '')
-            print(f"📊 Полнота информации: {missing_info_result['completeness_score']}%")
-            
-            if missing_info_result['missing_info']:
-                print("❌ Отсутствует информация:")
-                for question in missing_info_result['questions']:
-                    print(f"   - {question}")
-            
-            # Анализируем каждое событие
-            for event in adverse_events:
-                print(f"\n   📍 Анализ события: '{event.upper()}'")
-                
-                # Серьезность
-                seriousness_result = seriousness_checker.check_seriousness(case_text)
-                seriousness_status = "🔴 СЕРЬЕЗНЫЙ" if seriousness_result['is_serious'] else "🟢 НЕ серьезный"
-                print(f"   ⚠️  Серьезность: {seriousness_status}")
-                if seriousness_result['flags']:
-                    print(f"      Причины: {', '.join(seriousness_result['flags'])}")
-                
-                # IME значимость
-                ime_result = ime_checker.check_ime_significance(event)
-                ime_status = "🔴 ЗНАЧИМЫЙ" if ime_result['is_significant'] else "🟢 НЕ значимый"
-                print(f"   🏥 IME значимость: {ime_status}")
-                if ime_result['found_terms']:
-                    for term in ime_result['found_terms']:
-                        print(f"      Найден IME: '{term['russian']}' → {term['english']}")
-                
-                # Предвиденность
-                expectedness_result = expectedness_checker.check_expectedness(case_text, event)
-                expectedness_status = "🟢 ПРЕДВИДЕННЫЙ" if expectedness_result['is_expected'] else "🔴 НЕПРЕДВИДЕННЫЙ"
-                print(f"   📋 Предвиденность: {expectedness_status}")
-                print(f"      Препарат: {expectedness_result['drug']}")
-                print(f"      Причина: {expectedness_result['reason']}")
-                if 'frequency' in expectedness_result:
-                    print(f"      Частота: {expectedness_result['frequency']}")
-                
-                # Причинно-следственная связь
-                causality_result = causality_checker.analyze_causality(case_text, event)
-                print(f"   🔗 Причинность: {causality_result['level']}")
-                print(f"      Обоснование: {causality_result['reasoning']}")
-                    
+            # Признаки уровня текста считаются один раз на кейс
+            context = analyzer.context(case_text)
+            sink.write_case(case_report(filename, context, title=f"КЕЙС {i}"))
         else:
-            print(f"\n❌ Файл {filename} не найден!")
+            sink.write_note(f"\n❌ Файл {filename} не найден!")
     
-    print(f"\n{'='*70}")
-    print("🎉 АНАЛИЗ ЗАВЕРШЕН! Все 5 модулей работают!")
-    print("📈 Функциональность полная: Серьезность, IME, Предвиденность, Причинность, Полнота данных")
+    sink.write_note(f"\n{'='*70}")
+    if checks == CHECKS:
+        sink.write_note("🎉 АНАЛИЗ ЗАВЕРШЕН! Все 5 модулей работают!")
+        sink.write_note("📈 Функциональность полная: Серьезность, IME, Предвиденность, Причинность, Полнота данных")
+    else:
+        sink.write_note(f"🎉 АНАЛИЗ ЗАВЕРШЕН! Проверки: {', '.join(checks)}")
 
 if __name__ == "__main__":
     main()
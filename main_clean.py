@@ -1,39 +1,13 @@
 # main_clean.py - ЧИСТАЯ РАБОЧАЯ ВЕРСИЯ
 import os
-from modules.seriousness_checker import SeriousnessChecker
-from modules.ime_checker import IMEChecker
-from modules.expectedness_checker import ExpectednessChecker
-from modules.causality_checker import CausalityChecker
-from modules.missing_info_checker import MissingInfoChecker
-
-def extract_adverse_events(text):
-    """Извлекает нежелательные явления из текста"""
-    common_events = [
-        'головная боль', 'тошнота', 'сыпь', 'зуд', 'крапивница', 
-        'отек', 'диарея', 'головокружение', 'судороги', 'боль в животе',
-        'анафилактический шок', 'лихорадка', 'рвота', 'смерть', 'летальный',
-        'погиб', 'умер', 'скончался', 'госпитализирован', 'реанимация'
-    ]
-    
-    found_events = []
-    text_lower = text.lower()
-    
-    for event in common_events:
-        if event in text_lower:
-            found_events.append(event)
-    
-    return found_events if found_events else ['неизвестное событие']
+from modules.case_context import CaseAnalyzer
 
 def main():
     print("🚀 ФАРМАКОНАДЗОРНЫЙ АССИСТЕНТ")
     print("=" * 70)
     
-    # Создаем проверяльщики
-    seriousness_checker = SeriousnessChecker()
-    ime_checker = IMEChecker()
-    expectedness_checker = ExpectednessChecker()
-    causality_checker = CausalityChecker()
-    missing_info_checker = MissingInfoChecker()
+    # Создаем проверяльщики (один раз на запуск)
+    analyzer = CaseAnalyzer(event_lexicon='basic')
     
     # Проверяем все 6 кейсов
     for i in range(1, 7):
@@ -44,8 +18,11 @@ def main():
             with open(filename, 'r', encoding='utf-8') as f:
                 case_text = f.read().strip()
             
+            # Признаки уровня текста считаются один раз на кейс
+            context = analyzer.context(case_text)
+            
             # Извлекаем нежелательные явления
-            adverse_events = extract_adverse_events(case_text)
+            adverse_events = context.adverse_events
             
             # Выводим результат
             print(f"\n📋 КЕЙС {i}:")
@@ -53,7 +30,7 @@ def main():
             print(f"🔍 Выявленные события: {', '.join(adverse_events)}")
             
             # Проверяем недостающую информацию
-            missing_info_result = missing_info_checker.check_missing_information(case_text, adverse_events[0] if adverse_events else '')
+            missing_info_result = context.missing_info
             print(f"📊 Полнота информации: {missing_info_result['completeness_score']}%")
             
             if missing_info_result['missing_info']:
@@ -62,18 +39,19 @@ def main():
                     print(f"   - {question}")
             
             # Анализируем каждое событие
-            for event in adverse_events:
+            for event_result in context.evaluate_events():
+                event = event_result['event']
                 print(f"\n📍 Анализ события: '{event.upper()}'")
                 
                 # Серьезность
-                seriousness_result = seriousness_checker.check_seriousness(case_text)
+                seriousness_result = event_result['seriousness']
                 seriousness_status = "🔴 СЕРЬЕЗНЫЙ" if seriousness_result['is_serious'] else "🟢 НЕ серьезный"
                 print(f"   ⚠️  Серьезность: {seriousness_status}")
                 if seriousness_result['flags']:
                     print(f"      Причины: {', '.join(seriousness_result['flags'])}")
                 
                 # IME значимость
-                ime_result = ime_checker.check_ime_significance(event)
+                ime_result = event_result['ime']
                 ime_status = "🔴 ЗНАЧИМЫЙ" if ime_result['is_significant'] else "🟢 НЕ значимый"
                 print(f"   🏥 IME значимость: {ime_status}")
                 if ime_result['found_terms']:
@@ -81,7 +59,7 @@ def main():
                         print(f"      Найден IME: '{term['russian']}' → {term['english']}")
                 
                 # Предвиденность
-                expectedness_result = expectedness_checker.check_expectedness(case_text, event)
+                expectedness_result = event_result['expectedness']
                 expectedness_status = "🟢 ПРЕДВИДЕННЫЙ" if expectedness_result['is_expected'] else "🔴 НЕПРЕДВИДЕННЫЙ"
                 print(f"   📋 Предвиденность: {expectedness_status}")
                 print(f"      Препарат: {expectedness_result['drug']}")
@@ -90,7 +68,7 @@ def main():
                     print(f"      Частота: {expectedness_result['frequency']}")
                 
                 # Причинно-следственная связь
-                causality_result = causality_checker.analyze_causality(case_text, event)
+                causality_result = event_result['causality']
                 print(f"   🔗 Причинность: {causality_result['level']}")
                 print(f"      Обоснование: {causality_result['reasoning']}")
                     
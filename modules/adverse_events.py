@@ -0,0 +1,54 @@
+# modules/adverse_events.py
+from modules.lexicon import get_default_lexicon
+
+# Расширенный список медицинских терминов (main.py)
+COMMON_EVENTS = [
+    # Кардиологические
+    'инфаркт миокарда', 'ишемия миокарда', 'перикардиальный выпот',
+    'тромбоз коронарных артерий', 'артериальный тромбоз', 'тромбоэмболия',
+    'атриовентрикулярная блокада', 'желудочковые экстрасистолы', 'сердцебиение',
+    'удлинение интервала qt', 'артериальная гипертензия', 'хсн',
+    'суправентрикулярная тахикардия', 'венозная тромбоэмболия',
+    'артериальная тромбоэмболия', 'тромбоз глубоких вен', 'тэла',
+
+    # Неврологические
+    'психотическое расстройство', 'галлюцинации', 'гипестезия', 'тремор',
+    'летаргия', 'периферическая нейропатия', 'головокружение', 'головная боль',
+    'сонливость', 'заторможенность', 'инсульт', 'синкопе',
+    'гипертензивная энцефалопатия',
+
+    # Общие серьезные
+    'смерть', 'летальный', 'погиб', 'умер', 'госпитализирован',
+    'реанимация', 'угроза жизни'
+]
+
+# Базовый список (main_clean.py, run_beautiful.py)
+BASIC_EVENTS = [
+    'головная боль', 'тошнота', 'сыпь', 'зуд', 'крапивница',
+    'отек', 'диарея', 'головокружение', 'судороги', 'боль в животе',
+    'анафилактический шок', 'лихорадка', 'рвота', 'смерть', 'летальный',
+    'погиб', 'умер', 'скончался', 'госпитализирован', 'реанимация'
+]
+
+EVENT_LEXICONS = {
+    'common': COMMON_EVENTS,
+    'basic': BASIC_EVENTS
+}
+
+# Заглушка, если в тексте не найдено ни одного явления (не настоящее явление)
+UNKNOWN_EVENT = 'неизвестное событие'
+PLACEHOLDER_EVENTS = frozenset([UNKNOWN_EVENT])
+
+
+def extract_adverse_events(text, hits=None, lexicon='common'):
+    """
+    Извлекает нежелательные явления из текста
+    hits - результат общего словаря для кейса (если уже посчитан)
+    """
+    if hits is None:
+        hits = get_default_lexicon(('events',)).scan(text)
+
+    found = hits.terms(f'events.{lexicon}')
+    found_events = [event for event in EVENT_LEXICONS[lexicon] if event in found]
+
+    return found_events if found_events else [UNKNOWN_EVENT]
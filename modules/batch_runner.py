@@ -0,0 +1,340 @@
+# modules/batch_runner.py
+import os
+import time
+
+from modules.case_archive import CaseArchive, decode_case_text
+from modules.case_context import CaseAnalyzer
+from modules.instrumentation import INSTRUMENTATION
+from modules.result_cache import CachedAnalyzer, ResultCache
+
+# Проверяльщики процесса-обработчика (создаются один раз в initializer)
+_worker_analyzer = None
+_worker_cache = None
+# MinHash процесса-обработчика для поиска дубликатов (None - поиск выключен)
+_worker_minhasher = None
+# Анализатор, построенный в основном процессе до fork (режим общей базы знаний)
+_shared_analyzer = None
+# Архивы кейсов, открытые процессом-обработчиком: {путь: CaseArchive}
+_worker_archives = {}
+
+# Диапазонов архива на процесс пула (выравнивает нагрузку при кейсах разной длины)
+RANGES_PER_WORKER = 4
+
+
+def discover_cases(root, suffix='.txt'):
+    """Находит все файлы кейсов в дереве каталогов (в стабильном порядке)"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(suffix):
+                found.append(os.path.join(dirpath, filename))
+    return found
+
+
+def read_manifest(manifest_path):
+    """
+    Читает манифест: один путь к кейсу на строку, '#' - комментарий.
+    Относительные пути считаются от каталога манифеста.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    paths = []
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            paths.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+
+    return paths
+
+
+def load_case_text(path):
+    """Текст кейса из файла (decode_case_text); ошибки - OSError / UnicodeDecodeError"""
+    with open(path, 'rb') as f:
+        return decode_case_text(f.read())
+
+
+def read_case_text(path):
+    """Текст кейса или None, если файл недоступен"""
+    try:
+        return load_case_text(path)
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def analyze_case(analyzer, case_id, text):
+    """Анализирует один кейс и возвращает компактный результат"""
+    result = {'case_id': case_id}
+    result.update(analyzer.context(text).summary())
+    return result
+
+
+def analyze_file(analyzer, path):
+    """Читает и анализирует файл кейса; ошибки чтения не прерывают пакет"""
+    return analyze_file_tracked(analyzer, path)[0]
+
+
+def create_analyzer(event_lexicon='common', cache_path=None, checks=None):
+    """
+    Создает анализатор; с cache_path - с кэшем результатов (ResultCache)
+    checks - выполняемые проверки (по умолчанию - все)
+    """
+    analyzer = CaseAnalyzer(event_lexicon=event_lexicon, checks=checks)
+    if cache_path:
+        return CachedAnalyzer(analyzer, ResultCache(cache_path))
+    return analyzer
+
+
+def _track_cache(analyzer, analyze, *args):
+    """Результат analyze(analyzer, *args) и признак, взят ли он из кэша (None - кэша нет)"""
+    cache = getattr(analyzer, 'cache', None)
+    if cache is None:
+        return analyze(analyzer, *args), None
+
+    hits_before = cache.hits
+    result = analyze(analyzer, *args)
+    return result, cache.hits > hits_before
+
+
+def analyze_file_tracked(analyzer, path):
+    """
+    Анализирует файл: (результат, из кэша (None - кэша нет), текст кейса).
+    Ошибка чтения - результат с 'error' и текст None; текст нужен для сигнатуры
+    дубликатов (case_signature), чтобы файл не читался второй раз.
+    """
+    try:
+        case_text = load_case_text(path)
+    except (OSError, UnicodeDecodeError) as e:
+        return {'case_id': path, 'error': str(e)}, None, None
+
+    result, cache_hit = _track_cache(analyzer, analyze_case, path, case_text)
+    return result, cache_hit, case_text
+
+
+def analyze_archive_range(analyzer, archive, start, stop, minhasher=None):
+    """
+    Анализирует кейсы архива с номерами [start, stop) (modules/case_archive.py).
+    Генерирует (результат, из кэша, MinHash-сигнатура или None); текст декодируется
+    только здесь, ошибка декодирования не прерывает пакет.
+    """
+    for position in range(start, stop):
+        case_id = archive.case_id(position)
+        try:
+            text = archive.text(position)
+        except UnicodeDecodeError as e:
+            yield {'case_id': case_id, 'error': str(e)}, None, None
+            continue
+        result, cache_hit = _track_cache(analyzer, analyze_case, case_id, text)
+        yield result, cache_hit, case_signature(minhasher, text)
+
+
+def case_signature(minhasher, text):
+    """MinHash-сигнатура описания кейса для поиска дубликатов (None - без поиска или без текста)"""
+    if minhasher is None or text is None:
+        return None
+    return minhasher.signature(text)
+
+
+def _init_worker(event_lexicon, cache_path, instrument=False, checks=None, minhasher=None):
+    """Создает проверяльщики один раз на процесс-обработчик"""
+    global _worker_analyzer, _worker_minhasher
+    if instrument:
+        INSTRUMENTATION.enable()
+    _worker_analyzer = create_analyzer(event_lexicon, cache_path, checks)
+    _worker_minhasher = minhasher
+    if cache_path:
+        import multiprocessing.util
+
+        # Сбрасываем кэш на диск при штатном завершении процесса
+        multiprocessing.util.Finalize(_worker_analyzer.cache, _worker_analyzer.cache.close,
+                                      exitpriority=10)
+
+
+def _init_shared_worker(cache_path, instrument=False, minhasher=None):
+    """Процесс пула с общей базой знаний: анализатор унаследован от основного процесса"""
+    global _worker_analyzer, _worker_minhasher
+    import gc
+
+    gc.enable()
+    if instrument:
+        INSTRUMENTATION.enable()
+    _worker_analyzer = _shared_analyzer
+    _worker_minhasher = minhasher
+    if cache_path:
+        import multiprocessing.util
+
+        # Кэш результатов (соединение SQLite) у каждого процесса свой
+        _worker_analyzer = CachedAnalyzer(_shared_analyzer, ResultCache(cache_path))
+        multiprocessing.util.Finalize(_worker_analyzer.cache, _worker_analyzer.cache.close,
+                                      exitpriority=10)
+
+
+def _worker_metrics():
+    """Замеры процесса-обработчика с прошлой задачи (None, если замеры выключены)"""
+    return INSTRUMENTATION.drain() if INSTRUMENTATION.enabled else None
+
+
+def _analyze_in_worker(path):
+    result, cache_hit, text = analyze_file_tracked(_worker_analyzer, path)
+    return result, cache_hit, _worker_metrics(), case_signature(_worker_minhasher, text)
+
+
+def _analyze_range_in_worker(task):
+    """Диапазон архива (путь, start, stop): архив открывается один раз на процесс"""
+    archive_path, start, stop = task
+    archive = _worker_archives.get(archive_path)
+    if archive is None:
+        archive = _worker_archives[archive_path] = CaseArchive(archive_path)
+    items = list(analyze_archive_range(_worker_analyzer, archive, start, stop, _worker_minhasher))
+    return items, _worker_metrics()
+
+
+def _analyze_text_in_worker(case_id, text):
+    return analyze_case(_worker_analyzer, case_id, text), _worker_metrics()
+
+
+def _warm_up_worker(barrier, timeout):
+    """
+    Загружает проверяльщики и базу знаний процесса и ждет на барьере остальные процессы
+    пула (каждую задачу прогрева выполняет свой процесс). Возвращает pid процесса
+    """
+    _worker_analyzer.preload()
+    barrier.wait(timeout)
+    return os.getpid()
+
+
+class BatchStats:
+    """Счетчик производительности пакета"""
+
+    def __init__(self):
+        self.cases = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.started = time.perf_counter()
+        # Память процессов пула в конце пакета (modules/shared_kb.py; пусто - без пула)
+        self.worker_memory = []
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def cases_per_second(self):
+        elapsed = self.elapsed
+        return self.cases / elapsed if elapsed > 0 else 0.0
+
+    def add(self, result, cache_hit=None):
+        self.cases += 1
+        if 'error' in result:
+            self.errors += 1
+        if cache_hit is True:
+            self.cache_hits += 1
+        elif cache_hit is False:
+            self.cache_misses += 1
+
+    def report(self):
+        report = (f"Обработано кейсов: {self.cases} (ошибок: {self.errors}) "
+                  f"за {self.elapsed:.2f} с - {self.cases_per_second:.1f} кейсов/с")
+        if self.cache_hits or self.cache_misses:
+            report += f"; кэш: попаданий {self.cache_hits}, промахов {self.cache_misses}"
+        return report
+
+
+def run_batch(paths, workers=None, chunksize=16, ordered=True,
+              event_lexicon='common', stats=None, cache_path=None, checks=None, dedup=None,
+              shared=False):
+    """
+    Анализирует кейсы в пуле процессов.
+    paths - пути к файлам кейсов или CaseArchive (modules/case_archive.py): архив
+    делится на диапазоны кейсов примерно равного размера в байтах, процесс пула
+    читает свой диапазон из отображенного в память файла
+    workers - число процессов (по умолчанию - все ядра; 1 - без пула)
+    ordered - выдавать результаты в порядке входа (иначе - по мере готовности)
+    cache_path - файл SQLite кэша результатов (неизмененные кейсы не пересчитываются)
+    checks - выполняемые проверки (по умолчанию - все)
+    dedup - DuplicateIndex (modules/dedup.py): сигнатуры описаний считаются в процессах
+    пула, кейс индексируется, а в результат добавляется 'duplicates' - похожие
+    ранее проиндексированные кейсы (только если они есть)
+    shared - общая база знаний (modules/shared_kb.py): проверяльщики строятся один раз
+    в основном процессе и передаются процессам пула через fork; где fork недоступен -
+    обычный режим. Память процессов пула в конце пакета - в stats.worker_memory.
+    Если замеры включены (modules/instrumentation.py), они ведутся и в процессах пула
+    и собираются в INSTRUMENTATION основного процесса.
+    Генерирует результаты по одному.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if stats is None:
+        stats = BatchStats()
+
+    minhasher = dedup.minhasher if dedup is not None else None
+
+    def finish(result, cache_hit, signature):
+        if signature is not None:
+            duplicates = dedup.add_signature(result['case_id'], signature)
+            if duplicates:
+                result['duplicates'] = duplicates
+        stats.add(result, cache_hit)
+        return result
+
+    archive = paths if isinstance(paths, CaseArchive) else None
+
+    if workers <= 1:
+        analyzer = create_analyzer(event_lexicon, cache_path, checks)
+        try:
+            if archive is not None:
+                for result, cache_hit, signature in analyze_archive_range(analyzer, archive, 0, len(archive),
+                                                                          minhasher):
+                    yield finish(result, cache_hit, signature)
+                return
+            for path in paths:
+                result, cache_hit, text = analyze_file_tracked(analyzer, path)
+                yield finish(result, cache_hit, case_signature(minhasher, text))
+        finally:
+            if cache_path:
+                analyzer.cache.close()
+        return
+
+    # multiprocessing импортируется только для пула: однопроцессный запуск стартует быстрее
+    import multiprocessing
+
+    from modules import shared_kb
+
+    global _shared_analyzer
+    shared = shared and shared_kb.fork_available()
+    if shared:
+        _shared_analyzer = shared_kb.build_shared(
+            lambda: CaseAnalyzer(event_lexicon=event_lexicon, checks=checks).preload()
+        )
+        pool = shared_kb.start_pool(workers, _init_shared_worker,
+                                    (cache_path, INSTRUMENTATION.enabled, minhasher))
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                    initargs=(event_lexicon, cache_path, INSTRUMENTATION.enabled, checks, minhasher))
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        if archive is not None:
+            tasks = [(archive.path, start, stop)
+                     for start, stop in archive.byte_ranges(min_ranges=workers * RANGES_PER_WORKER)]
+            for items, metrics in imap(_analyze_range_in_worker, tasks):
+                if metrics:
+                    INSTRUMENTATION.merge(metrics)
+                for result, cache_hit, signature in items:
+                    yield finish(result, cache_hit, signature)
+        else:
+            for result, cache_hit, metrics, signature in imap(_analyze_in_worker, paths, chunksize):
+                if metrics:
+                    INSTRUMENTATION.merge(metrics)
+                yield finish(result, cache_hit, signature)
+        stats.worker_memory = shared_kb.workers_memory()
+        # Штатное завершение процессов: кэш успевает записаться на диск
+        pool.close()
+        pool.join()
+    finally:
+        pool.terminate()
+        if shared:
+            _shared_analyzer = None
+            shared_kb.release_shared()
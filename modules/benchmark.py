@@ -0,0 +1,253 @@
+# modules/benchmark.py
+import datetime
+import gc
+import platform
+import subprocess
+import time
+import tracemalloc
+
+from modules.case_context import CaseAnalyzer
+from modules.narrative_generator import NarrativeGenerator
+
+# Меняется при изменении состава или смысла замеров - такие результаты не сравниваются
+BENCHMARK_FORMAT = 1
+
+# Допустимое замедление по умолчанию (10%)
+DEFAULT_THRESHOLD = 0.10
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_calls(function, arguments, repeat=3):
+    """
+    Вызывает function(*args) для каждого набора аргументов; повторяет repeat раз
+    и берет лучший проход (меньше всего шума от планировщика и кэшей).
+    """
+    best = None
+    gc.collect()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for args in arguments:
+            function(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    calls = len(arguments)
+    return {
+        'calls': calls,
+        'total_s': round(best, 6),
+        'mean_us': round(best / calls * 1e6, 3) if calls else 0.0,
+        'ops_per_s': round(calls / best, 1) if best else 0.0
+    }
+
+
+def run_benchmarks(cases=200, length=3000, density=2.0, repeat=3, seed=0):
+    """
+    Замеряет каждый проверяльщик и весь конвейер на синтетических кейсах.
+    Проверки уровня явления вызываются для каждой пары (кейс, явление).
+    Возвращает JSON-совместимый словарь с параметрами, окружением и замерами.
+    """
+    generator = NarrativeGenerator(seed=seed)
+    corpus = [case['text'] for case in generator.generate_corpus(cases, length, density)]
+
+    analyzer = CaseAnalyzer()
+    pairs = [(text, event) for text in corpus for event in analyzer.context(text).adverse_events]
+    texts = [(text,) for text in corpus]
+
+    def pipeline(text):
+        return analyzer.context(text).summary()
+
+    benchmarks = {
+        'lexicon_scan': time_calls(analyzer.lexicon.scan, texts, repeat),
+        'check_seriousness': time_calls(analyzer.seriousness_checker.check_seriousness, texts, repeat),
+        'check_ime_significance': time_calls(analyzer.ime_checker.check_ime_significance, texts, repeat),
+        'check_expectedness': time_calls(analyzer.expectedness_checker.check_expectedness, pairs, repeat),
+        'analyze_causality': time_calls(analyzer.causality_checker.analyze_causality, pairs, repeat),
+        'check_missing_information': time_calls(
+            analyzer.missing_info_checker.check_missing_information, pairs, repeat
+        ),
+        'pipeline': time_calls(pipeline, texts, repeat),
+    }
+
+    return {
+        'format': BENCHMARK_FORMAT,
+        'commit': _git_commit(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+        },
+        'params': {
+            'cases': cases,
+            'length': length,
+            'density': density,
+            'repeat': repeat,
+            'seed': seed,
+            'corpus_chars': sum(len(text) for text in corpus),
+            'events': len(pairs)
+        },
+        'benchmarks': benchmarks
+    }
+
+
+def retained_bytes(build):
+    """Память (байт), оставшаяся занятой объектами, которые вернул build() (tracemalloc)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return retained, kept
+
+
+def measure_result_memory(cases=200, length=3000, density=2.0, seed=0):
+    """
+    Сравнивает память результатов проверяльщиков (серьезность, полнота данных,
+    причинность по каждому явлению) в компактном виде и в прежнем формате словарей.
+    Прежний формат - to_dict() тех же результатов: ровно то, что возвращали проверяльщики раньше.
+    """
+    generator = NarrativeGenerator(seed=seed)
+    analyzer = CaseAnalyzer()
+    seriousness = analyzer.seriousness_checker
+    missing_info = analyzer.missing_info_checker
+    causality = analyzer.causality_checker
+
+    # Текст, проход словаря и факты кейса существуют в обоих вариантах - считаем их заранее
+    prepared = []
+    for case in generator.generate_corpus(cases, length, density):
+        context = analyzer.context(case['text'])
+        prepared.append((context.text, context.hits, context.causality_facts, context.adverse_events))
+
+    def build():
+        results = []
+        for text, hits, case_facts, events in prepared:
+            results.append(seriousness.check_seriousness(text, hits))
+            results.append(missing_info.check_missing_information(text, events[0] if events else '', hits))
+            for event in events:
+                results.append(causality.analyze_causality(text, event, case_facts=case_facts))
+        return results
+
+    build()  # прогрев: кэши проверяльщиков не должны попасть в замер
+    compact_bytes, results = retained_bytes(build)
+    legacy_bytes, _ = retained_bytes(lambda: [result.to_dict() for result in results])
+
+    count = len(results)
+    return {
+        'results': count,
+        'compact_bytes': compact_bytes,
+        'legacy_bytes': legacy_bytes,
+        'compact_per_result': round(compact_bytes / count, 1) if count else 0.0,
+        'legacy_per_result': round(legacy_bytes / count, 1) if count else 0.0,
+        'ratio': round(legacy_bytes / compact_bytes, 2) if compact_bytes else 0.0
+    }
+
+
+def format_memory(memory):
+    return '\n'.join([
+        f"🧠 Память результатов проверяльщиков ({memory['results']} результатов):",
+        f"   компактные объекты   {memory['compact_bytes'] / 1024:>10.1f} КБ "
+        f"{memory['compact_per_result']:>8.1f} байт/результат",
+        f"   словари (прежний)    {memory['legacy_bytes'] / 1024:>10.1f} КБ "
+        f"{memory['legacy_per_result']:>8.1f} байт/результат",
+        f"   экономия: в {memory['ratio']} раза"
+    ])
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD, thresholds=None):
+    """
+    Сравнивает два результата по среднему времени вызова.
+    thresholds - допустимое замедление для отдельных замеров ({'pipeline': 0.05}).
+    Возвращает список строк {'name', 'baseline_us', 'current_us', 'change', 'status'};
+    status: 'regression', 'improvement', 'ok', 'new' или 'removed'.
+    """
+    if baseline.get('format') != current.get('format'):
+        raise ValueError(
+            f"Разные форматы результатов: {baseline.get('format')} и {current.get('format')}"
+        )
+    if baseline.get('params') and current.get('params'):
+        keys = ('cases', 'length', 'density', 'seed')
+        if any(baseline['params'].get(key) != current['params'].get(key) for key in keys):
+            raise ValueError("Результаты получены на разных синтетических корпусах")
+
+    thresholds = thresholds or {}
+    rows = []
+    names = list(baseline['benchmarks']) + [
+        name for name in current['benchmarks'] if name not in baseline['benchmarks']
+    ]
+
+    for name in names:
+        before = baseline['benchmarks'].get(name)
+        after = current['benchmarks'].get(name)
+        row = {
+            'name': name,
+            'baseline_us': before['mean_us'] if before else None,
+            'current_us': after['mean_us'] if after else None,
+            'change': None
+        }
+
+        if before is None:
+            row['status'] = 'new'
+        elif after is None:
+            row['status'] = 'removed'
+        else:
+            change = after['mean_us'] / before['mean_us'] - 1 if before['mean_us'] else 0.0
+            limit = thresholds.get(name, threshold)
+            row['change'] = round(change, 4)
+            if change > limit:
+                row['status'] = 'regression'
+            elif change < -limit:
+                row['status'] = 'improvement'
+            else:
+                row['status'] = 'ok'
+        rows.append(row)
+
+    return rows
+
+
+def has_regressions(rows):
+    return any(row['status'] == 'regression' for row in rows)
+
+
+STATUS_ICONS = {'regression': '🔴', 'improvement': '🟢', 'ok': '⚪', 'new': '🆕', 'removed': '➖'}
+
+
+def format_results(results):
+    params = results['params']
+    lines = [
+        f"📊 Бенчмарк ({results['commit'] or 'без git'}, Python {results['environment']['python']}): "
+        f"{params['cases']} кейсов по ~{params['length']} символов, явлений: {params['events']}"
+    ]
+    for name, benchmark in results['benchmarks'].items():
+        lines.append(f"   {name:<28} {benchmark['mean_us']:>12.1f} мкс/вызов "
+                     f"{benchmark['ops_per_s']:>12.1f} вызовов/с")
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    lines = []
+    for row in rows:
+        change = f"{row['change'] * 100:+.1f}%" if row['change'] is not None else ''
+        before = f"{row['baseline_us']:.1f}" if row['baseline_us'] is not None else '-'
+        after = f"{row['current_us']:.1f}" if row['current_us'] is not None else '-'
+        lines.append(f"   {STATUS_ICONS[row['status']]} {row['name']:<28} "
+                     f"{before:>10} → {after:>10} мкс {change:>8}")
+    return '\n'.join(lines)
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    results = run_benchmarks(cases=20, length=2000, repeat=1)
+    print(format_results(results))
+    print(format_comparison(compare_results(results, results)))
+    print(format_memory(measure_result_memory(cases=20, length=2000)))
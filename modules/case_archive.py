@@ -0,0 +1,287 @@
+# modules/case_archive.py
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+# Архив кейсов: вместо миллионов мелких .txt - два файла.
+#   <архив>      - тексты кейсов подряд (UTF-8, байты исходных файлов без изменений)
+#   <архив>.idx  - заголовок, смещения текстов (count + 1 чисел uint64),
+#                  смещения идентификаторов (count + 1 чисел uint64) и идентификаторы (UTF-8)
+# Оба файла отображаются в память (mmap): текст кейса - срез memoryview без копирования,
+# декодируется только при обращении. Длина кейса i - offsets[i + 1] - offsets[i].
+
+INDEX_SUFFIX = '.idx'
+INDEX_MAGIC = b'PVCAIDX1'
+_HEADER = struct.Struct('<8sQ')
+
+# Целевой размер диапазона архива на одну задачу процесса пула
+RANGE_BYTES = 4 << 20
+
+
+def _uint64_view(buffer, start, count):
+    """Массив uint64 (little-endian) из буфера: без копирования, если порядок байтов совпадает"""
+    view = memoryview(buffer)[start:start + count * 8]
+    if sys.byteorder == 'little':
+        return view.cast('Q')
+    values = array('Q', view)
+    values.byteswap()
+    return values
+
+
+def decode_case_text(data):
+    """
+    Текст кейса из байтов файла: UTF-8, переводы строк \r\n и \r - в \n (как при
+    чтении файла в текстовом режиме), без пробелов по краям; ошибка UTF-8 - UnicodeDecodeError
+    """
+    return str(data, 'utf-8').replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def _map_file(path):
+    """Файл только для чтения, отображенный в память (пустой файл - пустые байты)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ArchiveWriter:
+    """
+    Последовательная запись архива: add(case_id, data) для каждого кейса, затем close().
+    Файлы пишутся во временные и переименовываются при close(): каждый файл
+    заменяется целиком, но данные и индекс - по отдельности, не атомарно.
+    Архив, который открывают читатели, перезаписывать нельзя: между заменами
+    виден новый файл данных со старым индексом (CaseArchive сверяет только размер).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = open(path + '.tmp', 'wb')
+        self._offsets = array('Q', [0])
+        self._id_offsets = array('Q', [0])
+        self._ids = []
+        self._ids_size = 0
+        self._seen = set()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def add(self, case_id, data):
+        """Добавляет кейс: data - текст или байты UTF-8; повтор идентификатора - ValueError"""
+        if case_id in self._seen:
+            raise ValueError(f"Кейс '{case_id}' уже есть в архиве")
+        self._seen.add(case_id)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._data.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+        encoded_id = case_id.encode('utf-8')
+        self._ids.append(encoded_id)
+        self._ids_size += len(encoded_id)
+        self._id_offsets.append(self._ids_size)
+
+    def close(self):
+        self._data.close()
+        offsets, id_offsets = self._offsets, self._id_offsets
+        if sys.byteorder != 'little':
+            offsets, id_offsets = array('Q', offsets), array('Q', id_offsets)
+            offsets.byteswap()
+            id_offsets.byteswap()
+
+        index_path = self.path + INDEX_SUFFIX
+        with open(index_path + '.tmp', 'wb') as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, len(self)))
+            f.write(offsets.tobytes())
+            f.write(id_offsets.tobytes())
+            f.write(b''.join(self._ids))
+
+        # Две замены, не одна: несовпадение размера данных и индекса CaseArchive отвергнет,
+        # совпадение размеров - нет
+        os.replace(self.path + '.tmp', self.path)
+        os.replace(index_path + '.tmp', index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._data.close()
+            os.remove(self.path + '.tmp')
+
+
+def pack_directory(root, path, suffix='.txt'):
+    """
+    Упаковывает каталог кейсов в архив. Идентификатор кейса - путь к файлу
+    в том же виде, что у batch.py для каталога (результаты совпадают).
+    Возвращает число кейсов.
+    """
+    # Импорт внутри функции: batch_runner сам использует этот модуль
+    from modules.batch_runner import discover_cases
+
+    with ArchiveWriter(path) as writer:
+        for case_path in discover_cases(root, suffix):
+            with open(case_path, 'rb') as f:
+                writer.add(case_path, f.read())
+    return len(writer)
+
+
+class CaseArchive:
+    """
+    Архив кейсов только для чтения (mmap).
+    Доступ по номеру (raw, text, case_id) и по идентификатору (get, in);
+    итерация - пары (case_id, текст) в порядке упаковки.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = _map_file(path)
+        self._index = _map_file(path + INDEX_SUFFIX)
+
+        magic, count = _HEADER.unpack_from(self._index, 0) if len(self._index) >= _HEADER.size else (b'', 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"Не индекс архива кейсов: {path}{INDEX_SUFFIX}")
+        self._count = count
+        self.offsets = _uint64_view(self._index, _HEADER.size, count + 1)
+        self._id_offsets = _uint64_view(self._index, _HEADER.size + (count + 1) * 8, count + 1)
+        self._ids_start = _HEADER.size + (count + 1) * 16
+        if self.offsets[count] != len(self._data):
+            raise ValueError(f"Размер данных архива не совпадает с индексом: {path}")
+        self._positions = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size(self):
+        """Размер текстов архива, байты"""
+        return self.offsets[self._count]
+
+    def case_id(self, position):
+        start = self._ids_start + self._id_offsets[position]
+        end = self._ids_start + self._id_offsets[position + 1]
+        return str(self._index[start:end], 'utf-8')
+
+    def raw(self, position):
+        """Байты кейса: memoryview на отображенный файл, без копирования"""
+        return memoryview(self._data)[self.offsets[position]:self.offsets[position + 1]]
+
+    def text(self, position):
+        """Текст кейса (decode_case_text - как при чтении файла кейса); ошибка UTF-8 - UnicodeDecodeError"""
+        return decode_case_text(self.raw(position))
+
+    def position(self, case_id):
+        """Номер кейса по идентификатору (словарь строится при первом обращении); нет - KeyError"""
+        if self._positions is None:
+            self._positions = {self.case_id(position): position for position in range(self._count)}
+        return self._positions[case_id]
+
+    def get(self, case_id, default=None):
+        """Текст кейса по идентификатору (default, если кейса нет)"""
+        try:
+            return self.text(self.position(case_id))
+        except KeyError:
+            return default
+
+    def __contains__(self, case_id):
+        try:
+            self.position(case_id)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self.case_id(position), self.text(position)
+
+    def byte_ranges(self, range_bytes=RANGE_BYTES, min_ranges=1):
+        """
+        Делит архив на непрерывные диапазоны кейсов [(start, stop)] примерно по range_bytes
+        байт текста (не меньше min_ranges диапазонов, если хватает кейсов).
+        Границы находятся двоичным поиском по смещениям - архив не читается.
+        """
+        count = self._count
+        if not count:
+            return []
+        parts = max(min_ranges, -(-self.size // range_bytes), 1)
+        parts = min(parts, count)
+
+        ranges = []
+        start = 0
+        for part in range(1, parts + 1):
+            if part == parts:
+                stop = count
+            else:
+                stop = bisect_left(self.offsets, self.size * part // parts, start + 1, count)
+            if stop > start:
+                ranges.append((start, stop))
+                start = stop
+        return ranges
+
+    def close(self):
+        for view in (self.offsets, self._id_offsets):
+            if isinstance(view, memoryview):
+                view.release()
+        # Срезы raw(), оставшиеся у вызывающего, держат отображение - тогда его закроет сборщик мусора
+        for mapping in (self._data, self._index):
+            if isinstance(mapping, mmap.mmap):
+                try:
+                    mapping.close()
+                except BufferError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from modules.narrative_generator import NarrativeGenerator
+
+    print("🧪 Тестирование архива кейсов:")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'cases.pvca')
+        print(f"Упаковано из data/cases: {pack_directory('data/cases', path)}")
+        with CaseArchive(path) as archive:
+            print(f"Кейсов: {len(archive)}, байт: {archive.size}")
+            print(f"data/cases/case_3.txt: {archive.get('data/cases/case_3.txt')[:70]}…")
+            print(f"Диапазоны по 4 КБ: {archive.byte_ranges(4096)}")
+
+        # Масштаб: 20 000 кейсов - архив против отдельных файлов
+        corpus = list(NarrativeGenerator(seed=5).generate_corpus(20000, 1500))
+        cases_dir = os.path.join(work_dir, 'cases')
+        os.makedirs(cases_dir)
+        for number, case in enumerate(corpus):
+            with open(os.path.join(cases_dir, f'case_{number:05d}.txt'), 'w', encoding='utf-8') as f:
+                f.write(case['text'])
+
+        started = time.perf_counter()
+        pack_directory(cases_dir, path)
+        packed = time.perf_counter() - started
+
+        from modules.batch_runner import discover_cases, read_case_text
+
+        started = time.perf_counter()
+        from_files = sum(len(read_case_text(case_path)) for case_path in discover_cases(cases_dir))
+        files_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with CaseArchive(path) as archive:
+            from_archive = sum(len(text) for _, text in archive)
+        archive_elapsed = time.perf_counter() - started
+
+        print(f"\n{len(corpus)} кейсов: упаковка {packed:.2f} с")
+        print(f"Чтение файлов: {files_elapsed:.2f} с, архива: {archive_elapsed:.2f} с "
+              f"(символов {from_files} / {from_archive})")
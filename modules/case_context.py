@@ -0,0 +1,296 @@
+# modules/case_context.py
+import argparse
+import importlib
+from functools import cached_property
+
+from modules.adverse_events import extract_adverse_events
+from modules.lexicon import get_default_lexicon
+from modules.segmenter import event_windows, segment
+
+# Проверки в порядке вывода и классы проверяльщиков (импортируются только нужные)
+CHECKS = ('seriousness', 'ime', 'expectedness', 'causality', 'missing_info')
+
+CHECKER_CLASSES = {
+    'seriousness': ('modules.seriousness_checker', 'SeriousnessChecker'),
+    'ime': ('modules.ime_checker', 'IMEChecker'),
+    'expectedness': ('modules.expectedness_checker', 'ExpectednessChecker'),
+    'causality': ('modules.causality_checker', 'CausalityChecker'),
+    'missing_info': ('modules.missing_info_checker', 'MissingInfoChecker'),
+}
+
+
+def parse_checks(value):
+    """
+    Разбирает список проверок из командной строки: 'seriousness,ime' или 'all'.
+    Возвращает кортеж в порядке CHECKS; неизвестное имя - ValueError.
+    """
+    if value is None or value.strip() == 'all':
+        return CHECKS
+
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(CHECKS)
+    if unknown or not names:
+        raise ValueError(
+            f"Неизвестные проверки: {', '.join(sorted(unknown)) or '(пусто)'}; "
+            f"доступны: {', '.join(CHECKS)}"
+        )
+    return tuple(check for check in CHECKS if check in names)
+
+
+def checks_argument(value):
+    """Тип аргумента командной строки --checks"""
+    try:
+        return parse_checks(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def summarize_ime(ime_result):
+    """Компактная запись IME: английские термины найденных IME"""
+    return [term['english'] for term in ime_result['found_terms']]
+
+
+def summarize_expectedness(expectedness_result):
+    """Компактная запись предвиденности"""
+    return {
+        'is_expected': expectedness_result['is_expected'],
+        'expectedness_reason': expectedness_result['reason']
+    }
+
+
+class CaseAnalyzer:
+    """
+    Проверяльщики и общий словарь, создаваемые один раз.
+    Для каждого кейса выдает CaseContext.
+    checks - выполняемые проверки (по умолчанию - все пять); модули остальных
+    проверяльщиков не импортируются, а их база знаний не загружается.
+    Проверяльщики создаются при первом обращении.
+    """
+
+    def __init__(self, seriousness_checker=None, ime_checker=None,
+                 expectedness_checker=None, causality_checker=None,
+                 missing_info_checker=None, event_lexicon='common', checks=None):
+        self.checks = CHECKS if checks is None else tuple(check for check in CHECKS if check in checks)
+        self.event_lexicon = event_lexicon
+        self._checkers = {
+            name: checker for name, checker in (
+                ('seriousness', seriousness_checker),
+                ('ime', ime_checker),
+                ('expectedness', expectedness_checker),
+                ('causality', causality_checker),
+                ('missing_info', missing_info_checker),
+            ) if checker is not None
+        }
+        # Явления нужны всегда; остальные группы словаря - только для выбранных проверок
+        self.lexicon = get_default_lexicon(('events',) + self.checks)
+
+    @property
+    def variant(self):
+        """Вариант анализа: от него зависит результат при том же тексте (для ключа кэша)"""
+        return f"{self.event_lexicon}:{','.join(self.checks)}"
+
+    def checker(self, name):
+        """Проверяльщик по имени проверки (создается при первом обращении)"""
+        checker = self._checkers.get(name)
+        if checker is None:
+            module_name, class_name = CHECKER_CLASSES[name]
+            checker = getattr(importlib.import_module(module_name), class_name)()
+            self._checkers[name] = checker
+        return checker
+
+    @property
+    def seriousness_checker(self):
+        return self.checker('seriousness')
+
+    @property
+    def ime_checker(self):
+        return self.checker('ime')
+
+    @property
+    def expectedness_checker(self):
+        return self.checker('expectedness')
+
+    @property
+    def causality_checker(self):
+        return self.checker('causality')
+
+    @property
+    def missing_info_checker(self):
+        return self.checker('missing_info')
+
+    def preload(self):
+        """
+        Создает все выбранные проверяльщики и загружает их базу знаний целиком
+        (для пула процессов с общей базой знаний: modules/shared_kb.py)
+        """
+        for name in self.checks:
+            preload = getattr(self.checker(name), 'preload', None)
+            if preload is not None:
+                preload()
+        return self
+
+    def context(self, text):
+        """Создает контекст анализа для одного кейса"""
+        return CaseContext(text, self)
+
+
+class CaseContext:
+    """
+    Контекст одного кейса.
+    Признаки уровня текста (словарь, серьезность, препарат, факты причинности,
+    полнота данных) считаются один раз; события оцениваются против них,
+    повторные события берутся из кэша.
+    """
+
+    def __init__(self, text, analyzer):
+        self.text = text
+        self.analyzer = analyzer
+        self._events = {}
+
+    @cached_property
+    def hits(self):
+        """Один проход общего словаря по кейсу"""
+        return self.analyzer.lexicon.scan(self.text)
+
+    @property
+    def text_lower(self):
+        return self.hits.text_lower
+
+    @cached_property
+    def adverse_events(self):
+        return extract_adverse_events(self.text, self.hits, self.analyzer.event_lexicon)
+
+    @cached_property
+    def seriousness(self):
+        return self.analyzer.seriousness_checker.check_seriousness(self.text, self.hits)
+
+    @cached_property
+    def drug_mentions(self):
+        """Все упоминания препаратов с позициями"""
+        return self.analyzer.expectedness_checker.extract_drugs(self.text)
+
+    @cached_property
+    def drugs(self):
+        """Препараты кейса без повторов в порядке первого упоминания"""
+        drugs = []
+        for mention in self.drug_mentions:
+            if mention['drug'] not in drugs:
+                drugs.append(mention['drug'])
+        return drugs
+
+    @cached_property
+    def drug(self):
+        """Подозреваемый препарат - первый упомянутый"""
+        return self.drugs[0] if self.drugs else "Препарат А"
+
+    @cached_property
+    def segmentation(self):
+        """Разбиение кейса на предложения (для локальных окон событий)"""
+        return segment(self.text, self.text_lower)
+
+    def event_windows(self, event):
+        """Окна предложений вокруг упоминаний события (по вхождениям общего словаря)"""
+        mentions = [
+            (start, end) for start, end, term in self.hits.spans(f'events.{self.analyzer.event_lexicon}')
+            if term == event
+        ]
+        return event_windows(self.text, self.text_lower, event, mentions or None, self.segmentation)
+
+    @cached_property
+    def causality_facts(self):
+        return self.analyzer.causality_checker.extract_case_facts(self.text, self.hits)
+
+    @cached_property
+    def missing_info(self):
+        """Полнота данных (оценивается по первому событию, как в main.py)"""
+        adverse_events = self.adverse_events
+        return self.analyzer.missing_info_checker.check_missing_information(
+            self.text, adverse_events[0] if adverse_events else '', self.hits
+        )
+
+    def evaluate_event(self, event):
+        """
+        Оценивает одно событие против признаков кейса
+        Возвращает: {'event', 'seriousness', 'ime', 'expectedness', 'causality'}
+        (только выбранные проверки)
+        """
+        result = self._events.get(event)
+        if result is not None:
+            return result
+
+        analyzer = self.analyzer
+        checks = analyzer.checks
+        result = {'event': event}
+        if 'seriousness' in checks:
+            result['seriousness'] = self.seriousness
+        if 'ime' in checks:
+            result['ime'] = analyzer.ime_checker.check_ime_significance(event)
+        if 'expectedness' in checks:
+            result['expectedness'] = analyzer.expectedness_checker.check_expectedness(
+                self.text, event, self.drug
+            )
+        if 'causality' in checks:
+            result['causality'] = analyzer.causality_checker.analyze_causality(
+                self.text, event, hits=self.hits, case_facts=self.causality_facts,
+                windows=self.event_windows(event)
+            )
+        self._events[event] = result
+        return result
+
+    def evaluate_events(self, events=None):
+        """Оценивает все события кейса (по умолчанию - найденные в тексте)"""
+        if events is None:
+            events = self.adverse_events
+        return [self.evaluate_event(event) for event in events]
+
+    def summary(self):
+        """Компактный результат кейса (для пакетной обработки и JSON); только выбранные проверки"""
+        checks = self.analyzer.checks
+        summary = {}
+
+        if 'expectedness' in checks:
+            summary['drug'] = self.drug
+            summary['drugs'] = self.drugs
+        if 'seriousness' in checks:
+            summary['is_serious'] = self.seriousness['is_serious']
+            summary['seriousness_flags'] = self.seriousness['flags']
+        if 'missing_info' in checks:
+            missing_info = self.missing_info
+            summary['completeness_score'] = missing_info['completeness_score']
+            summary['missing_info'] = missing_info['missing_info']
+
+        events = []
+        for result in self.evaluate_events():
+            event_summary = {'event': result['event']}
+            if 'ime' in result:
+                event_summary['ime'] = summarize_ime(result['ime'])
+            if 'expectedness' in result:
+                event_summary.update(summarize_expectedness(result['expectedness']))
+            if 'causality' in result:
+                event_summary['causality'] = result['causality']['level']
+            events.append(event_summary)
+        summary['events'] = events
+
+        return summary
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    analyzer = CaseAnalyzer()
+
+    print("🧪 Тестирование контекста кейса:")
+    print("=" * 50)
+
+    test_text = ("Пациент 45 лет через 2 часа после приема препарата бевацизумаб "
+                 "отметил головокружение и головную боль. Препарат отменен, симптомы прошли.")
+    context = analyzer.context(test_text)
+
+    print(f"Текст: {test_text}")
+    print(f"Препарат: {context.drug}")
+    print(f"Серьезность: {context.seriousness}")
+    print(f"Полнота информации: {context.missing_info['completeness_score']}%")
+    for result in context.evaluate_events():
+        print(f"\n📍 {result['event']}")
+        print(f"   IME: {result['ime']['is_significant']}")
+        print(f"   Предвиденность: {result['expectedness']['is_expected']} ({result['expectedness']['reason']})")
+        print(f"   Причинность: {result['causality']['level']}")
@@ -0,0 +1,243 @@
+# modules/case_store.py
+import json
+import os
+import sqlite3
+
+from modules.adverse_events import PLACEHOLDER_EVENTS
+
+# Записей в одной транзакции при массовой записи
+DEFAULT_BATCH_SIZE = 500
+
+SCHEMA = '''
+    PRAGMA journal_mode=WAL;
+    CREATE TABLE IF NOT EXISTS cases (
+        id INTEGER PRIMARY KEY,
+        case_id TEXT NOT NULL UNIQUE,
+        text TEXT NOT NULL,
+        drug TEXT,
+        is_serious INTEGER,
+        completeness_score REAL,
+        result TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS cases_serious ON cases (is_serious);
+
+    -- Полнотекстовый индекс описаний (внешнее содержимое - таблица cases)
+    CREATE VIRTUAL TABLE IF NOT EXISTS case_fts USING fts5(
+        text, content='cases', content_rowid='id', tokenize='unicode61 remove_diacritics 2');
+    CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+        INSERT INTO case_fts (rowid, text) VALUES (new.id, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+        INSERT INTO case_fts (case_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END;
+
+    CREATE TABLE IF NOT EXISTS case_drugs (
+        case_rowid INTEGER NOT NULL, drug TEXT NOT NULL, suspect INTEGER NOT NULL);
+    CREATE INDEX IF NOT EXISTS case_drugs_drug ON case_drugs (drug, suspect);
+    CREATE INDEX IF NOT EXISTS case_drugs_case ON case_drugs (case_rowid);
+
+    CREATE TABLE IF NOT EXISTS case_flags (case_rowid INTEGER NOT NULL, flag TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS case_flags_flag ON case_flags (flag);
+    CREATE INDEX IF NOT EXISTS case_flags_case ON case_flags (case_rowid);
+
+    CREATE TABLE IF NOT EXISTS case_events (
+        case_rowid INTEGER NOT NULL,
+        event TEXT NOT NULL,
+        is_ime INTEGER,
+        is_expected INTEGER,
+        causality TEXT);
+    CREATE INDEX IF NOT EXISTS case_events_event ON case_events (event, is_expected);
+    CREATE INDEX IF NOT EXISTS case_events_ime ON case_events (is_ime, event);
+    CREATE INDEX IF NOT EXISTS case_events_expected ON case_events (is_expected, event);
+    CREATE INDEX IF NOT EXISTS case_events_causality ON case_events (causality);
+    CREATE INDEX IF NOT EXISTS case_events_case ON case_events (case_rowid);
+'''
+
+CHILD_TABLES = ('case_drugs', 'case_flags', 'case_events')
+
+
+def _flag(value):
+    """True/False/None → 1/0/NULL"""
+    return None if value is None else int(bool(value))
+
+
+class CaseStore:
+    """
+    База проанализированных кейсов (SQLite): текст, компактный результат и
+    разложенные по таблицам признаки (препараты, критерии серьезности, события
+    с IME, предвиденностью и причинностью) с индексами, плюс полнотекстовый
+    индекс FTS5 по описаниям. Запись буферизуется и выполняется пакетами
+    по batch_size кейсов в одной транзакции.
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        # Базы, записанные до пропуска заглушек: заглушка не должна находиться как явление
+        with self.db:
+            self.db.executemany('DELETE FROM case_events WHERE event = ?',
+                                [(event,) for event in PLACEHOLDER_EVENTS])
+        self.batch_size = batch_size
+        self._pending = []
+        self.written = 0
+
+    def add(self, case_id, text, result):
+        """Добавляет кейс в буфер (ошибочные результаты пропускаются)"""
+        if 'error' in result:
+            return
+        self._pending.append((str(case_id), text, result))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Записывает буфер одной транзакцией"""
+        if not self._pending:
+            return
+        with self.db:
+            self.written += self.put_many(self._pending)
+        self._pending = []
+
+    def put_many(self, records):
+        """
+        Записывает (case_id, текст, результат); существующие кейсы заменяются,
+        из повторов case_id в records записывается последний. Возвращает число кейсов.
+        """
+        records = list({case_id: (case_id, text, result) for case_id, text, result in records}.values())
+        case_ids = [(case_id,) for case_id, _, _ in records]
+        for table in CHILD_TABLES:
+            self.db.executemany(
+                f'DELETE FROM {table} WHERE case_rowid IN (SELECT id FROM cases WHERE case_id = ?)',
+                case_ids
+            )
+        self.db.executemany('DELETE FROM cases WHERE case_id = ?', case_ids)
+
+        drugs, flags, events = [], [], []
+        for case_id, text, result in records:
+            rowid = self.db.execute(
+                'INSERT INTO cases (case_id, text, drug, is_serious, completeness_score, result) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (case_id, text, result.get('drug'), _flag(result.get('is_serious')),
+                 result.get('completeness_score'), json.dumps(result, ensure_ascii=False))
+            ).lastrowid
+
+            suspect = result.get('drug')
+            drugs.extend((rowid, drug, int(drug == suspect)) for drug in result.get('drugs', []))
+            flags.extend((rowid, flag) for flag in result.get('seriousness_flags', []))
+            for event in result.get('events', []):
+                # Заглушка "неизвестное событие" не индексируется как явление
+                if event['event'] in PLACEHOLDER_EVENTS:
+                    continue
+                events.append((
+                    rowid, event['event'],
+                    _flag(event['ime']) if 'ime' in event else None,
+                    _flag(event.get('is_expected')),
+                    event.get('causality')
+                ))
+
+        self.db.executemany('INSERT INTO case_drugs (case_rowid, drug, suspect) VALUES (?, ?, ?)', drugs)
+        self.db.executemany('INSERT INTO case_flags (case_rowid, flag) VALUES (?, ?)', flags)
+        self.db.executemany(
+            'INSERT INTO case_events (case_rowid, event, is_ime, is_expected, causality) '
+            'VALUES (?, ?, ?, ?, ?)', events
+        )
+        return len(records)
+
+    def _where(self, drug=None, suspect_only=False, serious=None, flag=None, event=None,
+               ime=None, expected=None, causality=None, text=None):
+        """
+        Условия отбора кейсов: подзапросы по индексам таблиц признаков.
+        Условия уровня события (event, ime, expected, causality) должны
+        выполняться для одного и того же события кейса.
+        """
+        conditions, params = [], []
+
+        if drug is not None:
+            conditions.append('c.id IN (SELECT case_rowid FROM case_drugs WHERE drug = ?'
+                              + (' AND suspect = 1)' if suspect_only else ')'))
+            params.append(drug)
+        if serious is not None:
+            conditions.append('c.is_serious = ?')
+            params.append(int(serious))
+        if flag is not None:
+            conditions.append('c.id IN (SELECT case_rowid FROM case_flags WHERE flag = ?)')
+            params.append(flag)
+
+        event_conditions = []
+        for column, value in (('event', event), ('is_ime', ime), ('is_expected', expected),
+                              ('causality', causality)):
+            if value is not None:
+                event_conditions.append(f'{column} = ?')
+                params.append(int(value) if isinstance(value, bool) else value)
+        if event_conditions:
+            conditions.append('c.id IN (SELECT case_rowid FROM case_events WHERE '
+                              + ' AND '.join(event_conditions) + ')')
+
+        if text is not None:
+            conditions.append('c.id IN (SELECT rowid FROM case_fts WHERE case_fts MATCH ?)')
+            params.append(text)
+
+        return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+    def find(self, limit=None, **filters):
+        """
+        Кейсы, удовлетворяющие фильтрам (см. _where), в порядке записи.
+        Возвращает [{'case_id', 'result'}]; text - запрос FTS5 ('сыпь OR крапив*').
+        """
+        where, params = self._where(**filters)
+        query = f'SELECT c.case_id, c.result FROM cases c{where} ORDER BY c.id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return [{'case_id': case_id, 'result': json.loads(result)}
+                for case_id, result in self.db.execute(query, params)]
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self.db.execute(f'SELECT COUNT(*) FROM cases c{where}', params).fetchone()[0]
+
+    def text(self, case_id):
+        row = self.db.execute('SELECT text FROM cases WHERE case_id = ?', (str(case_id),)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.flush()
+        # Статистика индексов для планировщика запросов
+        self.db.execute('PRAGMA optimize')
+        self.db.close()
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from modules.case_context import CaseAnalyzer
+    from modules.narrative_generator import NarrativeGenerator
+
+    analyzer = CaseAnalyzer()
+    path = os.path.join(tempfile.mkdtemp(), 'cases.db')
+    store = CaseStore(path)
+
+    started = time.perf_counter()
+    for case in NarrativeGenerator(seed=7).generate_corpus(500, target_chars=1500, event_density=3.0):
+        store.add(case['case_id'], case['text'], analyzer.context(case['text']).summary())
+    store.flush()
+
+    print("🧪 Тестирование базы кейсов:")
+    print("=" * 50)
+    print(f"Записано кейсов: {store.written} за {time.perf_counter() - started:.2f} с (с анализом)")
+
+    for title, filters in [
+        ("Серьезные с непредвиденными явлениями, Деламанид", {'drug': 'Деламанид', 'serious': True, 'expected': False}),
+        ("IME-явления с вероятной причинностью", {'ime': True, 'causality': 'Вероятная'}),
+        ("Летальные исходы", {'flag': 'death'}),
+        ("Текст: тромбоз* AND госпитализирован*", {'text': 'тромбоз* AND госпитализирован*'}),
+    ]:
+        started = time.perf_counter()
+        count = store.count(**filters)
+        print(f"   {title}: {count} ({(time.perf_counter() - started) * 1000:.2f} мс)")
+
+    store.close()
@@ -1,83 +1,110 @@
 # modules/causality_checker.py
 import re
 from datetime import datetime
+from modules.lexicon import get_default_lexicon
+from modules.results import CaseFacts, CausalityLevel, CausalityResult, EventFacts, Fact
+from modules.segmenter import event_windows
 
 class CausalityChecker:
-    def analyze_causality(self, text, adverse_event):
+    # Термины для общего словаря (modules/lexicon.py)
+    LEXICON_TERMS = {
+        'improvement': [
+            'улучшение', 'исчезли', 'прошли', 'купирова', 'нормализова',
+            'регресс', 'прекратил', 'выздоровел'
+        ],
+        'withdrawal': ['отмен', 'прекратил', 'перестал'],
+        'rechallenge': [
+            'повторно', 'снова', 'рецидив', 'возобновил'
+        ],
+        'drug_mention': [
+            'препарат', 'лекарств', 'таблет', 'капсул', 'инъекц'
+        ]
+    }
+
+    # Признаки временной связи (ищутся в окнах события)
+    TIME_PATTERNS = [
+        re.compile(r'через\s+(\d+)\s*(час|день|недел)'),
+        re.compile(r'после\s+приема'),
+        re.compile(r'на\s+фоне\s+лечения'),
+        re.compile(r'при\s+приеме')
+    ]
+
+    def analyze_causality(self, text, adverse_event, hits=None, case_facts=None, windows=None):
         """
         Анализирует причинно-следственную связь по шкале ВОЗ
-        Возвращает: {'level': 'Определенная/Вероятная/...', 'reasoning': 'обоснование'}
+        case_facts - результат extract_case_facts() для этого кейса (если уже посчитан)
+        windows - локальные окна события [(start, end)] (modules/segmenter.py);
+        по умолчанию - вокруг упоминаний события в тексте, а если их нет - весь текст.
+        Временная связь, отмена и повторное назначение ищутся только в окнах события.
+        Возвращает CausalityResult; по ключам - прежний формат
+        {'level': 'Определенная/Вероятная/...', 'reasoning': 'обоснование', 'facts': {...}}
         """
-        text_lower = text.lower()
+        if hits is None:
+            hits = get_default_lexicon(('causality',)).scan(text)
+        if case_facts is None:
+            case_facts = self.extract_case_facts(text, hits)
         event_lower = adverse_event.lower()
+        if windows is None:
+            windows = event_windows(text, hits.text_lower, event_lower)
         
-        # Извлекаем факты из текста
-        facts = self._extract_facts(text_lower, event_lower)
+        # Извлекаем факты из окон события
+        facts = self._extract_facts(case_facts, hits, windows, event_lower)
         
         # Применяем алгоритм ВОЗ
         causality_level = self._apply_who_algorithm(facts)
         
-        return {
-            'level': causality_level,
-            'reasoning': self._generate_reasoning(causality_level, facts),
-            'facts': facts
-        }
+        return CausalityResult(causality_level, facts)
     
-    def _extract_facts(self, text, event):
-        """Извлекает факты для оценки причинности"""
-        facts = {
-            'time_relationship': self._check_time_relationship(text),
-            'dechallenge': self._check_dechallenge(text, event),
-            'rechallenge': self._check_rechallenge(text),
-            'alternative_causes': self._check_alternative_causes(text),
-            'known_effect': self._check_known_effect(text, event),
-            'drug_mentioned': self._check_drug_mention(text)
-        }
-        return facts
+    def extract_case_facts(self, text, hits=None):
+        """
+        Извлекает факты, которые относятся ко всему кейсу (альтернативные причины,
+        упоминание препарата). Считается один раз на кейс и переиспользуется для всех событий.
+        Возвращает CaseFacts (значения - члены Fact)
+        """
+        if hits is None:
+            hits = get_default_lexicon(('causality',)).scan(text)
+        
+        return CaseFacts(
+            alternative_causes=self._check_alternative_causes(hits.text_lower),
+            drug_mentioned=self._check_drug_mention(hits)
+        )
     
-    def _check_time_relationship(self, text):
+    def _extract_facts(self, case_facts, hits, windows, event):
+        """Извлекает факты для оценки причинности (окна события + факты кейса)"""
+        return EventFacts(
+            case_facts,
+            time_relationship=self._check_time_relationship(hits.text_lower, windows),
+            dechallenge=self._check_dechallenge(hits, windows),
+            rechallenge=self._check_rechallenge(hits, windows),
+            known_effect=self._check_known_effect(event)
+        )
+    
+    def _check_time_relationship(self, text, windows):
         """Проверяет временную связь"""
-        time_patterns = [
-            r'через\s+(\d+)\s*(час|день|недел)',
-            r'после\s+приема',
-            r'на\s+фоне\s+лечения',
-            r'при\s+приеме'
-        ]
-        
-        for pattern in time_patterns:
-            if re.search(pattern, text):
-                return "есть"
-        return "нет данных"
+        for pattern in self.TIME_PATTERNS:
+            for start, end in windows:
+                if pattern.search(text, start, end):
+                    return Fact.PRESENT
+        return Fact.NO_DATA
     
-    def _check_dechallenge(self, text, event):
+    def _check_dechallenge(self, hits, windows):
         """Проверяет результат отмены препарата"""
-        improvement_terms = [
-            'улучшение', 'исчезли', 'прошли', 'купирова', 'нормализова',
-            'регресс', 'прекратил', 'выздоровел'
-        ]
-        
-        withdrawal_terms = ['отмен', 'прекратил', 'перестал']
-        
         # Проверяем улучшение после отмены
-        has_withdrawal = any(term in text for term in withdrawal_terms)
-        has_improvement = any(term in text for term in improvement_terms)
+        has_withdrawal = hits.has_in('causality.withdrawal', windows)
+        has_improvement = hits.has_in('causality.improvement', windows)
         
         if has_withdrawal and has_improvement:
-            return "положительная"
+            return Fact.POSITIVE
         elif has_withdrawal and not has_improvement:
-            return "отрицательная"
+            return Fact.NEGATIVE
         else:
-            return "нет данных"
+            return Fact.NO_DATA
     
-    def _check_rechallenge(self, text):
+    def _check_rechallenge(self, hits, windows):
         """Проверяет данные о повторном назначении"""
-        rechallenge_terms = [
-            'повторно', 'снова', 'рецидив', 'возобновил'
-        ]
-        
-        if any(term in text for term in rechallenge_terms):
-            return "есть"
-        return "нет данных"
+        if hits.has_in('causality.rechallenge', windows):
+            return Fact.PRESENT
+        return Fact.NO_DATA
     
     def _check_alternative_causes(self, text):
         """Проверяет альтернативные причины"""
@@ -90,10 +117,10 @@ class CausalityChecker:
         
         for pattern in alternative_patterns:
             if re.search(pattern, text):
-                return "есть"
-        return "нет данных"
+                return Fact.PRESENT
+        return Fact.NO_DATA
     
-    def _check_known_effect(self, text, event):
+    def _check_known_effect(self, event):
         """Проверяет известность эффекта"""
         # В реальном проекте здесь была бы проверка по базе знаний
         known_effects = [
@@ -102,64 +129,47 @@ class CausalityChecker:
         ]
         
         if any(effect in event for effect in known_effects):
-            return "известный"
-        return "неизвестный"
+            return Fact.KNOWN
+        return Fact.UNKNOWN
     
-    def _check_drug_mention(self, text):
+    def _check_drug_mention(self, hits):
         """Проверяет упоминание препарата"""
-        drug_patterns = [
-            r'препарат', r'лекарств', r'таблет', r'капсул', r'инъекц'
-        ]
-        
-        if any(pattern in text for pattern in drug_patterns):
-            return "есть"
-        return "нет"
+        if hits.has('causality.drug_mention'):
+            return Fact.PRESENT
+        return Fact.ABSENT
     
     def _apply_who_algorithm(self, facts):
         """Применяет алгоритм оценки по шкале ВОЗ"""
         
         # Определенная
-        if (facts['time_relationship'] == "есть" and
-            facts['rechallenge'] == "есть" and
-            facts['dechallenge'] == "положительная" and
-            facts['alternative_causes'] == "нет данных"):
-            return "Определенная"
+        if (facts.time_relationship is Fact.PRESENT and
+            facts.rechallenge is Fact.PRESENT and
+            facts.dechallenge is Fact.POSITIVE and
+            facts.alternative_causes is Fact.NO_DATA):
+            return CausalityLevel.CERTAIN
         
         # Вероятная
-        elif (facts['time_relationship'] == "есть" and
-              facts['dechallenge'] == "положительная" and
-              facts['alternative_causes'] == "нет данных"):
-            return "Вероятная"
+        elif (facts.time_relationship is Fact.PRESENT and
+              facts.dechallenge is Fact.POSITIVE and
+              facts.alternative_causes is Fact.NO_DATA):
+            return CausalityLevel.PROBABLE
         
         # Возможная
-        elif (facts['time_relationship'] == "есть" and
-              facts['alternative_causes'] == "нет данных"):
-            return "Возможная"
+        elif (facts.time_relationship is Fact.PRESENT and
+              facts.alternative_causes is Fact.NO_DATA):
+            return CausalityLevel.POSSIBLE
         
         # Сомнительная
-        elif (facts['time_relationship'] == "нет данных" or
-              facts['alternative_causes'] == "есть"):
-            return "Сомнительная"
+        elif (facts.time_relationship is Fact.NO_DATA or
+              facts.alternative_causes is Fact.PRESENT):
+            return CausalityLevel.UNLIKELY
         
         # Условная
-        elif facts['drug_mentioned'] == "нет":
-            return "Условная"
+        elif facts.drug_mentioned is Fact.ABSENT:
+            return CausalityLevel.CONDITIONAL
         
         else:
-            return "Неклассифицируемая"
-    
-    def _generate_reasoning(self, level, facts):
-        """Генерирует обоснование оценки"""
-        reasoning_templates = {
-            "Определенная": "Четкая временная связь, положительная десенсибилизация и положительная реакция на повторное назначение. Альтернативные причины исключены.",
-            "Вероятная": "Временная связь присутствует, положительная десенсибилизация. Альтернативные причины маловероятны.",
-            "Возможная": "Временная связь имеется, но данных о десенсибилизации недостаточно.",
-            "Сомнительная": "Отсутствует четкая временная связь или имеются альтернативные причины.",
-            "Условная": "Недостаточно данных для оценки причинно-следственной связи.",
-            "Неклассифицируемая": "Информация противоречива или недостаточна для классификации."
-        }
-        
-        return reasoning_templates.get(level, "Не удалось оценить связь.")
+            return CausalityLevel.UNASSESSABLE
 
 # Тестирование модуля
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+# modules/dedup.py
+import os
+import re
+import zlib
+
+import numpy as np
+
+# Поиск почти-дубликатов кейсов (одно и то же сообщение от врача и от провизора).
+# Описание нормализуется и режется на символьные шинглы; MinHash-сигнатура
+# приближает меру Жаккара между наборами шинглов, а LSH (сигнатура делится на
+# полосы, совпадение любой полосы - кандидат) находит кандидатов без попарного
+# сравнения всех кейсов. Кандидаты подтверждаются оценкой сходства по сигнатурам.
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+SEED = 1
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_narrative(text):
+    """Нижний регистр, ё → е, только слова через один пробел (пунктуация и переносы не важны)"""
+    return ' '.join(_WORD_RE.findall(text.lower().replace('ё', 'е')))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Множество символьных шинглов нормализованного текста"""
+    text = normalize_narrative(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash-сигнатуры из num_perm хэш-функций вида старшие 32 бита (a·x + b) mod 2^64
+    (multiply-shift: без деления, переполнение uint64 и есть взятие по модулю).
+    Хэш шингла - CRC32, поэтому сигнатуры одинаковы во всех процессах и запусках
+    (встроенный hash() строк случаен для каждого процесса).
+    """
+
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=SEED):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        random = np.random.RandomState(seed)
+        # a - нечетные 64-битные множители
+        self.a = random.randint(0, 2 ** 63 - 1, num_perm, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+        self.b = random.randint(0, 2 ** 63 - 1, num_perm, dtype=np.int64).astype(np.uint64)
+
+    def signature(self, text):
+        """Сигнатура текста (массив uint32) или None для пустого текста"""
+        parts = shingles(text, self.shingle_size)
+        if not parts:
+            return None
+        hashes = np.fromiter((zlib.crc32(part.encode('utf-8')) for part in parts),
+                             dtype=np.uint64, count=len(parts))
+        return ((hashes[:, None] * self.a + self.b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+
+class DuplicateIndex:
+    """
+    Индекс LSH по MinHash-сигнатурам кейсов, пополняемый по одному кейсу.
+    add()/add_signature() возвращают уже проиндексированные кейсы, похожие
+    на новый не меньше threshold; clusters() - группы дубликатов целиком.
+    Повторное добавление кейса с тем же case_id заменяет его сигнатуру.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, bands=BANDS,
+                 shingle_size=SHINGLE_SIZE, seed=SEED):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) должно делиться на bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.minhasher = MinHasher(num_perm, shingle_size, seed)
+        self.case_ids = []
+        self.signatures = []
+        self._positions = {}
+        self._buckets = [{} for _ in range(bands)]
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def query(self, signature, exclude=None):
+        """Похожие кейсы: [{'case_id', 'similarity'}] по убыванию сходства"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        candidates.discard(exclude)
+        if not candidates:
+            return []
+
+        positions = sorted(candidates)
+        similarity = (np.stack([self.signatures[position] for position in positions]) == signature).mean(axis=1)
+        matches = [
+            {'case_id': self.case_ids[position], 'similarity': round(float(value), 3)}
+            for position, value in zip(positions, similarity) if value >= self.threshold
+        ]
+        matches.sort(key=lambda match: -match['similarity'])
+        return matches
+
+    def add(self, case_id, text):
+        """Индексирует текст кейса; возвращает похожие ранее проиндексированные кейсы"""
+        signature = self.minhasher.signature(text)
+        if signature is None:
+            return []
+        return self.add_signature(case_id, signature)
+
+    def add_signature(self, case_id, signature):
+        """Индексирует готовую сигнатуру (посчитанную, например, в процессе пула)"""
+        position = self._positions.get(case_id)
+        if position is not None:
+            if np.array_equal(self.signatures[position], signature):
+                return self.query(signature, exclude=position)
+            self._remove(position)
+        else:
+            position = self._positions[case_id] = len(self.case_ids)
+            self.case_ids.append(case_id)
+            self.signatures.append(None)
+
+        matches = self.query(signature, exclude=position)
+        self._insert(position, signature)
+        return matches
+
+    def _insert(self, position, signature):
+        self.signatures[position] = signature
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(position)
+
+    def _remove(self, position):
+        for bucket, key in zip(self._buckets, self._band_keys(self.signatures[position])):
+            bucket[key].remove(position)
+
+    def clusters(self):
+        """Группы дубликатов (связные компоненты пар со сходством ≥ threshold), от больших к меньшим"""
+        parent = list(range(len(self.case_ids)))
+
+        def find(position):
+            while parent[position] != position:
+                parent[position] = parent[parent[position]]
+                position = parent[position]
+            return position
+
+        for position, signature in enumerate(self.signatures):
+            for match in self.query(signature, exclude=position):
+                parent[find(position)] = find(self._positions[match['case_id']])
+
+        groups = {}
+        for position in range(len(self.case_ids)):
+            groups.setdefault(find(position), []).append(self.case_ids[position])
+        clusters = [sorted(group) for group in groups.values() if len(group) > 1]
+        clusters.sort(key=lambda group: (-len(group), group[0]))
+        return clusters
+
+    def save(self, path):
+        """Сохраняет параметры и сигнатуры (.npz); корзины LSH восстанавливаются при загрузке"""
+        signatures = np.stack(self.signatures) if self.signatures else np.zeros((0, self.minhasher.num_perm), np.uint32)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                params=np.array([self.minhasher.num_perm, self.bands, self.minhasher.shingle_size,
+                                 self.minhasher.seed]),
+                threshold=np.array(self.threshold),
+                case_ids=np.array(self.case_ids, dtype=str),
+                signatures=signatures
+            )
+
+    @classmethod
+    def load(cls, path, threshold=None):
+        with np.load(path) as data:
+            num_perm, bands, shingle_size, seed = (int(value) for value in data['params'])
+            index = cls(float(data['threshold']) if threshold is None else threshold,
+                        num_perm, bands, shingle_size, seed)
+            index.case_ids = data['case_ids'].tolist()
+            index.signatures = [None] * len(index.case_ids)
+            for position, signature in enumerate(data['signatures']):
+                index._positions[index.case_ids[position]] = position
+                index._insert(position, signature)
+        return index
+
+    @classmethod
+    def open(cls, path, threshold=None):
+        """Индекс из файла, если он есть, иначе новый (threshold=None - сохраненный или по умолчанию)"""
+        if path and os.path.exists(path):
+            return cls.load(path, threshold)
+        return cls(DEFAULT_THRESHOLD if threshold is None else threshold)
+
+    def report(self, clusters=None):
+        clusters = self.clusters() if clusters is None else clusters
+        return (f"Кейсов в индексе: {len(self)}, групп дубликатов: {len(clusters)}, "
+                f"кейсов в группах: {sum(len(group) for group in clusters)}")
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    import random
+    import time
+
+    from modules.narrative_generator import NarrativeGenerator
+
+    corpus = [case['text'] for case in NarrativeGenerator(seed=3).generate_corpus(1000, 1500)]
+    rng = random.Random(0)
+
+    # Дубликат: тот же кейс с мелкими правками (другой отправитель, опечатки, регистр)
+    cases = {f'case-{number:04d}': text for number, text in enumerate(corpus)}
+    for number in range(0, 1000, 50):
+        words = corpus[number].split()
+        for _ in range(5):
+            words[rng.randrange(len(words))] = rng.choice(['пациент', 'препарат', 'сообщил'])
+        cases[f'copy-{number:04d}'] = ('Сообщение от провизора. ' + ' '.join(words)).upper()
+
+    index = DuplicateIndex()
+    started = time.perf_counter()
+    found = sum(1 for case_id, text in cases.items() if index.add(case_id, text))
+    elapsed = time.perf_counter() - started
+
+    print("🧪 Тестирование поиска дубликатов:")
+    print("=" * 50)
+    print(f"Проиндексировано {len(cases)} кейсов за {elapsed:.2f} с, с дубликатами при добавлении: {found}")
+    clusters = index.clusters()
+    print(index.report(clusters))
+    print(f"Пример группы: {clusters[0] if clusters else '-'}")
@@ -0,0 +1,99 @@
+# modules/drug_recognizer.py
+from modules.kb_snapshot import load_object_snapshot
+from modules.lexicon import AhoCorasick
+
+# Окончания, которые отбрасываются для получения основы склоняемого названия
+# ("Китруда" → "китруд": совпадет с "Китрудой", "Китруды")
+INFLECTED_ENDINGS = 'аяоеёьйыиу'
+
+# Минимальная длина основы (короче - слишком много ложных совпадений)
+MIN_STEM_LENGTH = 4
+
+
+def surface_forms(name):
+    """Формы названия для поиска: само название и основа без окончания"""
+    name = name.lower().strip()
+    forms = {name}
+    if len(name) > MIN_STEM_LENGTH and name[-1] in INFLECTED_ENDINGS:
+        forms.add(name[:-1])
+    return forms
+
+
+class DrugRecognizer:
+    """
+    Распознает все препараты в тексте за один проход:
+    МНН, торговые названия, синонимы и их падежные формы.
+    """
+
+    def __init__(self, drug_names, synonyms=None):
+        self.automaton = AhoCorasick()
+        self._drugs = []
+
+        forms = {}
+        for drug_name in drug_names:
+            names = [drug_name] + list((synonyms or {}).get(drug_name, []))
+            for name in names:
+                for form in surface_forms(name):
+                    # Одна форма - один препарат (первый в порядке базы)
+                    forms.setdefault(form, drug_name)
+
+        for form, drug_name in forms.items():
+            self.automaton.add(form)
+            self._drugs.append(drug_name)
+
+        self.automaton.compile()
+
+    def recognize(self, text):
+        """
+        Возвращает все упоминания препаратов в порядке текста:
+        [{'drug': 'Бевацизумаб', 'start': 10, 'end': 24, 'surface': 'бевацизумабом'}]
+        Совпадение должно начинаться с начала слова; упоминание продлевается до конца слова.
+        """
+        text_lower = text.lower()
+        mentions = {}
+
+        for start, end, pattern_id in self.automaton.iter_matches(text_lower):
+            if start > 0 and text_lower[start - 1].isalnum():
+                continue
+
+            word_end = end
+            while word_end < len(text_lower) and text_lower[word_end].isalnum():
+                word_end += 1
+
+            # В одной позиции оставляем самое длинное совпадение
+            current = mentions.get(start)
+            if current is None or end > current[0]:
+                mentions[start] = (end, word_end, self._drugs[pattern_id])
+
+        result = []
+        covered_until = 0
+        for start in sorted(mentions):
+            end, word_end, drug_name = mentions[start]
+            if start < covered_until:
+                continue
+            result.append({
+                'drug': drug_name,
+                'start': start,
+                'end': word_end,
+                'surface': text_lower[start:word_end]
+            })
+            covered_until = word_end
+
+        return result
+
+    def drugs(self, text):
+        """Список препаратов без повторов в порядке первого упоминания"""
+        found = []
+        for mention in self.recognize(text):
+            if mention['drug'] not in found:
+                found.append(mention['drug'])
+        return found
+
+
+def load_drug_recognizer(drug_names, synonyms):
+    """Возвращает распознаватель из снимка (пересобирается при изменении названий)"""
+    drug_names = list(drug_names)
+    return load_object_snapshot(
+        'drug_recognizer', [drug_names, synonyms],
+        lambda: DrugRecognizer(drug_names, synonyms)
+    )
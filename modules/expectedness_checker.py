@@ -1,80 +1,179 @@
 # modules/expectedness_checker.py
-import json
-import os
+from functools import cached_property
+from modules.drug_recognizer import load_drug_recognizer
+from modules.fuzzy_index import FuzzyIndex, phrase_distance
+from modules.kb_snapshot import PackedMapping, load_json_snapshot
+
+# Размер кэша нечетких сопоставлений (препарат, явление) → эффект ИМП
+FUZZY_CACHE_SIZE = 4096
+
+def build_effect_index(smpc_database):
+    """
+    Строит обратный индекс ИМП: {препарат: {эффект в нижнем регистре: готовый результат}}.
+    Прямое указание имеет приоритет над симптомокомплексом; при совпадениях
+    побеждает первый эффект в порядке ИМП (как при линейном поиске).
+    Для каждого препарата строится и нечеткий индекс названий эффектов (опечатки в ИМП
+    и в названии явления: 'венозная тромбоэмболиция').
+    """
+    index = {}
+    
+    for drug_name, drug_info in smpc_database.items():
+        drug_index = {}
+        expected_effects = drug_info.get('expected_effects', {})
+        
+        # Прямые указания
+        for expected_effect, effect_info in expected_effects.items():
+            drug_index.setdefault(expected_effect.lower(), {
+                'is_expected': True,
+                'reason': f"Прямое указание в ИМП",
+                'drug': drug_name,
+                'effect_type': effect_info['type'],
+                'frequency': effect_info['frequency']
+            })
+        
+        # Вхождение в симптомокомплекс
+        for expected_effect, effect_info in expected_effects.items():
+            if effect_info['type'] == 'symptom_complex':
+                for symptom in effect_info.get('includes', []):
+                    drug_index.setdefault(symptom.lower(), {
+                        'is_expected': True,
+                        'reason': f"Входит в симптомокомплекс '{expected_effect}'",
+                        'drug': drug_name,
+                        'effect_type': effect_info['type'],
+                        'frequency': effect_info['frequency'],
+                        'parent_complex': expected_effect
+                    })
+        
+        index[drug_name] = {
+            'effects': drug_index,
+            'fuzzy': FuzzyIndex(drug_index),
+            'not_expected': {
+                'is_expected': False,
+                'reason': "Не описано в ИМП",
+                'drug': drug_name
+            }
+        }
+    
+    return index
 
 class ExpectednessChecker:
+    # База ИМП, индекс эффектов и распознаватель препаратов загружаются при первом обращении
+    
     def __init__(self):
-        self.smpc_database = self._load_smpc_database()
+        # Нечеткие сопоставления этого проверяльщика: {(препарат, явление): результат}
+        self._fuzzy_matches = {}
+    
+    @cached_property
+    def smpc_database(self):
+        return self._load_smpc_database()
+    
+    @cached_property
+    def effect_index(self):
+        return self._load_effect_index()
+    
+    @cached_property
+    def drug_recognizer(self):
+        return load_drug_recognizer(self.smpc_database.keys(), self._load_drug_synonyms())
+    
+    def preload(self):
+        """Загружает базу ИМП, индекс эффектов и распознаватель целиком (перед fork пула процессов)"""
+        for mapping in (self.smpc_database, self.effect_index):
+            if isinstance(mapping, PackedMapping):
+                mapping.materialize()
+        self.drug_recognizer
+        return self
     
     def _load_smpc_database(self):
         """Загружает базу данных по препаратам"""
         try:
-            with open('knowledge/smpc_database.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_json_snapshot('knowledge/smpc_database.json', 'smpc_database', packed=True)
         except FileNotFoundError:
             print("⚠️ Файл базы препаратов не найден!")
             return {}
     
+    def _load_effect_index(self):
+        """Загружает обратный индекс эффектов (строится вместе со снимком базы)"""
+        try:
+            return load_json_snapshot('knowledge/smpc_database.json', 'smpc_effect_index',
+                                      build=build_effect_index, packed=True)
+        except FileNotFoundError:
+            return {}
+    
+    def _load_drug_synonyms(self):
+        """Загружает синонимы и торговые названия препаратов"""
+        try:
+            return load_json_snapshot('knowledge/drug_synonyms.json', 'drug_synonyms')
+        except FileNotFoundError:
+            return {}
+    
+    def extract_drugs(self, text):
+        """
+        Извлекает все упоминания препаратов (МНН, торговые названия, падежные формы)
+        Возвращает: [{'drug', 'start', 'end', 'surface'}] в порядке текста
+        """
+        return self.drug_recognizer.recognize(text)
+    
     def extract_drug_name(self, text):
         """
         Извлекает название препарата из текста
-        Возвращает первое найденное название препарата
+        Возвращает первое упомянутое в тексте название препарата
         """
-        text_lower = text.lower()
-        
-        # Ищем упоминания препаратов
-        for drug_name in self.smpc_database.keys():
-            if drug_name.lower() in text_lower:
-                return drug_name
+        mentions = self.drug_recognizer.recognize(text)
+        if mentions:
+            return mentions[0]['drug']
         
         # Если не нашли - возвращаем最常见的 препарат
         return "Препарат А"
     
-    def check_expectedness(self, text, adverse_event):
+    def check_expectedness(self, text, adverse_event, drug_name=None):
         """
         Проверяет, является ли побочный эффект предвиденным для препарата
+        (поиск по обратному индексу ИМП)
+        drug_name - препарат кейса, если уже извлечен (иначе ищется в тексте)
         """
-        drug_name = self.extract_drug_name(text)
+        if drug_name is None:
+            drug_name = self.extract_drug_name(text)
         
-        if drug_name not in self.smpc_database:
+        drug_index = self.effect_index.get(drug_name)
+        if drug_index is None:
             return {
                 'is_expected': False,
                 'reason': f"Препарат '{drug_name}' не найден в базе",
                 'drug': drug_name
             }
         
-        drug_info = self.smpc_database[drug_name]
-        adverse_event_lower = adverse_event.lower()
-        
-        # Проверяем прямое совпадение
-        for expected_effect, effect_info in drug_info['expected_effects'].items():
-            if expected_effect.lower() == adverse_event_lower:
-                return {
-                    'is_expected': True,
-                    'reason': f"Прямое указание в ИМП",
-                    'drug': drug_name,
-                    'effect_type': effect_info['type'],
-                    'frequency': effect_info['frequency']
-                }
+        # Прямое указание или вхождение в симптомокомплекс - один поиск по индексу.
+        # Результаты индекса общие для всех вызовов: возвращается копия
+        effects = drug_index['effects']
+        result = effects.get(adverse_event)
+        if result is None:
+            result = effects.get(adverse_event.lower())
+        if result is None:
+            result = self._fuzzy_expectedness(drug_name, adverse_event.lower())
+        return dict(result)
+    
+    def _fuzzy_expectedness(self, drug_name, adverse_event):
+        """
+        Эффект ИМП, отличающийся от явления опечатками (по каждому слову не больше,
+        чем допускает его длина); результат - копия с ключом 'matched_effect'.
+        Результаты кэшируются (не больше FUZZY_CACHE_SIZE, при переполнении кэш очищается)
+        """
+        key = (drug_name, adverse_event)
+        result = self._fuzzy_matches.get(key)
+        if result is not None:
+            return result
         
-        # Проверяем вхождение в симптомокомплекс
-        for expected_effect, effect_info in drug_info['expected_effects'].items():
-            if effect_info['type'] == 'symptom_complex':
-                if adverse_event_lower in [symptom.lower() for symptom in effect_info.get('includes', [])]:
-                    return {
-                        'is_expected': True,
-                        'reason': f"Входит в симптомокомплекс '{expected_effect}'",
-                        'drug': drug_name,
-                        'effect_type': effect_info['type'],
-                        'frequency': effect_info['frequency'],
-                        'parent_complex': expected_effect
-                    }
+        drug_index = self.effect_index[drug_name]
+        result = drug_index['not_expected']
+        for effect, _ in drug_index['fuzzy'].lookup(adverse_event):
+            if phrase_distance(adverse_event, effect) is not None:
+                result = dict(drug_index['effects'][effect], matched_effect=effect)
+                break
         
-        return {
-            'is_expected': False,
-            'reason': "Не описано в ИМП",
-            'drug': drug_name
-        }
+        if len(self._fuzzy_matches) >= FUZZY_CACHE_SIZE:
+            self._fuzzy_matches.clear()
+        self._fuzzy_matches[key] = result
+        return result
     
     def get_available_drugs(self):
         """Возвращает список препаратов в базе"""
@@ -0,0 +1,169 @@
+# modules/fuzzy_index.py
+
+# Нечеткий поиск терминов (опечатки и ошибки распознавания: "анафилатический").
+# Словарь удалений SymSpell: для каждого слова словаря заранее сохраняются все его
+# варианты с удалением до max_distance символов (из первых prefix_length символов).
+# Кандидаты для слова запроса - слова, у которых есть общий вариант удаления;
+# расстояние проверяется только для них, поэтому поиск не зависит от размера словаря.
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+
+def allowed_distance(length):
+    """
+    Допустимое число правок для слова (или основы) длины length. Короткие слова
+    не исправляются (слишком много обычных слов рядом с терминами: 'пациент' -
+    'пациентк'), две правки - только для длинных (гипер-/гипо- отличаются двумя правками).
+    """
+    if length < 8:
+        return 0
+    if length < 12:
+        return 1
+    return 2
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Расстояние Дамерау-Левенштейна (с перестановкой соседних символов, OSA).
+    Если расстояние больше max_distance - возвращает max_distance + 1 (ранний выход).
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        char_a = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def _deletes(word, max_distance):
+    """Все варианты слова с удалением от 0 до max_distance символов"""
+    variants = {word}
+    level = {word}
+    for _ in range(max_distance):
+        level = {variant[:i] + variant[i + 1:] for variant in level if len(variant) > 1
+                 for i in range(len(variant))}
+        variants |= level
+    return variants
+
+
+class FuzzyIndex:
+    """
+    Словарь удалений SymSpell над набором слов (или фраз).
+    lookup() возвращает слова словаря на расстоянии не больше max_distance.
+    Размер словаря удалений - не больше C(prefix_length, ≤max_distance) вариантов
+    на слово, поэтому индекс годится и для десятков тысяч терминов.
+    """
+
+    def __init__(self, words, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = frozenset(words)
+        self._deletes = {}
+
+        for word in sorted(self.words):
+            for variant in _deletes(word[:prefix_length], max_distance):
+                self._deletes.setdefault(variant, []).append(word)
+        self._deletes = {variant: tuple(words) for variant, words in self._deletes.items()}
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def lookup(self, word, max_distance=None):
+        """Слова словаря на расстоянии ≤ max_distance: [(слово, расстояние)] от ближайших"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if word in self.words:
+            return [(word, 0)]
+        if max_distance <= 0:
+            return []
+
+        candidates = set()
+        for variant in _deletes(word[:self.prefix_length], max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((candidate, distance))
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+
+    def best(self, word, max_distance=None):
+        """Единственное ближайшее слово словаря или None (нет кандидатов или их несколько)"""
+        matches = self.lookup(word, max_distance)
+        if not matches or (len(matches) > 1 and matches[1][1] == matches[0][1]):
+            return None
+        return matches[0][0]
+
+
+def phrase_distance(a, b):
+    """
+    Расстояние между фразами по словам: сумма расстояний, если слов столько же
+    и каждое слово отличается не больше, чем допускает его длина; иначе None
+    """
+    words_a, words_b = a.split(), b.split()
+    if len(words_a) != len(words_b):
+        return None
+    total = 0
+    for word_a, word_b in zip(words_a, words_b):
+        limit = allowed_distance(max(len(word_a), len(word_b)))
+        distance = edit_distance(word_a, word_b, limit)
+        if distance > limit:
+            return None
+        total += distance
+    return total
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    import random
+    import time
+
+    from modules.lexicon import get_default_lexicon
+
+    print("🧪 Тестирование нечеткого индекса:")
+    print("=" * 50)
+
+    lexicon = get_default_lexicon()
+    text = "У пациентки развился анафилатический шок, затем тромбоцитоперния и гепатотоксичность."
+    hits = lexicon.scan(text)
+    print(f"Текст: {text}")
+    for start, end, word, correction in hits.corrections:
+        print(f"   исправлено [{start}:{end}] '{word}' → '{correction}'")
+    print(f"Явления: {sorted(hits.terms('events.basic') | hits.terms('ime.mapping'))}")
+
+    # Масштаб: 30 000 синтетических терминов
+    rng = random.Random(1)
+    alphabet = 'абвгдежзиклмнопрстуфхцчшщыэюя'
+    words = {''.join(rng.choice(alphabet) for _ in range(rng.randint(6, 16))) for _ in range(30000)}
+    started = time.perf_counter()
+    index = FuzzyIndex(words)
+    built = time.perf_counter() - started
+
+    queries = []
+    for word in rng.sample(sorted(words), 2000):
+        position = rng.randrange(len(word))
+        queries.append(word[:position] + word[position + 1:])
+    started = time.perf_counter()
+    found = sum(1 for query in queries if index.lookup(query, 2))
+    elapsed = time.perf_counter() - started
+    print(f"\n{len(index)} слов: индекс {built:.1f} с, вариантов удаления {len(index._deletes)}")
+    print(f"Поиск: {elapsed / len(queries) * 1e6:.0f} мкс/слово, найдено {found} из {len(queries)}")
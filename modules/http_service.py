@@ -0,0 +1,497 @@
+# modules/http_service.py
+import asyncio
+import json
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from modules.batch_runner import _analyze_text_in_worker, _init_worker, _warm_up_worker
+from modules.instrumentation import INSTRUMENTATION
+
+# Ограничения запросов
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_HEADER_LINES = 100
+KEEP_ALIVE_TIMEOUT = 30
+
+# Конечные точки с отдельными замерами задержки; остальные запросы (404, другие
+# методы) - под одним ключом, чтобы клиент не мог создать произвольное число рядов
+METRIC_ENDPOINTS = frozenset(['GET /metrics', 'GET /health', 'POST /analyze', 'POST /analyze/batch'])
+OTHER_ENDPOINT = 'other'
+
+
+def metrics_endpoint(method, path):
+    """Ключ замеров запроса: 'МЕТОД путь' для известных конечных точек, иначе OTHER_ENDPOINT"""
+    endpoint = f'{method} {path}'
+    return endpoint if endpoint in METRIC_ENDPOINTS else OTHER_ENDPOINT
+
+
+def prometheus_label(value):
+    """Значение метки Prometheus: экранируются обратная косая черта, кавычка и перевод строки"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class HTTPError(Exception):
+    """Ошибка запроса, которая возвращается клиенту с кодом статуса"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class LatencyRecorder:
+    """
+    Задержки по конечным точкам: последние window замеров для перцентилей
+    плюс общие счетчики запросов и ошибок.
+    """
+
+    PERCENTILES = (50, 90, 95, 99)
+
+    def __init__(self, window=10000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._errors = {}
+        self.started = time.monotonic()
+
+    def record(self, endpoint, seconds, error=False):
+        self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+        self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+        if error:
+            self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    @staticmethod
+    def percentile(sorted_samples, percent):
+        """Перцентиль методом ближайшего ранга"""
+        if not sorted_samples:
+            return 0.0
+        rank = max(1, -(-percent * len(sorted_samples) // 100))
+        return sorted_samples[rank - 1]
+
+    def snapshot(self):
+        endpoints = {}
+        for endpoint, samples in self._samples.items():
+            ordered = sorted(samples)
+            latency = {f'p{percent}': round(self.percentile(ordered, percent) * 1000, 3)
+                       for percent in self.PERCENTILES}
+            latency['max'] = round(ordered[-1] * 1000, 3)
+            endpoints[endpoint] = {
+                'requests': self._counts[endpoint],
+                'errors': self._errors.get(endpoint, 0),
+                'latency_ms': latency
+            }
+        return {'uptime_s': round(time.monotonic() - self.started, 1), 'endpoints': endpoints}
+
+    def prometheus_text(self, prefix='pv_http'):
+        """Текстовый формат Prometheus: счетчики запросов и квантили задержки по конечным точкам"""
+        lines = [
+            f'# TYPE {prefix}_requests_total counter',
+            f'# TYPE {prefix}_errors_total counter',
+            f'# TYPE {prefix}_request_duration_seconds summary'
+        ]
+        for endpoint, samples in sorted(self._samples.items()):
+            label = f'endpoint="{prometheus_label(endpoint)}"'
+            ordered = sorted(samples)
+            lines.append(f'{prefix}_requests_total{{{label}}} {self._counts[endpoint]}')
+            lines.append(f'{prefix}_errors_total{{{label}}} {self._errors.get(endpoint, 0)}')
+            for percent in self.PERCENTILES:
+                lines.append(f'{prefix}_request_duration_seconds{{{label},quantile="{percent / 100}"}} '
+                             f'{self.percentile(ordered, percent):.6f}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{{label}}} {sum(ordered):.6f}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{{label}}} {len(ordered)}')
+        return '\n'.join(lines) + '\n'
+
+
+class AnalysisService:
+    """
+    Сервис анализа кейсов.
+    Проверяльщики загружаются один раз в каждом процессе пула (как в batch_runner),
+    анализ выполняется в пуле, поэтому цикл событий не блокируется.
+    max_concurrency - кейсов в обработке одновременно; max_pending - запросов в очереди,
+    сверх которых сервис отвечает 503.
+    instrument - замеры проверяльщиков в процессах пула (GET /metrics?format=prometheus).
+    checks - выполняемые проверки (по умолчанию - все).
+    """
+
+    def __init__(self, workers=None, max_concurrency=None, max_pending=256,
+                 max_batch=1000, event_lexicon='common', cache_path=None, instrument=False,
+                 checks=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers * 2
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(event_lexicon, cache_path, instrument, checks))
+        self.metrics = LatencyRecorder()
+        self._slots = None
+        self._pending = 0
+        self._in_flight = 0
+        self._cases = 0
+
+    def warm_up(self, timeout=120):
+        """
+        Запускает все процессы пула заранее и загружает в них базу знаний: первый запрос
+        не ждет загрузки. Задачи прогрева ждут друг друга на барьере, поэтому ни один
+        процесс не берет две задачи. Возвращает pid процессов пула; процесс, не дошедший
+        до барьера за timeout секунд, - threading.BrokenBarrierError
+        """
+        import multiprocessing
+
+        with multiprocessing.Manager() as manager:
+            barrier = manager.Barrier(self.workers)
+            futures = [self.executor.submit(_warm_up_worker, barrier, timeout)
+                       for _ in range(self.workers)]
+            return {future.result() for future in futures}
+
+    async def analyze_text(self, case_id, text):
+        if self._slots is None:
+            # Семафор создается внутри работающего цикла событий
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            self._in_flight += 1
+            try:
+                result, metrics = await loop.run_in_executor(
+                    self.executor, _analyze_text_in_worker, case_id, text
+                )
+            finally:
+                self._in_flight -= 1
+                self._cases += 1
+
+        if metrics:
+            INSTRUMENTATION.merge(metrics)
+        return result
+
+    @staticmethod
+    def _parse_case(record, default_id):
+        if not isinstance(record, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Кейс должен быть JSON-объектом")
+        text = record.get('text')
+        if not isinstance(text, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Нет текстового поля 'text'")
+        return record.get('case_id', default_id), text.strip()
+
+    async def analyze(self, payload):
+        """POST /analyze: {"case_id": ..., "text": "..."} → результат кейса"""
+        case_id, text = self._parse_case(payload, None)
+        return await self.analyze_text(case_id, text)
+
+    async def analyze_batch(self, payload):
+        """POST /analyze/batch: {"cases": [{"case_id": ..., "text": "..."}, ...]} → {"results": [...]}"""
+        cases = payload.get('cases') if isinstance(payload, dict) else None
+        if not isinstance(cases, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Ожидается поле 'cases' со списком кейсов")
+        if len(cases) > self.max_batch:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            f"Не более {self.max_batch} кейсов в пакете")
+
+        parsed = [self._parse_case(record, index) for index, record in enumerate(cases)]
+        results = await asyncio.gather(*(self.analyze_text(case_id, text) for case_id, text in parsed))
+        return {'results': results}
+
+    def status(self):
+        """GET /metrics"""
+        status = self.metrics.snapshot()
+        status.update(
+            workers=self.workers,
+            cases=self._cases,
+            in_flight=self._in_flight,
+            pending=self._pending,
+            max_concurrency=self.max_concurrency,
+            max_pending=self.max_pending
+        )
+        return status
+
+    def prometheus_text(self):
+        """GET /metrics?format=prometheus"""
+        gauges = (
+            ('pv_http_in_flight', self._in_flight),
+            ('pv_http_pending', self._pending),
+            ('pv_cases_total', self._cases),
+        )
+        text = ''.join(f'# TYPE {name} gauge\n{name} {value}\n' for name, value in gauges)
+        return text + self.metrics.prometheus_text() + INSTRUMENTATION.prometheus_text()
+
+    async def dispatch(self, method, path, body, query=''):
+        """
+        Маршрутизация: возвращает (статус, ответ).
+        Ответ - объект JSON или строка (отдается как text/plain).
+        """
+        routes = {
+            ('POST', '/analyze'): self.analyze,
+            ('POST', '/analyze/batch'): self.analyze_batch,
+        }
+
+        if path == '/metrics':
+            if method != 'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Только GET")
+            if parse_qs(query).get('format') == ['prometheus']:
+                return HTTPStatus.OK, self.prometheus_text()
+            return HTTPStatus.OK, self.status()
+        if path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}
+
+        handler = routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in routes):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Только POST")
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Неизвестный адрес: {path}")
+
+        if self._pending >= self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Сервис перегружен, повторите позже")
+
+        try:
+            payload = json.loads(body or b'null')
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Некорректный JSON: {e}")
+
+        self._pending += 1
+        try:
+            return HTTPStatus.OK, await handler(payload)
+        finally:
+            self._pending -= 1
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def read_request(reader):
+    """
+    Читает один HTTP/1.1 запрос.
+    Возвращает (метод, путь, строка запроса, заголовки, тело) или None, если соединение закрыто.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Некорректная строка запроса")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Слишком много заголовков")
+
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Нужен заголовок Content-Length")
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Некорректный Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Слишком большое тело запроса")
+
+    body = await reader.readexactly(length) if length else b''
+    headers[':version'] = version
+    target = urlsplit(target)
+    return method.upper(), target.path, target.query, headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    if isinstance(payload, str):
+        body = payload.encode('utf-8')
+        content_type = 'text/plain; version=0.0.4; charset=utf-8'
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        content_type = 'application/json; charset=utf-8'
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+    )
+    if status == HTTPStatus.SERVICE_UNAVAILABLE:
+        head += "Retry-After: 1\r\n"
+    writer.write(head.encode('latin-1') + b"\r\n" + body)
+
+
+def make_handler(service):
+    """Обработчик соединения для asyncio.start_server (поддерживает keep-alive)"""
+
+    async def handle_connection(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except HTTPError as e:
+                    write_response(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                method, path, query, headers, body = request
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and headers[':version'] != 'HTTP/1.0')
+
+                started = time.perf_counter()
+                try:
+                    status, payload = await service.dispatch(method, path, body, query)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': e.message}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"Ошибка анализа: {e}"}
+
+                service.metrics.record(metrics_endpoint(method, path), time.perf_counter() - started,
+                                       error=status >= 400)
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return handle_connection
+
+
+async def serve(service, host='127.0.0.1', port=8080, ready=None, stop_signals=False):
+    """
+    Запускает HTTP-сервер; ready(server) вызывается после начала прослушивания.
+    stop_signals - штатно останавливаться по SIGINT/SIGTERM.
+    """
+    server = await asyncio.start_server(make_handler(service), host, port)
+    stopped = asyncio.Event()
+
+    if stop_signals:
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, stopped.set)
+            except NotImplementedError:
+                # Windows: остановка по KeyboardInterrupt
+                pass
+
+    async with server:
+        if ready:
+            ready(server)
+        await stopped.wait()
+
+
+class ServiceClient:
+    """
+    Простой асинхронный клиент сервиса (для локальной проверки и нагрузочных тестов).
+    Одно keep-alive соединение на клиента.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None):
+        """Возвращает (код статуса, ответ: JSON или текст)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1')
+            + body
+        )
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        response = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection') == 'close':
+            await self.close()
+        if headers.get('content-type', '').startswith('application/json'):
+            return int(status_line.split()[1]), json.loads(response)
+        return int(status_line.split()[1]), response.decode('utf-8')
+
+    async def analyze(self, text, case_id=None):
+        return await self.request('POST', '/analyze', {'case_id': case_id, 'text': text})
+
+    async def analyze_batch(self, cases):
+        return await self.request('POST', '/analyze/batch', {'cases': cases})
+
+    async def metrics(self):
+        return await self.request('GET', '/metrics')
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._reader = self._writer = None
+
+
+async def _self_test(service, cases, clients=4, rounds=5):
+    """Поднимает сервер на свободном порту и нагружает его несколькими клиентами"""
+    started = asyncio.get_running_loop().create_future()
+    server_task = asyncio.create_task(serve(service, port=0, ready=started.set_result))
+    server = await started
+    port = server.sockets[0].getsockname()[1]
+
+    async def run_client():
+        client = ServiceClient(port=port)
+        try:
+            for _ in range(rounds):
+                for case in cases:
+                    status, _ = await client.analyze(case['text'], case['case_id'])
+                    assert status == 200, status
+                status, response = await client.analyze_batch(cases)
+                assert status == 200 and len(response['results']) == len(cases), status
+        finally:
+            await client.close()
+
+    await asyncio.gather(*(run_client() for _ in range(clients)))
+
+    client = ServiceClient(port=port)
+    _, first = await client.analyze(cases[0]['text'], cases[0]['case_id'])
+    _, metrics = await client.metrics()
+    await client.close()
+
+    server_task.cancel()
+    return first, metrics
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    from modules.batch_runner import discover_cases
+
+    cases = []
+    for path in discover_cases('data/cases'):
+        with open(path, 'r', encoding='utf-8') as f:
+            cases.append({'case_id': path, 'text': f.read()})
+
+    service = AnalysisService(workers=2)
+    service.warm_up()
+    try:
+        first, metrics = asyncio.run(_self_test(service, cases))
+    finally:
+        service.close()
+
+    print("🧪 Тестирование HTTP-сервиса:")
+    print("=" * 50)
+    print(f"Кейс {first['case_id']}: препарат {first['drug']}, серьезный: {first['is_serious']}")
+    print(f"Проанализировано кейсов: {metrics['cases']}")
+    for endpoint, endpoint_metrics in metrics['endpoints'].items():
+        latency = endpoint_metrics['latency_ms']
+        print(f"   {endpoint}: {endpoint_metrics['requests']} запросов, "
+              f"p50 {latency['p50']} мс, p99 {latency['p99']} мс")
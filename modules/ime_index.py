@@ -0,0 +1,93 @@
+# modules/ime_index.py
+import sys
+
+
+def term_key(term):
+    """Ключ поиска: без учета регистра и крайних пробелов"""
+    return term.strip().casefold()
+
+
+class IMEIndex:
+    """
+    Хэш-индекс списка IME (Important Medical Events) с иерархией MedDRA.
+    Любой термин - PT или LLT - за O(1) приводится к предпочтительному термину (PT) списка IME.
+
+    Формат источника (knowledge/ime_list.json):
+    {
+      "important_medical_events": ["Anaphylactic shock", ...],   # PT из списка IME
+      "meddra": {                                               # необязательно
+        "Anaphylactic shock": {"llt": ["Shock anaphylactic"], "hlt": "Anaphylactic responses"}
+      }
+    }
+    """
+
+    def __init__(self, preferred_terms, meddra=None):
+        self._pt_by_key = {}
+        self._hlt_by_pt = {}
+
+        for preferred_term in preferred_terms:
+            preferred_term = sys.intern(preferred_term)
+            self._pt_by_key.setdefault(sys.intern(term_key(preferred_term)), preferred_term)
+
+        for preferred_term, links in (meddra or {}).items():
+            preferred_term = self._pt_by_key.get(term_key(preferred_term))
+            if preferred_term is None:
+                # Иерархия для PT вне списка IME не нужна
+                continue
+
+            for lower_level_term in links.get('llt', []):
+                self._pt_by_key.setdefault(sys.intern(term_key(lower_level_term)), preferred_term)
+
+            if links.get('hlt'):
+                self._hlt_by_pt[preferred_term] = sys.intern(links['hlt'])
+
+        self.preferred_terms = frozenset(self._pt_by_key.values())
+
+    @classmethod
+    def from_json(cls, data):
+        """Строит индекс из содержимого ime_list.json"""
+        return cls(data.get('important_medical_events', []), data.get('meddra'))
+
+    def __len__(self):
+        return len(self.preferred_terms)
+
+    def __contains__(self, term):
+        return self.is_ime(term)
+
+    def lookup(self, term):
+        """Возвращает PT из списка IME для PT/LLT или None"""
+        return self._pt_by_key.get(term_key(term))
+
+    def is_ime(self, term):
+        return term_key(term) in self._pt_by_key
+
+    def hlt(self, preferred_term):
+        """HLT, к которому относится PT (если известен)"""
+        return self._hlt_by_pt.get(preferred_term)
+
+    def diff(self, other):
+        """Ключи терминов, для которых другой индекс дает иной результат (новые, удаленные, перенесенные)"""
+        keys = self._pt_by_key.keys() | other._pt_by_key.keys()
+        return {key for key in keys if self._pt_by_key.get(key) != other._pt_by_key.get(key)}
+
+    def check_many(self, terms):
+        """Пакетная проверка: {термин: PT или None} для каждого уникального термина"""
+        pt_by_key = self._pt_by_key
+        return {term: pt_by_key.get(term_key(term)) for term in set(terms)}
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    # Класс берется из модуля, а не из __main__, чтобы снимок читался и из других процессов
+    from modules.ime_index import IMEIndex
+    from modules.kb_snapshot import load_json_snapshot
+
+    index = load_json_snapshot('knowledge/ime_list.json', 'ime_index', build=IMEIndex.from_json)
+
+    print("🧪 Тестирование индекса IME:")
+    print("=" * 50)
+    print(f"PT в списке IME: {len(index)}")
+
+    for term, preferred_term in index.check_many(['Anaphylactic shock', 'SEPSIS', 'Headache']).items():
+        status = f"IME → {preferred_term}" if preferred_term else "не IME"
+        print(f"   {term}: {status}")
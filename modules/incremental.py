@@ -0,0 +1,333 @@
+# modules/incremental.py
+import hashlib
+import json
+import os
+import sqlite3
+
+from modules.batch_runner import BatchStats, read_case_text, run_batch
+from modules.case_context import summarize_expectedness, summarize_ime
+from modules.expectedness_checker import ExpectednessChecker
+from modules.ime_checker import IMEChecker
+from modules.ime_index import IMEIndex, term_key
+from modules.kb_snapshot import code_fingerprint
+from modules.result_cache import normalize_case_text
+
+# Файлы базы знаний и проверяльщики, которые от них зависят.
+# Серьезность, причинность и полнота данных от базы знаний не зависят
+# и при ее изменении не пересчитываются.
+KNOWLEDGE_SOURCES = {
+    'smpc': 'knowledge/smpc_database.json',
+    'synonyms': 'knowledge/drug_synonyms.json',
+    'ime': 'knowledge/ime_list.json'
+}
+
+CHECKER_DEPENDENCIES = {
+    'expectedness': ['smpc', 'synonyms'],
+    'ime': ['ime']
+}
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_case_text(text).encode('utf-8')).hexdigest()
+
+
+def load_knowledge_sources():
+    """Текущее содержимое файлов базы знаний (отсутствующий файл - пустой словарь)"""
+    sources = {}
+    for name, path in KNOWLEDGE_SOURCES.items():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                sources[name] = json.load(f)
+        except FileNotFoundError:
+            sources[name] = {}
+    return sources
+
+
+def diff_knowledge(old, new):
+    """
+    Сравнивает две версии базы знаний.
+    Возвращает: {'drugs': измененные препараты, 'drug_names_changed': изменился ли
+    набор названий (нужно заново распознать препараты), 'ime_terms': ключи терминов
+    с изменившимся статусом IME}
+    """
+    old_smpc, new_smpc = old.get('smpc', {}), new.get('smpc', {})
+    changed_drugs = {
+        drug for drug in old_smpc.keys() | new_smpc.keys()
+        if old_smpc.get(drug) != new_smpc.get(drug)
+    }
+
+    drug_names_changed = (
+        list(old_smpc) != list(new_smpc) or old.get('synonyms', {}) != new.get('synonyms', {})
+    )
+
+    ime_terms = IMEIndex.from_json(old.get('ime', {})).diff(IMEIndex.from_json(new.get('ime', {})))
+
+    return {
+        'drugs': changed_drugs,
+        'drug_names_changed': drug_names_changed,
+        'ime_terms': ime_terms
+    }
+
+
+class ResultStore:
+    """
+    Хранилище результатов с зависимостями (SQLite):
+    для каждого кейса - хэш текста, результат, препараты и термины IME,
+    от которых он зависит, плюс последняя примененная версия базы знаний.
+    fingerprint - версия кода анализа (по умолчанию - code_fingerprint()): результат,
+    сохраненный другой версией кода, считается отсутствующим и пересчитывается.
+    """
+
+    def __init__(self, path, fingerprint=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript('''
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS cases (
+                case_id TEXT PRIMARY KEY, text_hash TEXT NOT NULL, result TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS case_drugs (
+                case_id TEXT NOT NULL, drug TEXT NOT NULL, suspect INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS case_drugs_drug ON case_drugs (drug, suspect);
+            CREATE INDEX IF NOT EXISTS case_drugs_case ON case_drugs (case_id);
+            CREATE TABLE IF NOT EXISTS case_terms (case_id TEXT NOT NULL, term TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS case_terms_term ON case_terms (term);
+            CREATE INDEX IF NOT EXISTS case_terms_case ON case_terms (case_id);
+            CREATE TABLE IF NOT EXISTS knowledge_state (name TEXT PRIMARY KEY, content TEXT NOT NULL);
+        ''')
+        # Хранилища, созданные до учета версии кода: их результаты будут пересчитаны
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(cases)')}
+        if 'fingerprint' not in columns:
+            self.db.execute("ALTER TABLE cases ADD COLUMN fingerprint TEXT NOT NULL DEFAULT ''")
+        self.fingerprint = fingerprint or code_fingerprint()
+
+    def get(self, case_id, expected_hash):
+        """Сохраненный результат, если не изменились текст кейса и версия кода"""
+        row = self.db.execute(
+            'SELECT text_hash, fingerprint, result FROM cases WHERE case_id = ?', (case_id,)
+        ).fetchone()
+        if row is None or row[0] != expected_hash or row[1] != self.fingerprint:
+            return None
+        return json.loads(row[2])
+
+    def get_with_hash(self, case_id):
+        row = self.db.execute(
+            'SELECT text_hash, result FROM cases WHERE case_id = ?', (case_id,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def put(self, case_id, case_hash, result, ime_terms):
+        """Сохраняет результат и его зависимости"""
+        self.db.execute(
+            'INSERT OR REPLACE INTO cases (case_id, text_hash, fingerprint, result) VALUES (?, ?, ?, ?)',
+            (case_id, case_hash, self.fingerprint, json.dumps(result, ensure_ascii=False))
+        )
+        self._put_drugs(case_id, result)
+        self.db.execute('DELETE FROM case_terms WHERE case_id = ?', (case_id,))
+        self.db.executemany(
+            'INSERT INTO case_terms (case_id, term) VALUES (?, ?)',
+            [(case_id, term) for term in sorted(ime_terms)]
+        )
+
+    def update_result(self, case_id, result):
+        """Обновляет результат после частичного пересчета"""
+        self.db.execute(
+            'UPDATE cases SET result = ? WHERE case_id = ?',
+            (json.dumps(result, ensure_ascii=False), case_id)
+        )
+        self._put_drugs(case_id, result)
+
+    def _put_drugs(self, case_id, result):
+        self.db.execute('DELETE FROM case_drugs WHERE case_id = ?', (case_id,))
+        rows = [(case_id, drug, int(drug == result['drug'])) for drug in result.get('drugs', [])]
+        if result['drug'] not in result.get('drugs', []):
+            rows.append((case_id, result['drug'], 1))
+        self.db.executemany('INSERT INTO case_drugs (case_id, drug, suspect) VALUES (?, ?, ?)', rows)
+
+    def case_ids(self):
+        """Кейсы с результатом текущей версии кода (остальные будут пересчитаны целиком)"""
+        return [row[0] for row in self.db.execute(
+            'SELECT case_id FROM cases WHERE fingerprint = ? ORDER BY case_id', (self.fingerprint,)
+        )]
+
+    def cases_with_suspect(self, drugs):
+        return self._select_ids('SELECT DISTINCT case_id FROM case_drugs WHERE suspect = 1 AND drug = ?', drugs)
+
+    def cases_with_terms(self, terms):
+        return self._select_ids('SELECT DISTINCT case_id FROM case_terms WHERE term = ?', terms)
+
+    def _select_ids(self, query, values):
+        found = set()
+        for value in values:
+            found.update(row[0] for row in self.db.execute(query, (value,)))
+        return found & set(self.case_ids())
+
+    def knowledge_state(self):
+        rows = self.db.execute('SELECT name, content FROM knowledge_state').fetchall()
+        return {name: json.loads(content) for name, content in rows} if rows else None
+
+    def save_knowledge_state(self, sources):
+        self.db.executemany(
+            'INSERT OR REPLACE INTO knowledge_state (name, content) VALUES (?, ?)',
+            [(name, json.dumps(content, ensure_ascii=False)) for name, content in sources.items()]
+        )
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class IncrementalEngine:
+    """
+    Пакетная обработка с сохранением результатов и их зависимостей.
+    Неизмененные кейсы берутся из хранилища; при изменении базы знаний
+    пересчитываются только затронутые кейсы и только зависящие от нее проверки.
+    """
+
+    def __init__(self, store_path, event_lexicon='common'):
+        # Результаты зависят и от словаря явлений
+        self.store = ResultStore(store_path, f'{code_fingerprint()}:{event_lexicon}')
+        self.event_lexicon = event_lexicon
+        self._ime_checker = None
+
+    @property
+    def ime_checker(self):
+        if self._ime_checker is None:
+            self._ime_checker = IMEChecker()
+        return self._ime_checker
+
+    def ime_dependencies(self, result):
+        """Ключи английских терминов, которые IME-проверка искала для событий кейса"""
+        terms = set()
+        for event_summary in result['events']:
+            terms.update(term_key(term) for term in self.ime_checker.map_terms(event_summary['event']))
+        return terms
+
+    def refresh_knowledge(self):
+        """
+        Сравнивает текущую базу знаний с последней примененной и пересчитывает
+        затронутые кейсы. Возвращает отчет: что изменилось и сколько кейсов пересчитано.
+        """
+        report = {'sources': [], 'drugs': [], 'ime_terms': [],
+                  'drug_recognition': 0, 'expectedness': 0, 'ime': 0}
+
+        current = load_knowledge_sources()
+        previous = self.store.knowledge_state()
+        if previous is None:
+            self.store.save_knowledge_state(current)
+            self.store.commit()
+            return report
+
+        report['sources'] = sorted(
+            name for name in KNOWLEDGE_SOURCES if previous.get(name) != current[name]
+        )
+        stale_checkers = {
+            checker for checker, sources in CHECKER_DEPENDENCIES.items()
+            if set(sources) & set(report['sources'])
+        }
+        if not stale_checkers:
+            return report
+
+        changes = diff_knowledge(previous, current)
+        report['drugs'] = sorted(changes['drugs'])
+        report['ime_terms'] = sorted(changes['ime_terms'])
+
+        if 'expectedness' in stale_checkers:
+            self._refresh_expectedness(changes, report)
+
+        if 'ime' in stale_checkers and changes['ime_terms']:
+            # Проверяльщик IME строится заново по новому списку
+            self._ime_checker = IMEChecker()
+            for case_id in self.store.cases_with_terms(changes['ime_terms']):
+                _, result = self.store.get_with_hash(case_id)
+                for event_summary in result['events']:
+                    event_summary['ime'] = summarize_ime(
+                        self._ime_checker.check_ime_significance(event_summary['event'])
+                    )
+                self.store.update_result(case_id, result)
+                report['ime'] += 1
+
+        self.store.save_knowledge_state(current)
+        self.store.commit()
+        return report
+
+    def _refresh_expectedness(self, changes, report):
+        expectedness_checker = ExpectednessChecker()
+        affected = self.store.cases_with_suspect(changes['drugs'])
+
+        if changes['drug_names_changed']:
+            # Новые названия или синонимы: заново распознаем препараты по тексту
+            for case_id in self.store.case_ids():
+                case_hash, result = self.store.get_with_hash(case_id)
+                text = read_case_text(case_id)
+                if text is None or text_hash(text) != case_hash:
+                    # Текст изменился - кейс будет полностью пересчитан при следующей обработке
+                    continue
+
+                drugs = expectedness_checker.drug_recognizer.drugs(text)
+                drug = drugs[0] if drugs else "Препарат А"
+                if drugs != result.get('drugs') or drug != result['drug']:
+                    result['drugs'] = drugs
+                    result['drug'] = drug
+                    self.store.update_result(case_id, result)
+                    affected.add(case_id)
+                    report['drug_recognition'] += 1
+
+        for case_id in affected:
+            _, result = self.store.get_with_hash(case_id)
+            for event_summary in result['events']:
+                event_summary.update(summarize_expectedness(
+                    expectedness_checker.check_expectedness('', event_summary['event'], result['drug'])
+                ))
+            self.store.update_result(case_id, result)
+            report['expectedness'] += 1
+
+    def run(self, paths, workers=None, chunksize=16, stats=None, shared=False):
+        """
+        Обрабатывает кейсы в порядке входа: неизмененные берутся из хранилища,
+        новые и измененные анализируются в пуле процессов (run_batch).
+        shared - общая база знаний процессов пула (см. run_batch)
+        """
+        if stats is None:
+            stats = BatchStats()
+
+        plan = []
+        todo = []
+        for path in paths:
+            text = read_case_text(path)
+            case_hash = text_hash(text) if text is not None else None
+            stored = self.store.get(path, case_hash) if case_hash else None
+            plan.append((path, case_hash, stored))
+            if stored is None:
+                todo.append(path)
+
+        # Счетчики пула отдельно: кейсы считаются ниже (вместе с взятыми из хранилища)
+        pool_stats = BatchStats()
+        fresh = run_batch(todo, workers=workers, chunksize=chunksize, ordered=True,
+                          event_lexicon=self.event_lexicon, stats=pool_stats, shared=shared)
+        try:
+            for path, case_hash, stored in plan:
+                if stored is not None:
+                    result = {'case_id': path}
+                    result.update(stored)
+                    stats.add(result, cache_hit=True)
+                    yield result
+                    continue
+
+                result = next(fresh)
+                if 'error' not in result and case_hash:
+                    stored = {key: value for key, value in result.items() if key != 'case_id'}
+                    self.store.put(path, case_hash, stored, self.ime_dependencies(stored))
+                stats.add(result, cache_hit=False)
+                yield result
+        finally:
+            fresh.close()
+            stats.worker_memory = pool_stats.worker_memory
+            self.store.commit()
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,226 @@
+# modules/instrumentation.py
+import functools
+import os
+import time
+import types
+from bisect import bisect_left
+
+# Границы корзин гистограммы задержек, секунды (как у Prometheus: le - "не больше")
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# Замеряемые методы: публичные проверки и внутренние подпроверки проверяльщиков
+METHOD_PREFIXES = ('check_', 'analyze_', 'extract_', '_check_', '_extract_', '_apply_', '_calculate_')
+
+# PV_INSTRUMENT=1 включает замеры при импорте (удобно для процессов-обработчиков)
+ENABLED_BY_ENV = os.environ.get('PV_INSTRUMENT', '0') == '1'
+
+
+def instrumented_classes():
+    """Классы, методы которых замеряются (импорт внутри: модули не зависят от замеров)"""
+    from modules.case_context import CaseContext
+    from modules.causality_checker import CausalityChecker
+    from modules.drug_recognizer import DrugRecognizer
+    from modules.expectedness_checker import ExpectednessChecker
+    from modules.ime_checker import IMEChecker
+    from modules.lexicon import CaseLexicon
+    from modules.missing_info_checker import MissingInfoChecker
+    from modules.seriousness_checker import SeriousnessChecker
+
+    return {
+        SeriousnessChecker: None,
+        IMEChecker: None,
+        ExpectednessChecker: None,
+        CausalityChecker: None,
+        MissingInfoChecker: None,
+        CaseLexicon: ['scan'],
+        DrugRecognizer: ['recognize'],
+        CaseContext: ['summary', 'evaluate_event'],
+    }
+
+
+class MethodStats:
+    """Счетчики одного метода: вызовы, суммарное время, гистограмма задержек"""
+
+    __slots__ = ('count', 'total', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total, 'buckets': list(self.buckets)}
+
+    def merge(self, data):
+        self.count += data['count']
+        self.total += data['total']
+        for index, value in enumerate(data['buckets']):
+            self.buckets[index] += value
+
+    def quantile(self, q):
+        """Оценка квантиля по гистограмме (верхняя граница корзины)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, value in enumerate(self.buckets):
+            seen += value
+            if seen >= rank:
+                return BUCKETS[index] if index < len(BUCKETS) else float('inf')
+        return float('inf')
+
+
+class Instrumentation:
+    """
+    Замеры горячих путей проверяльщиков.
+    Выключены по умолчанию: методы классов не изменены и ничего не стоят.
+    enable() подменяет методы обертками с замером, disable() возвращает оригиналы.
+    Имена замеров: 'Класс.метод' (например 'MissingInfoChecker._check_event_start_date').
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}
+        self._originals = []
+
+    def _wrap(self, name, method):
+        stats = self.stats.setdefault(name, MethodStats())
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats.record(clock() - started)
+
+        return timed
+
+    def enable(self):
+        if self.enabled:
+            return self
+
+        for cls, method_names in instrumented_classes().items():
+            for attribute, method in list(vars(cls).items()):
+                if not isinstance(method, types.FunctionType):
+                    continue
+                if method_names is None:
+                    if not attribute.startswith(METHOD_PREFIXES):
+                        continue
+                elif attribute not in method_names:
+                    continue
+
+                self._originals.append((cls, attribute, method))
+                setattr(cls, attribute, self._wrap(f'{cls.__name__}.{attribute}', method))
+
+        self.enabled = True
+        return self
+
+    def disable(self):
+        for cls, attribute, method in reversed(self._originals):
+            setattr(cls, attribute, method)
+        self._originals = []
+        self.enabled = False
+        return self
+
+    def reset(self):
+        for stats in self.stats.values():
+            stats.__init__()
+
+    def drain(self):
+        """Счетчики, накопленные с прошлого вызова (для передачи из процесса-обработчика)"""
+        delta = {name: stats.to_dict() for name, stats in self.stats.items() if stats.count}
+        self.reset()
+        return delta
+
+    def merge(self, delta):
+        """Добавляет счетчики, полученные из другого процесса"""
+        for name, data in delta.items():
+            self.stats.setdefault(name, MethodStats()).merge(data)
+
+    def summary(self):
+        """Сводка по методам, от самых затратных по суммарному времени"""
+        rows = []
+        for name, stats in self.stats.items():
+            if not stats.count:
+                continue
+            rows.append({
+                'name': name,
+                'calls': stats.count,
+                'total_s': round(stats.total, 6),
+                'mean_us': round(stats.total / stats.count * 1e6, 2),
+                'p50_le_s': stats.quantile(0.5),
+                'p99_le_s': stats.quantile(0.99)
+            })
+        rows.sort(key=lambda row: row['total_s'], reverse=True)
+        return rows
+
+    def format_summary(self):
+        rows = self.summary()
+        if not rows:
+            return "⏱️  Замеры: нет данных"
+
+        lines = ["⏱️  Замеры проверяльщиков (время включает вложенные вызовы):"]
+        for row in rows:
+            lines.append(
+                f"   {row['name']:<50} {row['calls']:>9} вызовов {row['total_s'] * 1000:>10.1f} мс "
+                f"{row['mean_us']:>10.1f} мкс/вызов  p99 ≤ {row['p99_le_s'] * 1e6:.0f} мкс"
+            )
+        return '\n'.join(lines)
+
+    def prometheus_text(self, prefix='pv_checker'):
+        """Текстовый формат Prometheus: гистограмма длительности с меткой method"""
+        metric = f'{prefix}_duration_seconds'
+        lines = [
+            f'# HELP {metric} Длительность вызовов методов проверяльщиков.',
+            f'# TYPE {metric} histogram'
+        ]
+        for name in sorted(self.stats):
+            stats = self.stats[name]
+            label = f'method="{name}"'
+            cumulative = 0
+            for bound, value in zip(BUCKETS + (float('inf'),), stats.buckets):
+                cumulative += value
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{label}}} {stats.total:.9f}')
+            lines.append(f'{metric}_count{{{label}}} {stats.count}')
+        return '\n'.join(lines) + '\n'
+
+
+# Общие замеры процесса
+INSTRUMENTATION = Instrumentation()
+
+
+def enable():
+    return INSTRUMENTATION.enable()
+
+
+def disable():
+    return INSTRUMENTATION.disable()
+
+
+if ENABLED_BY_ENV:
+    enable()
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    from modules.case_context import CaseAnalyzer
+
+    instrumentation = enable()
+    analyzer = CaseAnalyzer()
+
+    for filename in sorted(os.listdir('data/cases')):
+        with open(os.path.join('data/cases', filename), 'r', encoding='utf-8') as f:
+            analyzer.context(f.read().strip()).summary()
+
+    print(instrumentation.format_summary())
+    print()
+    print(instrumentation.prometheus_text().splitlines()[2])
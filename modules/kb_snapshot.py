@@ -0,0 +1,353 @@
+# modules/kb_snapshot.py
+import hashlib
+import json
+import os
+import pickle
+from collections.abc import Mapping
+from functools import lru_cache
+
+# Скомпилированные снимки базы знаний (не хранятся в git)
+SNAPSHOT_DIR = 'knowledge/.snapshots'
+
+# Меняется при изменении формата снимков - старые снимки пересобираются
+SNAPSHOT_FORMAT = 4
+
+# PV_KB_SNAPSHOT=0 отключает снимки (для сравнения и отладки)
+SNAPSHOTS_ENABLED = os.environ.get('PV_KB_SNAPSHOT', '1') != '0'
+
+
+def file_sha256(path):
+    """Хэш содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PackedMapping(Mapping):
+    """
+    Словарь из снимка: в память загружается только индекс ключей,
+    значения распаковываются при первом обращении и кэшируются.
+    """
+
+    def __init__(self, index, blob):
+        self._index = index
+        self._blob = blob
+        self._cache = {}
+
+    @classmethod
+    def pack(cls, mapping):
+        """Упаковывает словарь: каждое значение - отдельный pickle в общем буфере"""
+        index = {}
+        chunks = []
+        offset = 0
+        for key, value in mapping.items():
+            chunk = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            index[key] = (offset, len(chunk))
+            chunks.append(chunk)
+            offset += len(chunk)
+        return cls(index, b''.join(chunks))
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        offset, length = self._index[key]
+        value = pickle.loads(self._blob[offset:offset + length])
+        self._cache[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def materialize(self):
+        """Распаковывает все значения сразу (перед fork: процессы пула получают их готовыми)"""
+        for key in self._index:
+            self[key]
+        return self
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+# Исходные файлы базы знаний, от которых зависят результаты анализа
+KNOWLEDGE_FILES = [
+    'knowledge/smpc_database.json',
+    'knowledge/ime_list.json',
+    'knowledge/drug_synonyms.json'
+]
+
+
+def _code_files():
+    """Модули в modules/ (код проверяльщиков, словаря и стеммера)"""
+    modules_dir = os.path.dirname(os.path.abspath(__file__))
+    return sorted(
+        os.path.join(modules_dir, filename)
+        for filename in os.listdir(modules_dir) if filename.endswith('.py')
+    )
+
+
+def _files_fingerprint(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update(file_sha256(path).encode('ascii') if os.path.exists(path) else b'-')
+    return digest.hexdigest()
+
+
+def knowledge_fingerprint():
+    """
+    Отпечаток версии базы знаний и кода проверяльщиков.
+    Меняется при изменении любого файла базы знаний или модуля в modules/.
+    """
+    return _files_fingerprint(KNOWLEDGE_FILES + _code_files())
+
+
+def code_fingerprint():
+    """
+    Отпечаток кода анализа без базы знаний: меняется при изменении любого модуля в modules/
+    (для хранилищ, которые сами отслеживают изменения базы знаний - modules/incremental.py)
+    """
+    return _files_fingerprint(_code_files())
+
+
+@lru_cache(maxsize=1)
+def _snapshot_code():
+    """
+    Версия кода для заголовка снимка: снимок хранит объекты, построенные функциями build
+    (индексы, автоматы), и пересобирается при изменении любого модуля в modules/.
+    Считается один раз на процесс
+    """
+    return code_fingerprint()
+
+
+def _snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f'{name}.pickle')
+
+
+# Ошибки чтения поврежденного или устаревшего снимка - снимок просто пересобирается
+_SNAPSHOT_ERRORS = (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError)
+
+
+def _read_header(snapshot_path):
+    """Читает только заголовок снимка (без данных)"""
+    try:
+        with open(snapshot_path, 'rb') as f:
+            return pickle.load(f)
+    except _SNAPSHOT_ERRORS:
+        return None
+
+
+def _read_payload(snapshot_path):
+    with open(snapshot_path, 'rb') as f:
+        header = pickle.load(f)
+        if header.get('packed'):
+            index = pickle.load(f)
+            return PackedMapping(index, f.read())
+        return pickle.load(f)
+
+
+def _write_snapshot(snapshot_path, header, payload):
+    """
+    Атомарно записывает снимок: заголовок, затем данные.
+    Для PackedMapping пишется индекс ключей и общий буфер значений.
+    """
+    header['packed'] = isinstance(payload, PackedMapping)
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        tmp_path = f'{snapshot_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if header['packed']:
+                pickle.dump(payload._index, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.write(payload._blob)
+            else:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except OSError:
+        # Каталог только для чтения - работаем без снимка
+        pass
+
+
+def load_json_snapshot(source_path, name, build=None, packed=False):
+    """
+    Загружает JSON-файл базы знаний через бинарный снимок.
+    Снимок действителен, пока совпадают mtime и размер исходника и код modules/;
+    при изменении mtime сверяется sha256 содержимого.
+    build(data) - необязательная индексация, результат которой сохраняется в снимке.
+    packed - вернуть PackedMapping (значения верхнего уровня загружаются по требованию).
+    """
+    stat = os.stat(source_path)
+
+    def make_payload():
+        with open(source_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if build:
+            data = build(data)
+        return PackedMapping.pack(data) if packed else data
+
+    if not SNAPSHOTS_ENABLED:
+        return make_payload()
+
+    snapshot_path = _snapshot_path(name)
+    header = _read_header(snapshot_path)
+
+    if header and header.get('format') == SNAPSHOT_FORMAT and header.get('code') == _snapshot_code():
+        try:
+            if header['mtime_ns'] == stat.st_mtime_ns and header['size'] == stat.st_size:
+                return _read_payload(snapshot_path)
+
+            if header['size'] == stat.st_size and header['sha256'] == file_sha256(source_path):
+                # Файл "тронут", но не изменен - обновляем только mtime в заголовке
+                payload = _read_payload(snapshot_path)
+                header.update(mtime_ns=stat.st_mtime_ns)
+                _write_snapshot(snapshot_path, header, payload)
+                return payload
+        except _SNAPSHOT_ERRORS:
+            pass
+
+    payload = make_payload()
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'code': _snapshot_code(),
+        'source': source_path,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': file_sha256(source_path)
+    }
+    _write_snapshot(snapshot_path, header, payload)
+    return payload
+
+
+def load_object_snapshot(name, key, build):
+    """
+    Загружает объект, построенный из данных в коде (словари терминов и т.п.).
+    key - JSON-сериализуемые исходные данные; снимок пересобирается при их изменении
+    и при изменении кода modules/ (build).
+    """
+    if not SNAPSHOTS_ENABLED:
+        return build()
+
+    key_hash = hashlib.sha256(
+        json.dumps(key, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+    snapshot_path = _snapshot_path(name)
+    header = _read_header(snapshot_path)
+
+    if (header and header.get('format') == SNAPSHOT_FORMAT and header.get('key') == key_hash
+            and header.get('code') == _snapshot_code()):
+        try:
+            return _read_payload(snapshot_path)
+        except _SNAPSHOT_ERRORS:
+            pass
+
+    payload = build()
+    _write_snapshot(snapshot_path, {'format': SNAPSHOT_FORMAT, 'key': key_hash, 'code': _snapshot_code()},
+                    payload)
+    return payload
+
+
+def compile_all():
+    """Компилирует все снимки базы знаний заранее (шаг сборки)"""
+    # Импорт внутри функции: проверяльщики сами используют этот модуль
+    from modules.expectedness_checker import ExpectednessChecker
+    from modules.ime_checker import IMEChecker
+    from modules.lexicon import LEXICON_GROUPS, get_default_lexicon
+
+    # Проверяльщики загружают базу знаний при первом обращении
+    expectedness_checker = ExpectednessChecker()
+    expectedness_checker.effect_index
+    expectedness_checker.drug_recognizer
+    IMEChecker().ime_index
+
+    # Полный словарь и словари отдельных проверок
+    get_default_lexicon()
+    for group in LEXICON_GROUPS:
+        get_default_lexicon((group,))
+
+    return sorted(os.listdir(SNAPSHOT_DIR)) if os.path.isdir(SNAPSHOT_DIR) else []
+
+
+_COLD_START_CODE = """
+import time
+started = time.perf_counter()
+from modules.case_context import CaseAnalyzer
+CaseAnalyzer()
+print(time.perf_counter() - started)
+"""
+
+
+def _write_scaled_knowledge(target_dir, scale):
+    """Создает увеличенную в scale раз копию базы знаний для замеров"""
+    with open('knowledge/smpc_database.json', 'r', encoding='utf-8') as f:
+        smpc_database = json.load(f)
+    with open('knowledge/ime_list.json', 'r', encoding='utf-8') as f:
+        ime_list = json.load(f)
+
+    scaled_smpc = {}
+    scaled_ime = []
+    for copy in range(scale):
+        suffix = f' {copy}' if copy else ''
+        for drug_name, drug_info in smpc_database.items():
+            scaled_smpc[drug_name + suffix] = drug_info
+        scaled_ime.extend(term + suffix for term in ime_list['important_medical_events'])
+
+    os.makedirs(os.path.join(target_dir, 'knowledge'))
+    with open(os.path.join(target_dir, 'knowledge', 'smpc_database.json'), 'w', encoding='utf-8') as f:
+        json.dump(scaled_smpc, f, ensure_ascii=False)
+    with open(os.path.join(target_dir, 'knowledge', 'ime_list.json'), 'w', encoding='utf-8') as f:
+        json.dump({'important_medical_events': scaled_ime}, f, ensure_ascii=False)
+
+
+def benchmark_cold_start(runs=5, scale=1):
+    """
+    Сравнивает холодный старт (импорт + создание проверяльщиков) без снимков и со снимками.
+    scale > 1 - замер на базе знаний, увеличенной в scale раз.
+    """
+    import subprocess
+    import sys
+    import tempfile
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def measure(work_dir, enabled):
+        env = dict(os.environ, PV_KB_SNAPSHOT='1' if enabled else '0', PYTHONPATH=repo_root)
+        # Первый запуск со снимками компилирует их, в замер не входит
+        timings = []
+        for _ in range(runs + 1):
+            output = subprocess.run(
+                [sys.executable, '-c', _COLD_START_CODE],
+                cwd=work_dir, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            timings.append(float(output.strip().splitlines()[-1]))
+        return min(timings[1:])
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if scale > 1:
+            _write_scaled_knowledge(work_dir, scale)
+        else:
+            work_dir = os.getcwd()
+        return {'json': measure(work_dir, False), 'snapshot': measure(work_dir, True)}
+
+
+# Компиляция снимков и замер холодного старта
+if __name__ == "__main__":
+    import sys
+
+    print("📦 Компиляция снимков базы знаний:")
+    for filename in compile_all():
+        print(f"   ✅ {SNAPSHOT_DIR}/{filename}")
+
+    if '--benchmark' in sys.argv:
+        scale = int(sys.argv[sys.argv.index('--scale') + 1]) if '--scale' in sys.argv else 1
+        result = benchmark_cold_start(scale=scale)
+        print(f"\n⏱️  Холодный старт (лучшее из 5, база знаний x{scale}):")
+        print(f"   JSON:   {result['json'] * 1000:.1f} мс")
+        print(f"   Снимок: {result['snapshot'] * 1000:.1f} мс")
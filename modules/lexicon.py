@@ -0,0 +1,387 @@
+# modules/lexicon.py
+from bisect import bisect_left
+from collections import deque
+from itertools import accumulate
+
+from modules.fuzzy_index import MAX_DISTANCE, PREFIX_LENGTH, FuzzyIndex, allowed_distance
+from modules.kb_snapshot import load_object_snapshot
+from modules.stemmer import SEPARATOR_RE, STEM_CACHE_SIZE, STEMMER_VERSION, stem, tokenize
+
+
+class AhoCorasick:
+    """
+    Многошаблонный автомат Ахо-Корасик.
+    Находит все вхождения всех шаблонов (включая перекрывающиеся) за один проход по тексту.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.patterns = []
+        self._compiled = False
+
+    def add(self, pattern):
+        """Добавляет шаблон и возвращает его номер"""
+        if self._compiled:
+            raise RuntimeError("Автомат уже скомпилирован")
+
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self._out[state] = self._out[state] + (pattern_id,)
+        return pattern_id
+
+    def compile(self):
+        """
+        Строит суффиксные ссылки и объединяет выходы (обход в ширину),
+        затем таблицу переходов с уже пройденными суффиксными ссылками
+        """
+        queue = deque(self._goto[0].values())
+        order = []
+
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                if fail == next_state:
+                    fail = 0
+
+                self._fail[next_state] = fail
+                self._out[next_state] = self._out[next_state] + self._out[fail]
+
+        # Переходы состояния = переходы его суффиксной ссылки + собственные;
+        # суффиксная ссылка ближе к корню и в порядке обхода уже заполнена.
+        # Переходы в корень не хранятся, поэтому таблица остается разреженной.
+        self._delta = [None] * len(self._goto)
+        self._delta[0] = dict(self._goto[0])
+        for state in order:
+            self._delta[state] = {**self._delta[self._fail[state]], **self._goto[state]}
+
+        self._compiled = True
+        return self
+
+    def iter_matches(self, text):
+        """Возвращает (start, end, pattern_id) для каждого вхождения"""
+        if not self._compiled:
+            self.compile()
+
+        delta = self._delta
+        out = self._out
+        patterns = self.patterns
+
+        state = 0
+        for position, char in enumerate(text):
+            state = delta[state].get(char, 0)
+
+            for pattern_id in out[state]:
+                end = position + 1
+                yield end - len(patterns[pattern_id]), end, pattern_id
+
+
+class LexiconHits:
+    """
+    Результат одного прохода автомата по кейсу.
+    Хранит вхождения с категориями и смещениями в тексте (в нижнем регистре).
+    """
+
+    def __init__(self, text_lower, hits, by_tag, corrections=()):
+        self.text_lower = text_lower
+        self.hits = hits
+        self._by_tag = by_tag
+        # Исправленные опечатки: (start, end, слово текста, слово словаря)
+        self.corrections = corrections
+
+    def has(self, tag):
+        """Есть ли хотя бы одно вхождение термина категории"""
+        return tag in self._by_tag
+
+    def spans(self, tag):
+        """Список (start, end, термин) для категории"""
+        return self._by_tag.get(tag, [])
+
+    def has_in(self, tag, windows):
+        """Есть ли вхождение термина категории внутри одного из окон [(start, end)]"""
+        return any(
+            window_start <= start and end <= window_end
+            for start, end, _ in self._by_tag.get(tag, ())
+            for window_start, window_end in windows
+        )
+
+    def terms(self, tag):
+        """Множество найденных терминов категории"""
+        return {term for _, _, term in self._by_tag.get(tag, [])}
+
+
+def term_patterns(term):
+    """
+    Шаблоны термина в нормализованном тексте (основы слов через пробел, пробел в начале
+    и в конце): внутренние слова термина совпадают с основой слова текста целиком.
+    Последнее слово без окончания (основа 'госпитализ' или 'шок') - начало основы слова
+    текста. Если стеммер отсек окончание (полное слово 'кровь' или основа 'купирова' -
+    без словаря их не различить), шаблонов два: основа целиком ('крови', но не 'кровать')
+    и само слово как начало основы ('купирована'); вместе они находят все формы,
+    в которых термин - начало слова.
+    """
+    words = [word for _, _, word in tokenize(term.lower())]
+    if not words:
+        return []
+    stems = [stem(word) for word in words]
+    head = ' ' + ''.join(word + ' ' for word in stems[:-1])
+    if stems[-1] == words[-1]:
+        return [head + words[-1]]
+    return [head + stems[-1] + ' ', head + words[-1]]
+
+
+class CaseLexicon:
+    """
+    Общий словарь всех проверяльщиков, скомпилированный в один автомат.
+    term_groups: {'категория': [термины]}; один термин может входить в несколько категорий.
+    Термины и текст приводятся к основам слов (modules/stemmer.py), поэтому термин
+    находится в любой словоформе; вхождения возвращаются с исходным термином и
+    смещениями в тексте.
+    fuzzy - исправлять опечатки: незнакомое длинное слово текста заменяется
+    единственным ближайшим словом словаря (modules/fuzzy_index.py).
+    """
+
+    def __init__(self, term_groups, fuzzy=True):
+        self.automaton = AhoCorasick()
+        self._pattern_ids = {}
+        self._terms = []
+        self._lengths = []
+
+        for tag, terms in term_groups.items():
+            for term in terms:
+                term = term.lower()
+                for pattern in term_patterns(term):
+                    pattern_id = self._pattern_ids.get(pattern)
+                    if pattern_id is None:
+                        pattern_id = self.automaton.add(pattern)
+                        self._pattern_ids[pattern] = pattern_id
+                        self._terms.append({})
+                        self._lengths.append(pattern.count(' ', 0, -1))
+                    tags = self._terms[pattern_id].setdefault(term, [])
+                    if tag not in tags:
+                        tags.append(tag)
+
+        self._terms = [
+            tuple((term, tuple(tags)) for term, tags in terms.items()) for terms in self._terms
+        ]
+        self.automaton.compile()
+
+        # Слова шаблонов для нечеткого поиска - основы. Последние слова шаблонов-префиксов
+        # совпадают с началом слова текста; полные формы ('тромбоэмболия' при основе
+        # 'тромбоэмбол') нужны только для этого и исправлением не бывают
+        words, prefixes = set(), set()
+        for pattern in self._pattern_ids:
+            pattern_words = pattern.split()
+            if pattern.endswith(' '):
+                words.update(pattern_words)
+                continue
+            words.update(pattern_words[:-1])
+            prefixes.add(pattern_words[-1])
+            if stem(pattern_words[-1]) == pattern_words[-1]:
+                words.add(pattern_words[-1])
+        self.fuzzy = FuzzyIndex(words) if fuzzy else None
+        self._prefixes = frozenset(prefixes)
+        self._prefix_lengths = tuple(sorted({len(prefix) for prefix in prefixes}))
+        # Исправления основ этого словаря: {основа: исправление}
+        self._corrections = {}
+
+    def __getstate__(self):
+        # Кэш исправлений в снимок не попадает
+        state = self.__dict__.copy()
+        del state['_corrections']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._corrections = {}
+
+    def __len__(self):
+        return len(self.automaton.patterns)
+
+    def known_prefixes(self, word):
+        """Слова шаблонов-префиксов, с которых начинается основа слова текста"""
+        prefixes = self._prefixes
+        found = []
+        for length in self._prefix_lengths:
+            if length > len(word):
+                break
+            if word[:length] in prefixes:
+                found.append(word[:length])
+        return found
+
+    def correct(self, word):
+        """
+        Основа слова текста или ближайшее к ней слово словаря (если оно единственное).
+        Исправление не отменяет уже найденное: слово, начинающееся с префикса словаря,
+        исправляется только в другое слово с тем же началом ('тромбоцитоперн' → 'тромбоцитопен').
+        """
+        limit = allowed_distance(len(word))
+        if not limit or not word.isalpha() or word in self.fuzzy:
+            return word
+        correction = self.fuzzy.best(word, limit)
+        if correction is None:
+            return word
+        prefixes = self.known_prefixes(word)
+        if correction in prefixes or not all(correction.startswith(prefix) for prefix in prefixes):
+            return word
+        return correction
+
+    def _cached_correction(self, word):
+        """correct() с кэшем (не больше STEM_CACHE_SIZE основ, при переполнении кэш очищается)"""
+        correction = self._corrections.get(word)
+        if correction is None:
+            if len(self._corrections) >= STEM_CACHE_SIZE:
+                self._corrections.clear()
+            correction = self._corrections[word] = self.correct(word)
+        return correction
+
+    def normalize(self, text_lower):
+        """
+        Нормализованный текст: основы слов через пробел (с пробелом в начале и в конце).
+        Возвращает (текст, начала основ в нем, начала частей текста, номер части первого слова,
+        исправления [(номер слова, слово словаря)]):
+        слово k занимает в исходном тексте [offsets[first + 2k], offsets[first + 2k + 1]).
+        """
+        # Части текста чередуются: слово, разделитель, слово, ... (крайние слова могут быть пустыми)
+        parts = SEPARATOR_RE.split(text_lower)
+        offsets = list(accumulate(map(len, parts), initial=0))
+        first = 0 if parts[0] else 2
+        last = len(parts) if parts[-1] else len(parts) - 2
+        stems = list(map(stem, parts[first:last:2]))
+
+        corrections = []
+        if self.fuzzy is not None:
+            for index, word in enumerate(stems):
+                correction = self._cached_correction(word)
+                if correction != word:
+                    corrections.append((index, correction))
+                    stems[index] = correction
+
+        positions = list(accumulate(map(len, stems), lambda position, length: position + length + 1,
+                                    initial=1))
+        return ' ' + ' '.join(stems) + ' ', positions, offsets, first, corrections
+
+    def scan(self, text):
+        """Приводит текст к нижнему регистру и основам и находит все термины за один проход"""
+        text_lower = text.lower()
+        normalized, positions, offsets, first_part, corrections = self.normalize(text_lower)
+        hits = []
+        by_tag = {}
+
+        for norm_start, _, pattern_id in self.automaton.iter_matches(normalized):
+            first = first_part + 2 * bisect_left(positions, norm_start + 1)
+            start = offsets[first]
+            end = offsets[first + 2 * self._lengths[pattern_id] - 1]
+            for term, tags in self._terms[pattern_id]:
+                hits.append((start, end, term, tags))
+                for tag in tags:
+                    by_tag.setdefault(tag, []).append((start, end, term))
+
+        corrections = [
+            (offsets[first_part + 2 * index], offsets[first_part + 2 * index + 1],
+             text_lower[offsets[first_part + 2 * index]:offsets[first_part + 2 * index + 1]], word)
+            for index, word in corrections
+        ]
+        return LexiconHits(text_lower, hits, by_tag, corrections)
+
+
+# Группы терминов общего словаря
+LEXICON_GROUPS = ('events', 'ime', 'seriousness', 'causality', 'missing_info')
+
+
+def collect_term_groups(groups=None):
+    """
+    Собирает словари проверяльщиков в один набор категорий.
+    groups - только указанные группы из LEXICON_GROUPS (по умолчанию - все);
+    модули остальных проверяльщиков не импортируются.
+    """
+    groups = LEXICON_GROUPS if groups is None else groups
+    term_groups = {}
+
+    # Импорт внутри функции: модули проверяльщиков сами используют этот модуль
+    if 'events' in groups:
+        from modules.adverse_events import EVENT_LEXICONS
+        for name, events in EVENT_LEXICONS.items():
+            term_groups[f'events.{name}'] = events
+
+    if 'ime' in groups:
+        from modules.ime_checker import RUSSIAN_MAPPINGS
+        term_groups['ime.mapping'] = list(RUSSIAN_MAPPINGS)
+
+    if 'seriousness' in groups:
+        from modules.seriousness_checker import SeriousnessChecker
+        for group, terms in SeriousnessChecker.LEXICON_TERMS.items():
+            term_groups[f'seriousness.{group}'] = terms
+
+    if 'causality' in groups:
+        from modules.causality_checker import CausalityChecker
+        for group, terms in CausalityChecker.LEXICON_TERMS.items():
+            term_groups[f'causality.{group}'] = terms
+
+    if 'missing_info' in groups:
+        from modules.missing_info_checker import MissingInfoChecker
+        for group, terms in MissingInfoChecker.LEXICON_TERMS.items():
+            term_groups[f'missing_info.{group}'] = terms
+
+    return term_groups
+
+
+_lexicons = {}
+
+
+def get_default_lexicon(groups=None):
+    """
+    Возвращает общий словарь (один раз на процесс для каждого набора групп).
+    groups - только нужные группы (например ('ime',) для проверки одного события).
+    Скомпилированный автомат и нечеткий индекс берутся из снимка, пока не изменились
+    списки терминов, правила стеммера и параметры индекса.
+    """
+    groups = LEXICON_GROUPS if groups is None else tuple(
+        group for group in LEXICON_GROUPS if group in groups
+    )
+    lexicon = _lexicons.get(groups)
+    if lexicon is None:
+        term_groups = collect_term_groups(groups)
+        name = 'lexicon' if groups == LEXICON_GROUPS else 'lexicon-' + '-'.join(groups)
+        key = {'terms': term_groups, 'stemmer': STEMMER_VERSION, 'fuzzy': [MAX_DISTANCE, PREFIX_LENGTH]}
+        lexicon = load_object_snapshot(name, key, lambda: CaseLexicon(term_groups))
+        _lexicons[groups] = lexicon
+    return lexicon
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    # Словарь берется из модуля, а не из __main__, чтобы снимок читался и из других процессов
+    from modules.lexicon import get_default_lexicon
+
+    lexicon = get_default_lexicon()
+
+    print("🧪 Тестирование общего словаря:")
+    print("=" * 50)
+    print(f"Терминов в автомате: {len(lexicon)}")
+
+    test_text = "Пациентка госпитализирована с анафилактическим шоком, препарат отменен, сыпь исчезла."
+    hits = lexicon.scan(test_text)
+
+    print(f"Текст: {test_text}")
+    for start, end, term, tags in hits.hits:
+        print(f"   [{start}:{end}] '{term}' → {', '.join(tags)}")
@@ -1,47 +1,77 @@
 # modules/missing_info_checker.py
 import re
 from datetime import datetime
+from modules.lexicon import get_default_lexicon
+from modules.results import MissingField, MissingInfoResult
 
 class MissingInfoChecker:
-    def check_missing_information(self, text, adverse_event):
+    # Термины для общего словаря (modules/lexicon.py)
+    LEXICON_TERMS = {
+        'patient_gender': ['пациентка', 'женщина', 'девушка', 'девочка', 'мужчина', 'муж', 'юноша'],
+        'drug_name': ['препарат', 'лекарств', 'таблет', 'капсул', 'инъекц', 'введение'],
+        'event_start': ['начал', 'появ', 'возник', 'развит'],
+        'event_end': ['закончил', 'прекратил', 'исчез', 'прошл', 'купирова', 'нормализова'],
+        'outcome': [
+            'выздоровел', 'улучшил', 'нормализовал', 'исчезл', 'прошл',
+            'ухудшил', 'осложнил', 'госпитализирован', 'умер', 'скончал'
+        ],
+        'dechallenge': ['отмен', 'прекратил', 'перестал', 'отменил'],
+        'dechallenge_outcome': ['улучшил', 'исчезл', 'прошл', 'сохранил', 'ухудшил'],
+        'rechallenge': ['повторно', 'снова', 'рецидив', 'возобновил', 'вновь'],
+        'lab_data': [
+            'анализ', 'лабораторн', 'кровь', 'моч', 'биохими', 'гемоглобин',
+            'лейкоцит', 'тромбоцит', 'алт', 'аст', 'креатинин'
+        ],
+        'concomitant_drugs': [
+            'одновременно', 'сопутствующ', 'также принимал', 'другие препарат',
+            'комбинац', 'сочетан'
+        ],
+        'medical_history': [
+            'анамнез', 'сопутствующ', 'хроническ', 'страдает', 'болеет',
+            'в анамнезе', 'история болезн'
+        ],
+        'event_severity': [
+            'легк', 'средн', 'тяжел', 'крайне тяжел', 'умерен',
+            'интенсивн', 'выражен'
+        ]
+    }
+
+    def check_missing_information(self, text, adverse_event, hits=None):
         """
         Проверяет, какая информация отсутствует в кейсе
-        Возвращает: {'missing_info': ['пункт1', 'пункт2'], 'questions': ['вопрос1', 'вопрос2']}
+        Возвращает MissingInfoResult; по ключам - прежний формат
+        {'missing_info': ['пункт1', 'пункт2'], 'questions': ['вопрос1', 'вопрос2'], ...}
         """
-        text_lower = text.lower()
-        
-        # Проверяем наличие ключевой информации
-        checks = {
-            'patient_age': self._check_patient_age(text_lower),
-            'patient_gender': self._check_patient_gender(text_lower),
-            'drug_name': self._check_drug_name(text_lower),
-            'drug_dose': self._check_drug_dose(text_lower),
-            'event_start_date': self._check_event_start_date(text_lower),
-            'event_end_date': self._check_event_end_date(text_lower),
-            'time_to_onset': self._check_time_to_onset(text_lower),
-            'outcome': self._check_outcome(text_lower, adverse_event),
-            'dechallenge_result': self._check_dechallenge_result(text_lower),
-            'rechallenge_info': self._check_rechallenge_info(text_lower),
-            'lab_data': self._check_lab_data(text_lower),
-            'concomitant_drugs': self._check_concomitant_drugs(text_lower),
-            'medical_history': self._check_medical_history(text_lower),
-            'event_severity': self._check_event_severity(text_lower)
-        }
-        
-        missing_info = []
-        questions = []
-        
-        for info_type, is_present in checks.items():
-            if not is_present['present']:
-                missing_info.append(info_type)
-                questions.append(is_present['question'])
-        
-        return {
-            'missing_info': missing_info,
-            'questions': questions,
-            'completeness_score': self._calculate_completeness_score(checks),
-            'critical_missing': self._identify_critical_missing(missing_info)
-        }
+        if hits is None:
+            hits = get_default_lexicon(('missing_info',)).scan(text)
+        text_lower = hits.text_lower
+        
+        # Проверяем наличие ключевой информации (порядок - как в MissingField)
+        checks = (
+            (MissingField.PATIENT_AGE, self._check_patient_age(text_lower)),
+            (MissingField.PATIENT_GENDER, self._check_patient_gender(hits)),
+            (MissingField.DRUG_NAME, self._check_drug_name(hits)),
+            (MissingField.DRUG_DOSE, self._check_drug_dose(text_lower)),
+            (MissingField.EVENT_START_DATE, self._check_event_start_date(text_lower, hits)),
+            (MissingField.EVENT_END_DATE, self._check_event_end_date(hits)),
+            (MissingField.TIME_TO_ONSET, self._check_time_to_onset(text_lower)),
+            (MissingField.OUTCOME, self._check_outcome(hits)),
+            (MissingField.DECHALLENGE_RESULT, self._check_dechallenge_result(hits)),
+            (MissingField.RECHALLENGE_INFO, self._check_rechallenge_info(hits)),
+            (MissingField.LAB_DATA, self._check_lab_data(hits)),
+            (MissingField.CONCOMITANT_DRUGS, self._check_concomitant_drugs(hits)),
+            (MissingField.MEDICAL_HISTORY, self._check_medical_history(hits)),
+            (MissingField.EVENT_SEVERITY, self._check_event_severity(hits))
+        )
+        
+        missing = tuple(field for field, is_present in checks if not is_present)
+        
+        return MissingInfoResult(
+            missing,
+            self._calculate_completeness_score(checks),
+            # Если есть серьезное событие, но нет исхода - вопрос об исходе серьезного явления
+            serious_outcome=MissingField.OUTCOME in missing and self._is_serious_event(adverse_event)
+        )
     
     def _check_patient_age(self, text):
         """Проверяет наличие возраста пациента"""
@@ -54,36 +84,17 @@ class MissingInfoChecker:
         
         for pattern in age_patterns:
             if re.search(pattern, text):
-                return {'present': True, 'question': ''}
+                return True
         
-        return {
-            'present': False, 
-            'question': 'Какой возраст пациента?'
-        }
+        return False
     
-    def _check_patient_gender(self, text):
+    def _check_patient_gender(self, hits):
         """Проверяет наличие пола пациента"""
-        gender_indicators = ['пациентка', 'женщина', 'девушка', 'девочка', 'мужчина', 'муж', 'юноша']
-        
-        if any(indicator in text for indicator in gender_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Какой пол пациента?'
-        }
+        return hits.has('missing_info.patient_gender')
     
-    def _check_drug_name(self, text):
+    def _check_drug_name(self, hits):
         """Проверяет наличие названия препарата"""
-        drug_indicators = ['препарат', 'лекарств', 'таблет', 'капсул', 'инъекц', 'введение']
-        
-        if any(indicator in text for indicator in drug_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Какой препарат принимал пациент?'
-        }
+        return hits.has('missing_info.drug_name')
     
     def _check_drug_dose(self, text):
         """Проверяет наличие дозировки препарата"""
@@ -98,14 +109,11 @@ class MissingInfoChecker:
         
         for pattern in dose_patterns:
             if re.search(pattern, text):
-                return {'present': True, 'question': ''}
+                return True
         
-        return {
-            'present': False,
-            'question': 'Какая дозировка препарата?'
-        }
+        return False
     
-    def _check_event_start_date(self, text):
+    def _check_event_start_date(self, text, hits):
         """Проверяет наличие даты начала события"""
         date_patterns = [
             r'\d{1,2}\.\d{1,2}\.\d{4}',
@@ -114,30 +122,14 @@ class MissingInfoChecker:
             r'начал[оа]\s*\d'
         ]
         
-        start_indicators = ['начал', 'появ', 'возник', 'развит']
-        
         has_date = any(re.search(pattern, text) for pattern in date_patterns)
-        has_start_indicator = any(indicator in text for indicator in start_indicators)
-        
-        if has_date and has_start_indicator:
-            return {'present': True, 'question': ''}
+        has_start_indicator = hits.has('missing_info.event_start')
         
-        return {
-            'present': False,
-            'question': 'Когда началось нежелательное явление?'
-        }
+        return has_date and has_start_indicator
     
-    def _check_event_end_date(self, text):
+    def _check_event_end_date(self, hits):
         """Проверяет наличие даты окончания события"""
-        end_indicators = ['закончил', 'прекратил', 'исчез', 'прошл', 'купирова', 'нормализова']
-        
-        if any(indicator in text for indicator in end_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Когда закончилось нежелательное явление?'
-        }
+        return hits.has('missing_info.event_end')
     
     def _check_time_to_onset(self, text):
         """Проверяет наличие времени до начала события"""
@@ -149,142 +141,55 @@ class MissingInfoChecker:
         
         for pattern in time_patterns:
             if re.search(pattern, text):
-                return {'present': True, 'question': ''}
+                return True
         
-        return {
-            'present': False,
-            'question': 'Через сколько времени после приема препарата началось явление?'
-        }
+        return False
     
-    def _check_outcome(self, text, adverse_event):
+    def _check_outcome(self, hits):
         """Проверяет наличие исхода события"""
-        outcome_indicators = [
-            'выздоровел', 'улучшил', 'нормализовал', 'исчезл', 'прошл',
-            'ухудшил', 'осложнил', 'госпитализирован', 'умер', 'скончал'
-        ]
-        
-        # Если есть серьезное событие, но нет исхода - это критично
+        return hits.has('missing_info.outcome')
+    
+    def _is_serious_event(self, adverse_event):
+        """Серьезное ли само явление (для вопроса об исходе)"""
         serious_events = ['смерть', 'летальн', 'погиб', 'умер', 'скончал']
-        is_serious = any(event in adverse_event for event in serious_events)
-        
-        has_outcome = any(indicator in text for indicator in outcome_indicators)
-        
-        if has_outcome:
-            return {'present': True, 'question': ''}
-        
-        if is_serious:
-            return {
-                'present': False,
-                'question': 'Каков был исход серьезного нежелательного явления?'
-            }
-        else:
-            return {
-                'present': False,
-                'question': 'Каков был исход нежелательного явления?'
-            }
+        return any(event in adverse_event for event in serious_events)
     
-    def _check_dechallenge_result(self, text):
+    def _check_dechallenge_result(self, hits):
         """Проверяет наличие информации об отмене препарата"""
-        dechallenge_indicators = ['отмен', 'прекратил', 'перестал', 'отменил']
-        outcome_indicators = ['улучшил', 'исчезл', 'прошл', 'сохранил', 'ухудшил']
-        
-        has_dechallenge = any(indicator in text for indicator in dechallenge_indicators)
-        has_outcome = any(indicator in text for indicator in outcome_indicators)
+        has_dechallenge = hits.has('missing_info.dechallenge')
+        has_outcome = hits.has('missing_info.dechallenge_outcome')
         
         if has_dechallenge and has_outcome:
-            return {'present': True, 'question': ''}
+            return True
         
-        return {
-            'present': False,
-            'question': 'Что произошло после отмены препарата?'
-        }
+        return False
     
-    def _check_rechallenge_info(self, text):
+    def _check_rechallenge_info(self, hits):
         """Проверяет наличие информации о повторном назначении"""
-        rechallenge_indicators = ['повторно', 'снова', 'рецидив', 'возобновил', 'вновь']
-        
-        if any(indicator in text for indicator in rechallenge_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Было ли повторное назначение препарата?'
-        }
+        return hits.has('missing_info.rechallenge')
     
-    def _check_lab_data(self, text):
+    def _check_lab_data(self, hits):
         """Проверяет наличие лабораторных данных"""
-        lab_indicators = [
-            'анализ', 'лабораторн', 'кровь', 'моч', 'биохими', 'гемоглобин',
-            'лейкоцит', 'тромбоцит', 'алт', 'аст', 'креатинин'
-        ]
-        
-        if any(indicator in text for indicator in lab_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Есть ли данные лабораторных исследований?'
-        }
+        return hits.has('missing_info.lab_data')
     
-    def _check_concomitant_drugs(self, text):
+    def _check_concomitant_drugs(self, hits):
         """Проверяет наличие информации о сопутствующих препаратах"""
-        concomitant_indicators = [
-            'одновременно', 'сопутствующ', 'также принимал', 'другие препарат',
-            'комбинац', 'сочетан'
-        ]
-        
-        if any(indicator in text for indicator in concomitant_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Принимал ли пациент другие препараты одновременно?'
-        }
+        return hits.has('missing_info.concomitant_drugs')
     
-    def _check_medical_history(self, text):
+    def _check_medical_history(self, hits):
         """Проверяет наличие информации о сопутствующих заболеваниях"""
-        history_indicators = [
-            'анамнез', 'сопутствующ', 'хроническ', 'страдает', 'болеет',
-            'в анамнезе', 'история болезн'
-        ]
-        
-        if any(indicator in text for indicator in history_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Есть ли у пациента сопутствующие заболевания?'
-        }
+        return hits.has('missing_info.medical_history')
     
-    def _check_event_severity(self, text):
+    def _check_event_severity(self, hits):
         """Проверяет наличие информации о тяжести события"""
-        severity_indicators = [
-            'легк', 'средн', 'тяжел', 'крайне тяжел', 'умерен',
-            'интенсивн', 'выражен'
-        ]
-        
-        if any(indicator in text for indicator in severity_indicators):
-            return {'present': True, 'question': ''}
-        
-        return {
-            'present': False,
-            'question': 'Какова тяжесть нежелательного явления?'
-        }
+        return hits.has('missing_info.event_severity')
     
     def _calculate_completeness_score(self, checks):
         """Рассчитывает оценку полноты информации"""
         total_checks = len(checks)
-        present_checks = sum(1 for check in checks.values() if check['present'])
+        present_checks = sum(1 for _, is_present in checks if is_present)
         
         return round((present_checks / total_checks) * 100, 1)
-    
-    def _identify_critical_missing(self, missing_info):
-        """Определяет критически важную отсутствующую информацию"""
-        critical_info = [
-            'drug_name', 'outcome', 'event_start_date', 'dechallenge_result'
-        ]
-        
-        return [info for info in missing_info if info in critical_info]
 
 # Тестирование модуля
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+# modules/narrative_generator.py
+import json
+import random
+
+from modules.adverse_events import COMMON_EVENTS
+from modules.causality_checker import CausalityChecker
+from modules.ime_checker import RUSSIAN_MAPPINGS
+from modules.missing_info_checker import MissingInfoChecker
+from modules.seriousness_checker import SeriousnessChecker
+
+# Шаблоны предложений синтетического сообщения о нежелательной реакции (ICSR).
+# Словарь берется из проверяльщиков и базы знаний, поэтому сгенерированные тексты
+# задействуют те же ветви кода, что и настоящие кейсы.
+HEADER_TEMPLATES = [
+    "В Департамент безопасности лекарственных средств поступило сообщение о побочном эффекте "
+    "на препарат {drug} ({route}).",
+    "Поступило спонтанное сообщение о нежелательной реакции на препарат {drug} ({route}).",
+]
+
+PATIENT_TEMPLATES = [
+    "Пациентка – женщина, {age} лет.",
+    "Пациент – мужчина, {age} лет.",
+    "Пациент {age} лет, пол не указан.",
+]
+
+DRUG_TEMPLATES = [
+    "Дата начала применения препарата – {start}. Доза {dose} мг.",
+    "Препарат назначен {start} в дозе {dose} мг.",
+]
+
+EVENT_TEMPLATES = [
+    "На {day}-й день терапии развилось нежелательное явление: {event}.",
+    "Через {day} дней после начала применения возникло явление: {event}.",
+    "Отмечено {event}, {severity} степени тяжести.",
+    "Побочный эффект (ПЭ) – {event}.",
+]
+
+FILLER_TEMPLATES = [
+    "Данные лабораторных анализов: {lab} в пределах нормы.",
+    "В анамнезе {history}.",
+    "Сопутствующая терапия: {concomitant}.",
+    "Пациенту оказана медицинская помощь, проводилось наблюдение.",
+    "Действия с препаратом – {action}.",
+    "Исход ПЭ – {outcome}.",
+    "Медицинский работник оценил связь с препаратом как возможную.",
+]
+
+ROUTES = ['внутривенное введение', 'таблетки', 'подкожные инъекции', 'капсулы']
+SEVERITIES = ['легкой', 'средней', 'тяжелой', 'крайне тяжелой']
+LAB_TERMS = ['гемоглобин', 'лейкоциты', 'тромбоциты', 'АЛТ', 'АСТ', 'креатинин']
+HISTORY = ['хроническая сердечная недостаточность', 'сахарный диабет 2 типа',
+           'артериальная гипертензия', 'аллергия не отмечена']
+CONCOMITANT = ['одновременно принимал метформин', 'сопутствующих препаратов нет',
+               'также принимал аспирин', 'комбинация с омепразолом']
+ACTIONS = ['препарат отменен', 'введение препарата прекращено', 'доза не изменялась',
+           'после отмены препарата симптомы исчезли', 'препарат повторно назначен, рецидив']
+OUTCOMES = ['выздоровление', 'улучшение состояния пациента', 'состояние ухудшилось',
+            'пациент скончался', 'госпитализирован, без изменений']
+
+
+class NarrativeGenerator:
+    """
+    Генератор синтетических русскоязычных описаний кейсов фармаконадзора.
+    target_chars - примерная длина текста; event_density - явлений на 1000 символов.
+    При одинаковом seed генерирует одинаковые тексты.
+    """
+
+    def __init__(self, seed=0, smpc_path='knowledge/smpc_database.json'):
+        self.random = random.Random(seed)
+
+        with open(smpc_path, 'r', encoding='utf-8') as f:
+            smpc_database = json.load(f)
+        self.drugs = {
+            drug.lower(): [effect.lower() for effect in info.get('expected_effects', {})]
+            for drug, info in smpc_database.items()
+        }
+
+        self.events = sorted(set(COMMON_EVENTS) | set(RUSSIAN_MAPPINGS))
+        self.seriousness_words = [word for words in SeriousnessChecker.SERIOUSNESS_WORDS.values()
+                                  for word in words if len(word) > 4]
+        self.keyword_groups = {**CausalityChecker.LEXICON_TERMS, **MissingInfoChecker.LEXICON_TERMS}
+
+    def _date(self):
+        return f"{self.random.randint(1, 28):02d}.{self.random.randint(1, 12):02d}.2025"
+
+    def _event(self, drug):
+        """Явление: из ИМП препарата (ожидаемое), из словаря IME или из общего списка"""
+        expected = self.drugs.get(drug)
+        if expected and self.random.random() < 0.4:
+            return self.random.choice(expected)
+        return self.random.choice(self.events)
+
+    def _event_sentence(self, drug):
+        return self.random.choice(EVENT_TEMPLATES).format(
+            event=self._event(drug),
+            day=self.random.randint(1, 30),
+            severity=self.random.choice(SEVERITIES)
+        )
+
+    def _filler_sentence(self):
+        sentence = self.random.choice(FILLER_TEMPLATES).format(
+            lab=self.random.choice(LAB_TERMS),
+            history=self.random.choice(HISTORY),
+            concomitant=self.random.choice(CONCOMITANT),
+            action=self.random.choice(ACTIONS),
+            outcome=self.random.choice(OUTCOMES)
+        )
+        if self.random.random() < 0.05:
+            sentence += f" Отмечено: {self.random.choice(self.seriousness_words)}."
+        if self.random.random() < 0.3:
+            group = self.random.choice(list(self.keyword_groups))
+            sentence += f" Комментарий ({self.random.choice(self.keyword_groups[group])})."
+        return sentence
+
+    def generate(self, target_chars=3000, event_density=2.0):
+        """Генерирует один текст кейса"""
+        drug = self.random.choice(list(self.drugs))
+        sentences = [
+            self.random.choice(HEADER_TEMPLATES).format(drug=drug, route=self.random.choice(ROUTES)),
+            self.random.choice(PATIENT_TEMPLATES).format(age=self.random.randint(18, 85)),
+            self.random.choice(DRUG_TEMPLATES).format(start=self._date(),
+                                                      dose=self.random.choice([5, 10, 50, 200, 400])),
+            self._event_sentence(drug),
+        ]
+        length = sum(len(sentence) + 1 for sentence in sentences)
+        events = 1
+
+        while length < target_chars:
+            # Поддерживаем заданную плотность явлений по мере роста текста
+            if events < event_density * length / 1000:
+                sentence = self._event_sentence(drug)
+                events += 1
+            else:
+                sentence = self._filler_sentence()
+            sentences.append(sentence)
+            length += len(sentence) + 1
+
+        return '\n'.join(sentences)
+
+    def generate_corpus(self, count, target_chars=3000, event_density=2.0, id_prefix='synthetic'):
+        """Генерирует count кейсов в формате {'case_id', 'text'}"""
+        for number in range(1, count + 1):
+            yield {
+                'case_id': f'{id_prefix}-{number:06d}',
+                'text': self.generate(target_chars, event_density)
+            }
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    generator = NarrativeGenerator(seed=42)
+
+    print("🧪 Тестирование генератора описаний кейсов:")
+    print("=" * 50)
+    text = generator.generate(target_chars=800, event_density=4)
+    print(text)
+    print(f"\nДлина: {len(text)} символов")
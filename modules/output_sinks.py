@@ -0,0 +1,404 @@
+# modules/output_sinks.py
+import csv
+import json
+import queue
+import sys
+import threading
+
+# Отображения результатов отделены от анализа: анализ строит отчет по кейсу
+# (case_report - обычные данные, которые можно передать в поток или процесс),
+# отображение превращает его в текст. Текст копится в буфере и пишется в поток
+# крупными блоками, а не сотнями print() на кейс.
+
+# Размер буфера отображения, символов (0 - писать после каждого кейса)
+BUFFER_SIZE = 1 << 20
+
+# Отчетов в очереди фонового отображения: анализ не убегает далеко вперед
+MAX_PENDING = 256
+
+
+class Colors:
+    GREEN = '\033[92m'
+    BLUE = '\033[94m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    PURPLE = '\033[95m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def case_report(case_id, context, title=None):
+    """
+    Отчет по кейсу для отображений:
+    'result' - компактный результат (как у batch.py), остальное - подробности для
+    текстовых отображений (только выбранные проверки).
+    """
+    checks = context.analyzer.checks
+    result = {'case_id': case_id}
+    result.update(context.summary())
+    return {
+        'result': result,
+        'title': title or f"КЕЙС {case_id}",
+        'text': context.text,
+        'checks': checks,
+        'events': context.adverse_events,
+        'missing_info': context.missing_info if 'missing_info' in checks else None,
+        'event_results': context.evaluate_events()
+    }
+
+
+class OutputSink:
+    """
+    Основа отображений: write() копит текст, в поток он уходит блоками по buffer_size.
+    write_note() - служебный текст (заголовки, итоги): выводят только текстовые отображения.
+    owns_stream - close() закрывает и поток (файл, открытый для этого отображения).
+    """
+
+    def __init__(self, stream=None, buffer_size=BUFFER_SIZE):
+        self.stream = sys.stdout if stream is None else stream
+        self.buffer_size = buffer_size
+        self.owns_stream = False
+        self.cases = 0
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+
+    def write_line(self, line=''):
+        self.write(line)
+        self.write('\n')
+
+    def write_note(self, text):
+        pass
+
+    def write_case(self, report):
+        self.render(report)
+        self.cases += 1
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def render(self, report):
+        raise NotImplementedError
+
+    def flush(self):
+        if self._parts:
+            self.stream.write(''.join(self._parts))
+            self._parts = []
+            self._size = 0
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.owns_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+class PrettySink(OutputSink):
+    """Текстовый отчет для терминала (как в main.py)"""
+
+    def write_note(self, text):
+        self.write_line(text)
+
+    def render(self, report):
+        checks = report['checks']
+        write = self.write_line
+
+        write(f"\n{'=' * 70}")
+        write(f"📋 {report['title']}:")
+        write(f"📄 Текст: {report['text']}")
+        write(f"🔍 Выявленные события: {', '.join(report['events'])}")
+
+        if 'missing_info' in checks:
+            missing_info = report['missing_info']
+            write(f"📊 Полнота информации: {missing_info['completeness_score']}%")
+            if missing_info['missing_info']:
+                write("❌ Отсутствует информация:")
+                for question in missing_info['questions']:
+                    write(f"   - {question}")
+
+        for event_result in report['event_results']:
+            write(f"\n   📍 Анализ события: '{event_result['event'].upper()}'")
+
+            if 'seriousness' in event_result:
+                seriousness = event_result['seriousness']
+                status = "🔴 СЕРЬЕЗНЫЙ" if seriousness['is_serious'] else "🟢 НЕ серьезный"
+                write(f"   ⚠️  Серьезность: {status}")
+                if seriousness['flags']:
+                    write(f"      Причины: {', '.join(seriousness['flags'])}")
+
+            if 'ime' in event_result:
+                ime = event_result['ime']
+                status = "🔴 ЗНАЧИМЫЙ" if ime['is_significant'] else "🟢 НЕ значимый"
+                write(f"   🏥 IME значимость: {status}")
+                for term in ime['found_terms']:
+                    write(f"      Найден IME: '{term['russian']}' → {term['english']}")
+
+            if 'expectedness' in event_result:
+                expectedness = event_result['expectedness']
+                status = "🟢 ПРЕДВИДЕННЫЙ" if expectedness['is_expected'] else "🔴 НЕПРЕДВИДЕННЫЙ"
+                write(f"   📋 Предвиденность: {status}")
+                write(f"      Препарат: {expectedness['drug']}")
+                write(f"      Причина: {expectedness['reason']}")
+                if 'frequency' in expectedness:
+                    write(f"      Частота: {expectedness['frequency']}")
+
+            if 'causality' in event_result:
+                causality = event_result['causality']
+                write(f"   🔗 Причинность: {causality['level']}")
+                write(f"      Обоснование: {causality['reasoning']}")
+
+
+class ColorSink(OutputSink):
+    """Цветной отчет для терминала (как в run_beautiful.py; нужны все проверки)"""
+
+    def write_note(self, text):
+        self.write_line(text)
+
+    def render(self, report):
+        write = self.write_line
+        C = Colors
+
+        write(f"{C.CYAN}{C.BOLD}┌──────────────── {report['title']} ────────────────┐{C.END}")
+        write(f"{C.YELLOW}📄 {report['text']}{C.END}")
+        write(f"{C.BLUE}🔍 События: {', '.join(report['events'])}{C.END}")
+
+        missing_info = report['missing_info']
+        score = missing_info['completeness_score']
+        score_color = C.GREEN if score > 70 else C.YELLOW if score > 40 else C.RED
+        write(f"{C.PURPLE}📊 Полнота данных: {score_color}{score}%{C.END}")
+        if missing_info['missing_info']:
+            write(f"{C.YELLOW}💡 Рекомендуется уточнить:{C.END}")
+            for question in missing_info['questions'][:2]:
+                write(f"   • {question}")
+
+        for event_result in report['event_results']:
+            write(f"\n{C.GREEN}{C.BOLD}📋 Анализ: {event_result['event'].upper()}{C.END}")
+
+            seriousness = event_result['seriousness']
+            icon, color = ("🔴", C.RED) if seriousness['is_serious'] else ("🟢", C.GREEN)
+            write(f"   {icon} {color}Серьезность: {seriousness['is_serious']}{C.END}")
+            if seriousness['flags']:
+                write(f"      {C.YELLOW}Факторы: {', '.join(seriousness['flags'])}{C.END}")
+
+            ime = event_result['ime']
+            icon, color = ("🔴", C.RED) if ime['is_significant'] else ("🟢", C.GREEN)
+            write(f"   {icon} {color}IME значимость: {ime['is_significant']}{C.END}")
+            for term in ime['found_terms']:
+                write(f"      {C.BLUE}🏷️  {term['russian']} → {term['english']}{C.END}")
+
+            expectedness = event_result['expectedness']
+            icon, color = ("🟢", C.GREEN) if expectedness['is_expected'] else ("🔴", C.RED)
+            write(f"   {icon} {color}Предвиденность: {expectedness['is_expected']}{C.END}")
+            write(f"      {C.CYAN}💊 {expectedness['drug']}{C.END}")
+            write(f"      {C.PURPLE}📝 {expectedness['reason']}{C.END}")
+
+            causality = event_result['causality']
+            level = causality['level']
+            color = C.RED if "Определенная" in level else C.YELLOW if "Вероятная" in level else C.BLUE
+            write(f"   🔗 {color}Причинность: {level}{C.END}")
+            write(f"      {C.CYAN}💭 {causality['reasoning']}{C.END}")
+
+        write(f"{C.CYAN}{C.BOLD}└──────────────────────────────────────────┘{C.END}\n")
+
+
+class JsonSink(OutputSink):
+    """Компактный JSON: одна строка на кейс (как main.py --jsonl)"""
+
+    def render(self, report):
+        self.write(json.dumps(report['result'], ensure_ascii=False, separators=(',', ':')))
+        self.write('\n')
+
+
+class CsvSink(OutputSink):
+    """
+    CSV: одна строка на событие кейса (кейс без событий - одна строка с пустым событием).
+    Списки (критерии серьезности, IME) - через '|'; столбцы отсутствующих проверок пусты.
+    """
+
+    COLUMNS = ('case_id', 'drug', 'is_serious', 'seriousness_flags', 'completeness_score',
+               'event', 'ime', 'is_expected', 'expectedness_reason', 'causality', 'error')
+
+    def __init__(self, stream=None, buffer_size=BUFFER_SIZE):
+        super().__init__(stream, buffer_size)
+        # csv пишет в этот же объект (метод write) - строки попадают в общий буфер
+        self._writer = csv.writer(self, lineterminator='\n')
+        self._writer.writerow(self.COLUMNS)
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, list):
+            return '|'.join(value)
+        return value
+
+    def render(self, report):
+        result = report['result']
+        case_cells = [self._cell(result.get(column)) for column in self.COLUMNS[:5]]
+        error = self._cell(result.get('error'))
+        for event in result.get('events') or [{}]:
+            event_cells = [self._cell(event.get(column)) for column in self.COLUMNS[5:10]]
+            self._writer.writerow(case_cells + event_cells + [error])
+
+
+class NullSink(OutputSink):
+    """Ничего не выводит (замеры анализа без затрат на вывод)"""
+
+    def write(self, text):
+        pass
+
+    def render(self, report):
+        pass
+
+
+SINKS = {
+    'pretty': PrettySink,
+    'color': ColorSink,
+    'json': JsonSink,
+    'csv': CsvSink,
+    'null': NullSink,
+}
+
+# Отображения, которым нужны подробности кейса (не только компактный результат)
+DETAILED_SINKS = ('pretty', 'color')
+
+
+def open_sink(name, stream=None, buffer_size=BUFFER_SIZE):
+    """Отображение по имени ('pretty', 'color', 'json', 'csv', 'null'); неизвестное - ValueError"""
+    try:
+        sink_class = SINKS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный формат вывода: {name}; доступны: {', '.join(SINKS)}")
+    return sink_class(stream, buffer_size)
+
+
+def _open_output(name, path, buffer_size):
+    """Отображение в файл path (закрывается вместе с отображением) или в stdout"""
+    if not path:
+        return open_sink(name, None, buffer_size)
+    sink = open_sink(name, open(path, 'w', encoding='utf-8'), buffer_size)
+    sink.owns_stream = True
+    return sink
+
+
+def _render_loop(pending, name, path, buffer_size):
+    """Фоновое отображение: вызовы (метод, аргумент) из очереди до None"""
+    with _open_output(name, path, buffer_size) as sink:
+        for method, argument in iter(pending.get, None):
+            getattr(sink, method)(argument)
+
+
+class BackgroundSink:
+    """
+    Отображение в отдельном потоке (process=False) или процессе (process=True):
+    анализ только кладет отчеты в очередь, форматирование и вывод идут параллельно.
+    path - файл вывода (по умолчанию stdout). Отчеты передаются процессу через pickle.
+    """
+
+    def __init__(self, name, path=None, process=False, buffer_size=BUFFER_SIZE,
+                 max_pending=MAX_PENDING):
+        open_sink(name, None, buffer_size)  # неизвестное имя - ошибка сразу, а не в фоне
+        if process:
+            import multiprocessing
+
+            sys.stdout.flush()
+            self._pending = multiprocessing.Queue(max_pending)
+            self._worker = multiprocessing.Process(target=_render_loop, daemon=True,
+                                                   args=(self._pending, name, path, buffer_size))
+        else:
+            self._pending = queue.Queue(max_pending)
+            self._worker = threading.Thread(target=_render_loop, daemon=True,
+                                            args=(self._pending, name, path, buffer_size))
+        self.cases = 0
+        self._worker.start()
+
+    def write_note(self, text):
+        self._pending.put(('write_note', text))
+
+    def write_case(self, report):
+        self._pending.put(('write_case', report))
+        self.cases += 1
+
+    def close(self):
+        self._pending.put(None)
+        self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def create_sink(name, path=None, renderer='inline', buffer_size=BUFFER_SIZE):
+    """
+    Отображение для командной строки.
+    renderer: 'inline' - в том же потоке, 'thread' / 'process' - в фоне (BackgroundSink).
+    path - файл вывода (по умолчанию stdout).
+    """
+    if renderer != 'inline':
+        return BackgroundSink(name, path, process=renderer == 'process', buffer_size=buffer_size)
+    return _open_output(name, path, buffer_size)
+
+
+# Тестирование модуля: вывод через print() против буферизованных отображений
+if __name__ == "__main__":
+    import io
+    import os
+    import time
+    from contextlib import redirect_stdout
+
+    from modules.case_context import CaseAnalyzer
+    from modules.narrative_generator import NarrativeGenerator
+
+    analyzer = CaseAnalyzer()
+    corpus = list(NarrativeGenerator(seed=7).generate_corpus(300, 1500))
+    reports = [case_report(case['case_id'], analyzer.context(case['text'])) for case in corpus]
+
+    print("🧪 Тестирование отображений:")
+    print("=" * 50)
+    sample = io.StringIO()
+    with JsonSink(sample) as sink:
+        sink.write_case(reports[0])
+    print(f"JSON: {sample.getvalue()[:120]}…")
+    sample = io.StringIO()
+    with CsvSink(sample) as sink:
+        sink.write_case(reports[0])
+    print("CSV:\n" + sample.getvalue())
+
+    with open(os.devnull, 'w', encoding='utf-8', buffering=1) as devnull:
+        # Как раньше: print() на каждую строку (строки сформированы заранее - в пользу print)
+        rendered = []
+        for report in reports:
+            text = io.StringIO()
+            with PrettySink(text) as sink:
+                sink.write_case(report)
+            rendered.append(text.getvalue().split('\n'))
+        started = time.perf_counter()
+        with redirect_stdout(devnull):
+            for lines in rendered:
+                for line in lines:
+                    print(line)
+        print_elapsed = time.perf_counter() - started
+
+        timings = {}
+        for name in ('pretty', 'json', 'csv', 'null'):
+            started = time.perf_counter()
+            with open_sink(name, devnull) as sink:
+                for report in reports:
+                    sink.write_case(report)
+            timings[name] = time.perf_counter() - started
+
+    print(f"{len(reports)} кейсов в {os.devnull}:")
+    print(f"   print() по строкам: {print_elapsed * 1000:.1f} мс")
+    for name, elapsed in timings.items():
+        print(f"   {name:<6} буфер {BUFFER_SIZE >> 10} КБ: {elapsed * 1000:.1f} мс")
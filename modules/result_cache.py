@@ -0,0 +1,173 @@
+# modules/result_cache.py
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from modules.case_context import CaseContext
+from modules.kb_snapshot import knowledge_fingerprint
+
+
+def normalize_case_text(text):
+    """
+    Нормализует текст кейса для ключа кэша: крайние пробелы и окончания строк
+    на результат не влияют. Регистр сохраняется - границы предложений
+    (modules/segmenter.py) зависят от заглавных букв.
+    """
+    return text.strip().replace('\r\n', '\n')
+
+
+class ResultCache:
+    """
+    Кэш результатов по содержимому кейса.
+    Ключ - sha256 нормализованного текста, отпечатка базы знаний и варианта анализа
+    (словарь явлений и набор проверок - CaseAnalyzer.variant).
+    Два уровня: LRU в памяти и постоянное хранилище SQLite на диске.
+    """
+
+    def __init__(self, path=None, capacity=10000, fingerprint=None, commit_every=256):
+        self.fingerprint = fingerprint or knowledge_fingerprint()
+        self.capacity = capacity
+        self.commit_every = commit_every
+        self._memory = OrderedDict()
+        self._pending = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            import sqlite3  # только для кэша на диске: без него старт быстрее
+
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, result TEXT NOT NULL)'
+            )
+            self._db.commit()
+
+    def key(self, text, variant=''):
+        digest = hashlib.sha256(self.fingerprint.encode('ascii'))
+        digest.update(b'\0')
+        digest.update(variant.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(normalize_case_text(text).encode('utf-8'))
+        return digest.hexdigest()
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def get(self, text, variant=''):
+        """Возвращает сохраненный результат или None"""
+        key = self.key(text, variant)
+
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return result
+
+        if self._db is not None:
+            row = self._db.execute('SELECT result FROM results WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                result = json.loads(row[0])
+                self._remember(key, result)
+                self.disk_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, text, result, variant=''):
+        key = self.key(text, variant)
+        self._remember(key, result)
+
+        if self._db is not None:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results (key, fingerprint, result) VALUES (?, ?, ?)',
+                (key, self.fingerprint, json.dumps(result, ensure_ascii=False))
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.flush()
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def flush(self):
+        """Записывает накопленные результаты на диск"""
+        if self._db is not None and self._pending:
+            self._db.commit()
+            self._pending = 0
+
+    def purge_stale(self):
+        """Удаляет результаты, посчитанные на другой версии базы знаний"""
+        if self._db is None:
+            return 0
+        cursor = self._db.execute('DELETE FROM results WHERE fingerprint != ?', (self.fingerprint,))
+        self._db.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"Кэш: попаданий {self.hits} (память {stats['memory_hits']}, "
+                f"диск {stats['disk_hits']}), промахов {stats['misses']}, "
+                f"доля попаданий {stats['hit_rate'] * 100:.1f}%")
+
+
+class CachedCaseContext(CaseContext):
+    """Контекст кейса, компактный результат которого берется из кэша"""
+
+    def __init__(self, text, analyzer, cache):
+        super().__init__(text, analyzer)
+        self.cache = cache
+
+    def summary(self):
+        variant = self.analyzer.variant
+        result = self.cache.get(self.text, variant)
+        if result is None:
+            result = super().summary()
+            self.cache.put(self.text, result, variant)
+        return result
+
+
+class CachedAnalyzer:
+    """
+    Обертка над CaseAnalyzer: неизмененные кейсы отдаются из кэша,
+    остальные анализируются проверяльщиками как обычно.
+    """
+
+    def __init__(self, analyzer, cache):
+        self.analyzer = analyzer
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.analyzer, name)
+
+    def context(self, text):
+        return CachedCaseContext(text, self.analyzer, self.cache)
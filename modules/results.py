@@ -0,0 +1,256 @@
+# modules/results.py
+import enum
+from collections.abc import Mapping
+
+# Компактные результаты проверяльщиков.
+# Вместо свежих словарей с повторяющимися русскими строками - объекты со __slots__,
+# в которых хранятся только коды (члены перечислений). Тексты (уровни, обоснования,
+# вопросы) существуют в одном экземпляре на процесс - как значения перечислений
+# и таблиц ниже. Прежний формат (словарь) доступен по тем же ключам: объект
+# ведет себя как неизменяемый Mapping, а полный dict строится только в to_dict().
+
+
+class Fact(enum.Enum):
+    """Значения фактов оценки причинности"""
+    PRESENT = 'есть'
+    ABSENT = 'нет'
+    NO_DATA = 'нет данных'
+    POSITIVE = 'положительная'
+    NEGATIVE = 'отрицательная'
+    KNOWN = 'известный'
+    UNKNOWN = 'неизвестный'
+
+
+class CausalityLevel(enum.Enum):
+    """Уровни причинно-следственной связи по шкале ВОЗ"""
+    CERTAIN = 'Определенная'
+    PROBABLE = 'Вероятная'
+    POSSIBLE = 'Возможная'
+    UNLIKELY = 'Сомнительная'
+    CONDITIONAL = 'Условная'
+    UNASSESSABLE = 'Неклассифицируемая'
+
+
+REASONING = {
+    CausalityLevel.CERTAIN: "Четкая временная связь, положительная десенсибилизация и положительная реакция на повторное назначение. Альтернативные причины исключены.",
+    CausalityLevel.PROBABLE: "Временная связь присутствует, положительная десенсибилизация. Альтернативные причины маловероятны.",
+    CausalityLevel.POSSIBLE: "Временная связь имеется, но данных о десенсибилизации недостаточно.",
+    CausalityLevel.UNLIKELY: "Отсутствует четкая временная связь или имеются альтернативные причины.",
+    CausalityLevel.CONDITIONAL: "Недостаточно данных для оценки причинно-следственной связи.",
+    CausalityLevel.UNASSESSABLE: "Информация противоречива или недостаточна для классификации."
+}
+
+
+class SeriousnessFlag(enum.Enum):
+    """Критерии серьезности (значение - категория SeriousnessChecker.SERIOUSNESS_WORDS)"""
+    DEATH = 'death'
+    LIFE_THREATENING = 'life_threatening'
+    HOSPITALIZATION = 'hospitalization'
+    DISABILITY = 'disability'
+    CONGENITAL = 'congenital'
+    OVERDOSE = 'overdose'
+
+
+class MissingField(enum.Enum):
+    """Проверяемые сведения кейса в порядке проверки (значение - прежнее имя пункта)"""
+    PATIENT_AGE = 'patient_age'
+    PATIENT_GENDER = 'patient_gender'
+    DRUG_NAME = 'drug_name'
+    DRUG_DOSE = 'drug_dose'
+    EVENT_START_DATE = 'event_start_date'
+    EVENT_END_DATE = 'event_end_date'
+    TIME_TO_ONSET = 'time_to_onset'
+    OUTCOME = 'outcome'
+    DECHALLENGE_RESULT = 'dechallenge_result'
+    RECHALLENGE_INFO = 'rechallenge_info'
+    LAB_DATA = 'lab_data'
+    CONCOMITANT_DRUGS = 'concomitant_drugs'
+    MEDICAL_HISTORY = 'medical_history'
+    EVENT_SEVERITY = 'event_severity'
+
+
+QUESTIONS = {
+    MissingField.PATIENT_AGE: 'Какой возраст пациента?',
+    MissingField.PATIENT_GENDER: 'Какой пол пациента?',
+    MissingField.DRUG_NAME: 'Какой препарат принимал пациент?',
+    MissingField.DRUG_DOSE: 'Какая дозировка препарата?',
+    MissingField.EVENT_START_DATE: 'Когда началось нежелательное явление?',
+    MissingField.EVENT_END_DATE: 'Когда закончилось нежелательное явление?',
+    MissingField.TIME_TO_ONSET: 'Через сколько времени после приема препарата началось явление?',
+    MissingField.OUTCOME: 'Каков был исход нежелательного явления?',
+    MissingField.DECHALLENGE_RESULT: 'Что произошло после отмены препарата?',
+    MissingField.RECHALLENGE_INFO: 'Было ли повторное назначение препарата?',
+    MissingField.LAB_DATA: 'Есть ли данные лабораторных исследований?',
+    MissingField.CONCOMITANT_DRUGS: 'Принимал ли пациент другие препараты одновременно?',
+    MissingField.MEDICAL_HISTORY: 'Есть ли у пациента сопутствующие заболевания?',
+    MissingField.EVENT_SEVERITY: 'Какова тяжесть нежелательного явления?'
+}
+
+# Вопрос об исходе, если само явление серьезное (смерть и т.п.)
+SERIOUS_OUTCOME_QUESTION = 'Каков был исход серьезного нежелательного явления?'
+
+CRITICAL_FIELDS = frozenset((
+    MissingField.DRUG_NAME, MissingField.OUTCOME,
+    MissingField.EVENT_START_DATE, MissingField.DECHALLENGE_RESULT
+))
+
+
+def _plain(value):
+    """Значение в прежнем формате: перечисления - строками, вложенные результаты - словарями"""
+    if isinstance(value, ResultView):
+        return value.to_dict()
+    return value
+
+
+class ResultView(Mapping):
+    """
+    Основа компактных результатов: чтение по прежним ключам (FIELDS).
+    legacy(key) возвращает значение ключа в прежнем формате; вложенные
+    результаты остаются объектами (к ним тоже можно обращаться по ключам).
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+
+    def legacy(self, key):
+        value = getattr(self, key)
+        return value.value if isinstance(value, enum.Enum) else value
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return self.legacy(key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def to_dict(self):
+        """Полный результат в прежнем формате (новый словарь при каждом вызове)"""
+        return {key: _plain(self.legacy(key)) for key in self.FIELDS}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+class SeriousnessResult(ResultView):
+    """Серьезность кейса: найденные критерии (кортеж SeriousnessFlag)"""
+
+    __slots__ = ('flag_codes',)
+    FIELDS = ('is_serious', 'flags')
+
+    def __init__(self, flag_codes):
+        self.flag_codes = flag_codes
+
+    @property
+    def is_serious(self):
+        return bool(self.flag_codes)
+
+    @property
+    def flags(self):
+        return [flag.value for flag in self.flag_codes]
+
+
+class CaseFacts(ResultView):
+    """Факты причинности, относящиеся ко всему кейсу (один объект на кейс)"""
+
+    __slots__ = ('alternative_causes', 'drug_mentioned')
+    FIELDS = __slots__
+
+    def __init__(self, alternative_causes, drug_mentioned):
+        self.alternative_causes = alternative_causes
+        self.drug_mentioned = drug_mentioned
+
+
+class EventFacts(ResultView):
+    """
+    Факты причинности для события: найденные в локальном окне события
+    (временная связь, отмена, повторное назначение), известность эффекта
+    и ссылка на факты кейса
+    """
+
+    __slots__ = ('case', 'time_relationship', 'dechallenge', 'rechallenge', 'known_effect')
+    FIELDS = ('time_relationship', 'dechallenge', 'rechallenge',
+              'alternative_causes', 'known_effect', 'drug_mentioned')
+
+    def __init__(self, case, time_relationship, dechallenge, rechallenge, known_effect):
+        self.case = case
+        self.time_relationship = time_relationship
+        self.dechallenge = dechallenge
+        self.rechallenge = rechallenge
+        self.known_effect = known_effect
+
+    @property
+    def alternative_causes(self):
+        return self.case.alternative_causes
+
+    @property
+    def drug_mentioned(self):
+        return self.case.drug_mentioned
+
+
+class CausalityResult(ResultView):
+    """Причинность события: уровень ВОЗ, обоснование (общий шаблон уровня) и факты"""
+
+    __slots__ = ('level', 'facts')
+    FIELDS = ('level', 'reasoning', 'facts')
+
+    def __init__(self, level, facts):
+        self.level = level
+        self.facts = facts
+
+    @property
+    def reasoning(self):
+        return REASONING.get(self.level, "Не удалось оценить связь.")
+
+
+class MissingInfoResult(ResultView):
+    """
+    Полнота данных: отсутствующие сведения (кортеж MissingField) и оценка полноты.
+    serious_outcome - вопрос об исходе задается как для серьезного явления.
+    """
+
+    __slots__ = ('missing', 'completeness_score', 'serious_outcome')
+    FIELDS = ('missing_info', 'questions', 'completeness_score', 'critical_missing')
+
+    def __init__(self, missing, completeness_score, serious_outcome=False):
+        self.missing = missing
+        self.completeness_score = completeness_score
+        self.serious_outcome = serious_outcome
+
+    @property
+    def missing_info(self):
+        return [field.value for field in self.missing]
+
+    @property
+    def questions(self):
+        return [
+            SERIOUS_OUTCOME_QUESTION if self.serious_outcome and field is MissingField.OUTCOME
+            else QUESTIONS[field]
+            for field in self.missing
+        ]
+
+    @property
+    def critical_missing(self):
+        return [field.value for field in self.missing if field in CRITICAL_FIELDS]
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    import pickle
+
+    facts = CaseFacts(Fact.NO_DATA, Fact.PRESENT)
+    result = CausalityResult(CausalityLevel.PROBABLE,
+                             EventFacts(facts, Fact.PRESENT, Fact.POSITIVE, Fact.NO_DATA, Fact.KNOWN))
+
+    print("🧪 Тестирование компактных результатов:")
+    print("=" * 50)
+    print(f"Уровень: {result['level']}")
+    print(f"Обоснование: {result['reasoning']}")
+    print(f"Факты: {dict(result['facts'])}")
+    print(f"Словарь совпадает после pickle: {pickle.loads(pickle.dumps(result)) == result.to_dict()}")
+
+    missing = MissingInfoResult((MissingField.OUTCOME, MissingField.LAB_DATA), 85.7, serious_outcome=True)
+    print(f"Полнота: {missing.to_dict()}")
@@ -0,0 +1,122 @@
+# modules/segmenter.py
+import re
+from bisect import bisect_right
+
+# Границы предложений: знак конца предложения, за которым после пробела идет
+# заглавная буква, цифра или открывающая кавычка/скобка, либо перевод строки.
+# Даты и числа (16.01.2025, 0,9%) и сокращения перед строчной буквой (г. сахар,
+# т. е.) границей не считаются.
+_BOUNDARY_RE = re.compile(r'[.!?…]+(?=\s+["«(]?[А-ЯЁA-Z0-9])|\n')
+
+# Окно события: предложение с упоминанием, одно предыдущее и два следующих
+# (отмена препарата и ее исход обычно описываются сразу после явления)
+WINDOW_BEFORE = 1
+WINDOW_AFTER = 2
+
+
+class Segmentation:
+    """
+    Разбиение текста на предложения за один проход (смещения в исходном тексте).
+    Смещения совпадают со смещениями в text.lower() для кириллицы и латиницы,
+    поэтому окна применимы к вхождениям общего словаря.
+    """
+
+    def __init__(self, text):
+        self.starts = []
+        self.ends = []
+        start = 0
+        for match in _BOUNDARY_RE.finditer(text):
+            self._add(text, start, match.end())
+            start = match.end()
+        self._add(text, start, len(text))
+
+    def _add(self, text, start, end):
+        # Пробелы по краям не входят в предложение; пустые строки пропускаются
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def sentence_index(self, offset):
+        """Номер предложения, содержащего смещение (или ближайшего предыдущего)"""
+        return max(bisect_right(self.starts, offset) - 1, 0)
+
+    def window(self, start, end, before=WINDOW_BEFORE, after=WINDOW_AFTER):
+        """Окно (start, end) из предложений вокруг фрагмента [start, end)"""
+        if not self.starts:
+            return start, end
+        first = max(self.sentence_index(start) - before, 0)
+        last = min(self.sentence_index(max(end - 1, start)) + after, len(self.starts) - 1)
+        return self.starts[first], self.ends[last]
+
+    def windows(self, spans, before=WINDOW_BEFORE, after=WINDOW_AFTER):
+        """Окна для всех упоминаний [(start, end)]; пересекающиеся окна объединяются"""
+        merged = []
+        for start, end in sorted(self.window(start, end, before, after) for start, end in spans):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+
+def segment(text, text_lower):
+    """
+    Разбиение, смещения которого совпадают со смещениями в text_lower.
+    Если нижний регистр изменил длину текста (редкие символы вроде 'İ'),
+    режется сам text_lower - без подсказки заглавных букв.
+    """
+    return Segmentation(text if len(text) == len(text_lower) else text_lower)
+
+
+def find_mentions(text_lower, term):
+    """Все вхождения термина [(start, end)] простым поиском подстроки"""
+    spans = []
+    start = text_lower.find(term)
+    while start != -1 and term:
+        spans.append((start, start + len(term)))
+        start = text_lower.find(term, start + 1)
+    return spans
+
+
+def event_windows(text, text_lower, event, mentions=None, segmentation=None):
+    """
+    Локальные окна события в тексте.
+    mentions - упоминания [(start, end)] (по умолчанию ищутся подстрокой);
+    если событие в тексте не упоминается - окно на весь текст.
+    """
+    if mentions is None:
+        mentions = find_mentions(text_lower, event.lower())
+    if not mentions:
+        return [(0, len(text_lower))]
+    if segmentation is None:
+        segmentation = segment(text, text_lower)
+    return segmentation.windows(mentions)
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    with open('data/cases/case_3.txt', 'r', encoding='utf-8') as f:
+        text = f.read().strip()
+
+    segmentation = Segmentation(text)
+    text_lower = text.lower()
+
+    print("🧪 Тестирование разбиения на предложения:")
+    print("=" * 50)
+    print(f"Длина текста: {len(text)}, предложений: {len(segmentation)}")
+    for index in range(3):
+        print(f"   [{index}] {text[segmentation.starts[index]:segmentation.ends[index]]}")
+
+    for event in ('артериальная гипертензия', 'смерть'):
+        windows = event_windows(text, text_lower, event, segmentation=segmentation)
+        size = sum(end - start for start, end in windows)
+        print(f"\nСобытие '{event}': окон {len(windows)}, символов {size} из {len(text)}")
+        for start, end in windows[:2]:
+            print(f"   … {text[start:end][:160]} …")
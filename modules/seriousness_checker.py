@@ -1,38 +1,41 @@
-
 # modules/seriousness_checker.py
+from modules.lexicon import get_default_lexicon
+from modules.results import SeriousnessFlag, SeriousnessResult
+
 class SeriousnessChecker:
-    def check_seriousness(self, text):
+    # Словарь серьезных критериев
+    SERIOUSNESS_WORDS = {
+        'death': ['смерть', 'летальный', 'погиб', 'умер', 'скончался','скончался', 'мертв', 'погибла', 'умерла'],
+        'life_threatening': ['угроза жизни', 'реанимация', 'орит', 'интенсивная терапия'],
+        'hospitalization': ['госпитализ', 'стационар', 'поступил в больницу', 'госпитализирован'],
+        'disability': ['инвалид', 'нетрудоспособность', 'инвалидность'],
+        'congenital': ['врожденн', 'аномалия', 'порок развития'],
+        'overdose': ['передозировка', 'отравление', 'интоксикация']
+    }
+
+    # Термины для общего словаря (modules/lexicon.py)
+    LEXICON_TERMS = SERIOUSNESS_WORDS
+
+    # Код критерия и его тег в общем словаре (строятся один раз)
+    FLAG_TAGS = tuple(
+        (SeriousnessFlag(category), f'seriousness.{category}') for category in SERIOUSNESS_WORDS
+    )
+
+    def check_seriousness(self, text, hits=None):
         """
         Проверяет, является ли случай серьезным
-        Возвращает: {'is_serious': True/False, 'flags': ['причина1', 'причина2']}
+        Возвращает SeriousnessResult; по ключам - прежний формат
+        {'is_serious': True/False, 'flags': ['причина1', 'причина2']}
         """
         
-        # Приводим текст к нижнему регистру для поиска
-        text_lower = text.lower()
-        
-        # Словарь серьезных критериев
-        seriousness_words = {
-            'death': ['смерть', 'летальный', 'погиб', 'умер', 'скончался','скончался', 'мертв', 'погибла', 'умерла'],
-            'life_threatening': ['угроза жизни', 'реанимация', 'орит', 'интенсивная терапия'],
-            'hospitalization': ['госпитализ', 'стационар', 'поступил в больницу', 'госпитализирован'],
-            'disability': ['инвалид', 'нетрудоспособность', 'инвалидность'],
-            'congenital': ['врожденн', 'аномалия', 'порок развития'],
-            'overdose': ['передозировка', 'отравление', 'интоксикация']
-        }
-        
-        found_flags = []
-        
-        # Ищем каждую категорию в тексте
-        for category, words in seriousness_words.items():
-            for word in words:
-                if word in text_lower:
-                    found_flags.append(category)
-                    break  # нашли одно слово - достаточно
+        # Один проход общего словаря по тексту (если еще не сделан)
+        if hits is None:
+            hits = get_default_lexicon(('seriousness',)).scan(text)
         
-        return {
-            'is_serious': len(found_flags) > 0,
-            'flags': found_flags
-        }
+        # Категория найдена, если в тексте есть хоть одно ее слово
+        return SeriousnessResult(tuple(
+            flag for flag, tag in self.FLAG_TAGS if hits.has(tag)
+        ))
 
 # Простой тест
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+# modules/shared_kb.py
+import gc
+import multiprocessing
+import os
+
+# Общая база знаний для пула процессов.
+# Проверяльщики, база ИМП, список IME и скомпилированные словари строятся один раз
+# в основном процессе, а процессы пула получают их через fork (copy-on-write):
+# страницы памяти общие, пока процесс их не изменит.
+# Копирование страниц вызывают две вещи: сборщик мусора, который пишет в заголовки
+# всех отслеживаемых объектов при каждом полном обходе, и счетчики ссылок объектов,
+# к которым процесс обращается. Первое устраняется gc.freeze(): объекты родителя
+# переносятся в постоянное поколение, и сборщик процессов пула их не обходит.
+# Второе в CPython 3.11 неустранимо, но затрагивает только страницы объектов,
+# которые действительно нужны кейсам; остальная база знаний остается общей.
+
+
+def fork_available():
+    """Доступен ли запуск процессов через fork (Linux, macOS)"""
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def build_shared(build):
+    """
+    Строит объекты, общие для процессов пула: build() выполняется с выключенным
+    сборщиком мусора (без освобожденных "дыр" на страницах), затем все объекты
+    процесса замораживаются. Сборщик включается снова в start_pool().
+    """
+    gc.disable()
+    try:
+        shared = build()
+    except BaseException:
+        gc.enable()
+        raise
+    gc.freeze()
+    return shared
+
+
+def start_pool(workers, initializer, initargs=()):
+    """
+    Пул процессов через fork после build_shared().
+    initializer процесса пула должен вызвать gc.enable() (состояние сборщика наследуется).
+    """
+    try:
+        return multiprocessing.get_context('fork').Pool(workers, initializer=initializer,
+                                                        initargs=initargs)
+    finally:
+        gc.enable()
+
+
+def release_shared():
+    """Возвращает замороженные объекты сборщику мусора (после завершения пула)"""
+    gc.unfreeze()
+
+
+def memory_usage(pid='self'):
+    """
+    Память процесса, байты: {'rss', 'pss', 'uss', 'shared'}.
+    uss - только собственные страницы процесса (освободятся при его завершении),
+    pss - собственные плюс доля общих. Источник - /proc/<pid>/smaps_rollup (Linux);
+    без него - только rss из /proc/<pid>/status; None, если /proc недоступен.
+    """
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0]) * 1024
+    except OSError:
+        try:
+            with open(f'/proc/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return {'rss': int(line.split()[1]) * 1024}
+        except OSError:
+            pass
+        return None
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    }
+
+
+def workers_memory():
+    """Память всех живых дочерних процессов: [{'pid', 'rss', ...}] в порядке pid"""
+    usages = []
+    for process in sorted(multiprocessing.active_children(), key=lambda process: process.pid):
+        usage = memory_usage(process.pid)
+        if usage is not None:
+            usages.append(dict(usage, pid=process.pid))
+    return usages
+
+
+def format_memory(usages):
+    """Сводка памяти процессов пула: по каждому процессу и в среднем, МБ"""
+    if not usages:
+        return "Память процессов пула: нет данных"
+
+    def mb(value):
+        return f"{value / (1 << 20):.1f}"
+
+    keys = [key for key in ('rss', 'pss', 'uss') if key in usages[0]]
+    lines = [f"Память процессов пула ({len(usages)}), МБ:"]
+    for usage in usages:
+        lines.append(f"   pid {usage['pid']}: " + ', '.join(f"{key.upper()} {mb(usage[key])}" for key in keys))
+    lines.append("   в среднем: " + ', '.join(
+        f"{key.upper()} {mb(sum(usage[key] for usage in usages) / len(usages))}" for key in keys
+    ))
+    return '\n'.join(lines)
+
+
+# Тестирование модуля: память процессов пула с общей базой знаний и без нее
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    from modules.batch_runner import BatchStats, discover_cases, run_batch
+
+    scale = int(sys.argv[sys.argv.index('--scale') + 1]) if '--scale' in sys.argv else 1
+    workers = 4
+    paths = [os.path.abspath(path) for path in discover_cases('data/cases')] * 50
+
+    print("🧪 Тестирование общей базы знаний:")
+    print("=" * 50)
+    print(f"Основной процесс до пула: {memory_usage()}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if scale > 1:
+            from modules.kb_snapshot import _write_scaled_knowledge
+
+            _write_scaled_knowledge(work_dir, scale)
+            os.chdir(work_dir)
+
+        for shared in (False, True):
+            stats = BatchStats()
+            results = list(run_batch(paths, workers=workers, stats=stats, shared=shared))
+            title = "общая база (fork + gc.freeze)" if shared else "база в каждом процессе"
+            print(f"\n📦 {title}, база знаний x{scale}: {stats.report()}")
+            print(format_memory(stats.worker_memory))
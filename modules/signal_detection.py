@@ -0,0 +1,305 @@
+# modules/signal_detection.py
+import os
+
+import numpy as np
+
+from modules.adverse_events import PLACEHOLDER_EVENTS
+
+# Выявление сигналов методами диспропорциональности (PRR, ROR, IC) по результатам
+# пакетной обработки. Для пары (препарат, явление) по отчетам строится таблица 2×2:
+#                  явление   остальные явления
+#   препарат          a             b
+#   остальные         c             d
+# Счетчики хранятся разреженно (только встретившиеся пары) и дополняются новыми
+# пакетами; статистика считается сразу для всех пар операциями над массивами NumPy.
+
+# Квантиль нормального распределения для 95% доверительного интервала
+Z_95 = 1.959963984540054
+
+# Критерии сигнала (Evans et al., 2001): a ≥ 3, PRR ≥ 2, χ² ≥ 4
+SIGNAL_MIN_COUNT = 3
+SIGNAL_MIN_PRR = 2.0
+SIGNAL_MIN_CHI2 = 4.0
+
+# Пара хранится одним ключом: индекс препарата в старших 32 битах, явления - в младших
+_EVENT_BITS = 32
+_EVENT_MASK = (1 << _EVENT_BITS) - 1
+
+COLUMNS = ('drug', 'event', 'a', 'b', 'c', 'd', 'expected',
+           'prr', 'prr_lower', 'prr_upper', 'chi2',
+           'ror', 'ror_lower', 'ror_upper',
+           'ic', 'ic025', 'ic975', 'signal')
+
+
+def case_pairs(result, all_drugs=False):
+    """
+    Препараты и явления одного результата кейса (без повторов и заглушек).
+    По умолчанию - только подозреваемый препарат (первый упомянутый), all_drugs - все.
+    """
+    if 'drugs' not in result:
+        raise ValueError("В результате нет препаратов: нужен анализ с проверкой expectedness")
+
+    drugs = result['drugs'] if all_drugs else result['drugs'][:1]
+    events = []
+    for event_result in result['events']:
+        event = event_result['event']
+        if event not in PLACEHOLDER_EVENTS and event not in events:
+            events.append(event)
+    return drugs, events
+
+
+class SignalCounts:
+    """
+    Накопленные счетчики отчетов: всего, по препаратам, по явлениям и по парам.
+    Пары хранятся как отсортированные ключи и счетчики (разреженная матрица
+    препарат × явление). Уже учтенные case_id пропускаются, поэтому повторная
+    подача того же пакета не удваивает счетчики.
+    """
+
+    def __init__(self, all_drugs=False):
+        self.all_drugs = all_drugs
+        self.total = 0
+        self.drugs = []
+        self.events = []
+        self.case_ids = set()
+        self._drug_index = {}
+        self._event_index = {}
+        self.drug_counts = np.zeros(0, dtype=np.int64)
+        self.event_counts = np.zeros(0, dtype=np.int64)
+        self.pair_keys = np.zeros(0, dtype=np.int64)
+        self.pair_counts = np.zeros(0, dtype=np.int64)
+
+    def _code(self, names, index, name):
+        code = index.get(name)
+        if code is None:
+            code = index[name] = len(names)
+            names.append(name)
+        return code
+
+    def add_results(self, results):
+        """
+        Добавляет пакет результатов кейсов; возвращает число новых кейсов.
+        Ошибочные результаты (файл не прочитан) не учитываются.
+        """
+        drug_codes = []
+        event_codes = []
+        pair_drugs = []
+        pair_events = []
+        added = 0
+
+        for result in results:
+            if 'error' in result:
+                continue
+            case_id = result.get('case_id')
+            if case_id is not None:
+                if case_id in self.case_ids:
+                    continue
+                self.case_ids.add(case_id)
+            added += 1
+
+            drugs, events = case_pairs(result, self.all_drugs)
+            drugs = [self._code(self.drugs, self._drug_index, drug) for drug in drugs]
+            events = [self._code(self.events, self._event_index, event) for event in events]
+            drug_codes.extend(drugs)
+            event_codes.extend(events)
+            for drug in drugs:
+                pair_drugs.extend([drug] * len(events))
+                pair_events.extend(events)
+
+        self.total += added
+        self.drug_counts = _add_counts(self.drug_counts, drug_codes, len(self.drugs))
+        self.event_counts = _add_counts(self.event_counts, event_codes, len(self.events))
+
+        if pair_drugs:
+            keys = (np.array(pair_drugs, dtype=np.int64) << _EVENT_BITS) | np.array(pair_events, dtype=np.int64)
+            self._merge_pairs(keys, np.ones(len(keys), dtype=np.int64))
+        return added
+
+    def _merge_pairs(self, keys, counts):
+        """Сливает новые пары с накопленными (ключи остаются отсортированными и уникальными)"""
+        keys = np.concatenate([self.pair_keys, keys])
+        counts = np.concatenate([self.pair_counts, counts])
+        self.pair_keys, inverse = np.unique(keys, return_inverse=True)
+        self.pair_counts = np.bincount(inverse, weights=counts, minlength=len(self.pair_keys)).astype(np.int64)
+
+    @property
+    def pair_drugs(self):
+        return self.pair_keys >> _EVENT_BITS
+
+    @property
+    def pair_events(self):
+        return self.pair_keys & _EVENT_MASK
+
+    def save(self, path):
+        """Сохраняет счетчики в .npz (для дополнения следующими пакетами)"""
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                all_drugs=np.array(self.all_drugs),
+                total=np.array(self.total, dtype=np.int64),
+                drugs=np.array(self.drugs, dtype=str),
+                events=np.array(self.events, dtype=str),
+                case_ids=np.array(sorted(self.case_ids), dtype=str),
+                drug_counts=self.drug_counts,
+                event_counts=self.event_counts,
+                pair_keys=self.pair_keys,
+                pair_counts=self.pair_counts
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            counts = cls(all_drugs=bool(data['all_drugs']))
+            counts.total = int(data['total'])
+            counts.drugs = data['drugs'].tolist()
+            counts.events = data['events'].tolist()
+            counts.case_ids = set(data['case_ids'].tolist())
+            counts.drug_counts = data['drug_counts']
+            counts.event_counts = data['event_counts']
+            counts.pair_keys = data['pair_keys']
+            counts.pair_counts = data['pair_counts']
+        counts._drug_index = {drug: code for code, drug in enumerate(counts.drugs)}
+        counts._event_index = {event: code for code, event in enumerate(counts.events)}
+        return counts
+
+    @classmethod
+    def open(cls, path, all_drugs=False):
+        """Счетчики из файла, если он есть, иначе пустые"""
+        if path and os.path.exists(path):
+            counts = cls.load(path)
+            if counts.all_drugs != all_drugs:
+                raise ValueError(f"Счетчики {path} собраны с другим режимом препаратов (all_drugs={counts.all_drugs})")
+            return counts
+        return cls(all_drugs=all_drugs)
+
+    def report(self):
+        return (f"Отчетов: {self.total}, препаратов: {len(self.drugs)}, явлений: {len(self.events)}, "
+                f"пар: {len(self.pair_keys)}")
+
+
+def _add_counts(counts, codes, size):
+    """Увеличивает счетчики по кодам, расширяя массив до size"""
+    if len(counts) < size:
+        counts = np.concatenate([counts, np.zeros(size - len(counts), dtype=np.int64)])
+    if codes:
+        counts += np.bincount(np.array(codes, dtype=np.int64), minlength=size)
+    return counts
+
+
+def compute_signals(counts, min_count=1):
+    """
+    PRR, ROR и IC с 95% интервалами для всех пар с a ≥ min_count.
+    Возвращает словарь колонок (массивы NumPy одинаковой длины, см. COLUMNS);
+    неопределенные значения (деление на ноль) - inf или nan.
+    """
+    keep = counts.pair_counts >= min_count
+    drug_codes = counts.pair_drugs[keep]
+    event_codes = counts.pair_events[keep]
+
+    n = float(counts.total)
+    a = counts.pair_counts[keep].astype(np.float64)
+    drug_total = counts.drug_counts[drug_codes].astype(np.float64)
+    event_total = counts.event_counts[event_codes].astype(np.float64)
+    b = drug_total - a
+    c = event_total - a
+    d = n - drug_total - event_total + a
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Пропорциональное отношение частот
+        prr = (a / (a + b)) / (c / (c + d))
+        prr_se = np.sqrt(1 / a - 1 / (a + b) + 1 / c - 1 / (c + d))
+        # Отношение шансов
+        ror = (a * d) / (b * c)
+        ror_se = np.sqrt(1 / a + 1 / b + 1 / c + 1 / d)
+        # χ² с поправкой Йейтса
+        chi2 = n * (np.abs(a * d - b * c) - n / 2) ** 2 / ((a + b) * (c + d) * (a + c) * (b + d))
+        # Информационная компонента (BCPNN) с приближенным интервалом (Norén et al., 2013)
+        expected = drug_total * event_total / n
+        ic = np.log2((a + 0.5) / (expected + 0.5))
+        ic025 = ic - 3.3 * (a + 0.5) ** -0.5 - 2 * (a + 0.5) ** -1.5
+        ic975 = ic + 2.4 * (a + 0.5) ** -0.5 - 0.5 * (a + 0.5) ** -1.5
+
+        table = {
+            'drug': np.array(counts.drugs, dtype=object)[drug_codes] if counts.drugs else np.array([], dtype=object),
+            'event': np.array(counts.events, dtype=object)[event_codes] if counts.events else np.array([], dtype=object),
+            'a': a.astype(np.int64), 'b': b.astype(np.int64),
+            'c': c.astype(np.int64), 'd': d.astype(np.int64),
+            'expected': expected,
+            'prr': prr,
+            'prr_lower': np.exp(np.log(prr) - Z_95 * prr_se),
+            'prr_upper': np.exp(np.log(prr) + Z_95 * prr_se),
+            'chi2': chi2,
+            'ror': ror,
+            'ror_lower': np.exp(np.log(ror) - Z_95 * ror_se),
+            'ror_upper': np.exp(np.log(ror) + Z_95 * ror_se),
+            'ic': ic, 'ic025': ic025, 'ic975': ic975,
+        }
+    table['signal'] = (a >= SIGNAL_MIN_COUNT) & (prr >= SIGNAL_MIN_PRR) & (chi2 >= SIGNAL_MIN_CHI2)
+    return table
+
+
+def sort_signals(table, key='prr', descending=True):
+    """Переупорядочивает колонки по ключу (nan - в конце)"""
+    values = table[key].astype(np.float64)
+    order = np.argsort(np.where(np.isnan(values), -np.inf, values), kind='stable')
+    if descending:
+        order = order[::-1]
+    return {name: column[order] for name, column in table.items()}
+
+
+def signal_rows(table, signals_only=False, limit=None, digits=4):
+    """Строки таблицы для вывода: словари, бесконечности и nan - None"""
+    mask = table['signal'] if signals_only else np.ones(len(table['a']), dtype=bool)
+    indices = np.flatnonzero(mask)
+    if limit is not None:
+        indices = indices[:limit]
+
+    rows = []
+    for index in indices:
+        row = {}
+        for name in COLUMNS:
+            value = table[name][index]
+            if isinstance(value, np.floating):
+                value = round(float(value), digits) if np.isfinite(value) else None
+            elif isinstance(value, np.integer):
+                value = int(value)
+            elif isinstance(value, np.bool_):
+                value = bool(value)
+            row[name] = value
+        rows.append(row)
+    return rows
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    import time
+
+    from modules.case_context import CaseAnalyzer
+    from modules.narrative_generator import NarrativeGenerator
+
+    analyzer = CaseAnalyzer(checks=('expectedness',))
+    generator = NarrativeGenerator(seed=1)
+    results = []
+    for case in generator.generate_corpus(300, target_chars=1200, event_density=3.0):
+        summary = analyzer.context(case['text']).summary()
+        summary['case_id'] = case['case_id']
+        results.append(summary)
+
+    counts = SignalCounts()
+    counts.add_results(results[:150])
+    counts.add_results(results[150:])
+    counts.add_results(results[:10])  # повтор - не учитывается
+
+    print("🧪 Тестирование выявления сигналов:")
+    print("=" * 50)
+    print(counts.report())
+
+    started = time.perf_counter()
+    table = sort_signals(compute_signals(counts, min_count=3), 'ror_lower')
+    elapsed = time.perf_counter() - started
+    print(f"Пар в расчете: {len(table['a'])} за {elapsed * 1000:.2f} мс")
+
+    for row in signal_rows(table, limit=5):
+        print(f"   {row['drug']} × {row['event']}: a={row['a']} PRR={row['prr']} "
+              f"ROR={row['ror']} [{row['ror_lower']}; {row['ror_upper']}] IC025={row['ic025']}"
+              f"{' 🔴 сигнал' if row['signal'] else ''}")
@@ -0,0 +1,90 @@
+# modules/stemmer.py
+import re
+from functools import lru_cache
+
+# Легкий стеммер русского языка для сопоставления терминов: отсекаются только
+# словоизменительные окончания существительных и прилагательных (таблицы Snowball)
+# и возвратная частица, поэтому "анафилактическим шоком" и "анафилактический шок"
+# приводятся к одной форме "анафилактическ шок". Глагольные и словообразовательные
+# суффиксы не трогаются: основа термина-основы ('отмен', 'купирова') остается началом
+# основы слова текста ('отмена' → 'отмен', а не 'отм' как в полном Snowball).
+# Версия входит в ключ снимка общего словаря - при изменении правил словарь пересобирается.
+STEMMER_VERSION = 2
+
+# Размер LRU-кэша основ: словарь кейсов ограничен, повторные слова не разбираются заново
+STEM_CACHE_SIZE = 50000
+
+_VOWELS = frozenset('аеиоуыэюя')
+
+_REFLEXIVE = ('ся', 'сь')
+_ADJECTIVE = ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым',
+              'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею')
+_NOUN = ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей',
+         'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях',
+         'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я')
+
+# Слова текста: буквы и цифры (дефис и пунктуация - разделители)
+TOKEN_RE = re.compile(r'\w+')
+SEPARATOR_RE = re.compile(r'(\W+)')
+
+
+def _by_length(endings):
+    return tuple(sorted(endings, key=len, reverse=True))
+
+
+_REFLEXIVE = _by_length(_REFLEXIVE)
+_ADJECTIVE = _by_length(_ADJECTIVE)
+_NOUN = _by_length(_NOUN)
+
+
+def _strip(word, endings, rv):
+    """Отсекает самое длинное окончание, лежащее в RV (после первой гласной); иначе None"""
+    for ending in endings:
+        if word.endswith(ending):
+            if len(word) - len(ending) >= rv:
+                return word[:-len(ending)]
+            return None
+    return None
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    """
+    Основа слова в нижнем регистре (результат кэшируется).
+    Буква ё не заменяется на е: 'лёгкого' (легкое) не должно совпадать с 'легк' (легкой степени).
+    """
+    rv = len(word)
+    for position, char in enumerate(word):
+        if char in _VOWELS:
+            rv = position + 1
+            break
+    if rv >= len(word):
+        return word
+
+    word = _strip(word, _REFLEXIVE, rv) or word
+    stripped = _strip(word, _ADJECTIVE, rv)
+    if stripped is None:
+        stripped = _strip(word, _NOUN, rv)
+    return word if stripped is None else stripped
+
+
+def tokenize(text):
+    """Слова текста с позициями: [(start, end, слово)]"""
+    return [(match.start(), match.end(), match.group()) for match in TOKEN_RE.finditer(text)]
+
+
+def cache_info():
+    """Статистика кэша основ (hits, misses, maxsize, currsize)"""
+    return stem.cache_info()
+
+
+# Тестирование модуля
+if __name__ == "__main__":
+    print("🧪 Тестирование стеммера:")
+    print("=" * 50)
+    for phrase in ('анафилактический шок', 'анафилактическим шоком', 'анафилактического шока',
+                   'госпитализирована', 'препарат отменен', 'отмена препарата',
+                   'сыпь исчезла', 'сыпью', 'крови', 'кровотечение', 'скончалась', 'пороком развития'):
+        print(f"   {phrase:<28} → {' '.join(stem(word) for _, _, word in tokenize(phrase))}")
+
+    print(f"Кэш: {cache_info()}")
@@ -0,0 +1,63 @@
+# modules/stream_pipeline.py
+import json
+
+from modules.batch_runner import BatchStats, analyze_case
+from modules.case_context import CaseAnalyzer
+
+
+def iter_jsonl_cases(stream, text_field='text', id_field='case_id'):
+    """
+    Читает кейсы из JSONL-потока по одной записи.
+    Возвращает (case_id, текст, ошибка); при ошибке текст = None.
+    Если в записи нет идентификатора, используется номер строки.
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Некорректный JSON: {e}"
+            continue
+
+        if not isinstance(record, dict):
+            yield line_number, None, "Запись должна быть JSON-объектом"
+            continue
+
+        case_id = record.get(id_field, line_number)
+        text = record.get(text_field)
+        if not isinstance(text, str):
+            yield case_id, None, f"Нет текстового поля '{text_field}'"
+            continue
+
+        yield case_id, text.strip(), None
+
+
+def stream_analyze(input_stream, output_stream, analyzer=None,
+                   text_field='text', id_field='case_id', stats=None, case_store=None):
+    """
+    Потоковый анализ: одна запись на входе - одна компактная JSON-строка на выходе.
+    Ничего не накапливает, поэтому память не зависит от размера входа.
+    case_store - CaseStore, куда дополнительно пишутся кейсы с результатами.
+    """
+    if analyzer is None:
+        analyzer = CaseAnalyzer()
+    if stats is None:
+        stats = BatchStats()
+
+    for case_id, text, error in iter_jsonl_cases(input_stream, text_field, id_field):
+        if error is None:
+            result = analyze_case(analyzer, case_id, text)
+            if case_store is not None:
+                case_store.add(case_id, text, result)
+        else:
+            result = {'case_id': case_id, 'error': error}
+
+        stats.add(result)
+        output_stream.write(json.dumps(result, ensure_ascii=False, separators=(',', ':')))
+        output_stream.write('\n')
+
+    output_stream.flush()
+    return stats
@@ -0,0 +1,246 @@
+# modules/watcher.py
+import os
+import signal
+import sqlite3
+import threading
+import time
+
+from modules.batch_runner import (BatchStats, _analyze_in_worker, _init_worker, analyze_file_tracked,
+                                  create_analyzer, discover_cases)
+from modules.kb_snapshot import file_sha256
+
+# Наблюдение за папкой входящих кейсов (опрос, без внешних сервисов).
+# Файл считается записанным, когда его mtime старше SETTLE_SECONDS и размер/mtime
+# не изменились с прошлого опроса. Готовые новые и измененные файлы анализируются
+# пакетами; обработанные файлы записываются в контрольную точку (SQLite) только
+# после того, как результаты пакета записаны, поэтому после перезапуска уже
+# обработанное не повторяется, а прерванный пакет обрабатывается заново.
+
+POLL_INTERVAL = 2.0
+SETTLE_SECONDS = 1.0
+BATCH_SIZE = 256
+
+
+class Checkpoint:
+    """
+    Контрольная точка: для каждого обработанного файла - mtime, размер и sha256.
+    Состояние загружается в память при открытии (проверка файла при опросе - без запросов к базе).
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript('''
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS processed (
+                path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL, processed_at REAL NOT NULL);
+        ''')
+        self._files = {
+            path: ((mtime_ns, size), sha256)
+            for path, mtime_ns, size, sha256 in self.db.execute(
+                'SELECT path, mtime_ns, size, sha256 FROM processed')
+        }
+
+    def __len__(self):
+        return len(self._files)
+
+    def signature(self, path):
+        """(mtime_ns, размер) файла при последней обработке или None"""
+        entry = self._files.get(path)
+        return entry[0] if entry else None
+
+    def sha256(self, path):
+        entry = self._files.get(path)
+        return entry[1] if entry else None
+
+    def mark(self, entries):
+        """Отмечает файлы обработанными: [(путь, (mtime_ns, размер), sha256)]; одна транзакция"""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO processed (path, mtime_ns, size, sha256, processed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(path, signature[0], signature[1], sha256, now) for path, signature, sha256 in entries]
+            )
+        for path, signature, sha256 in entries:
+            self._files[path] = (signature, sha256)
+
+    def close(self):
+        self.db.close()
+
+
+class FolderWatcher:
+    """
+    Опрос каталога: poll() возвращает готовые файлы [(путь, (mtime_ns, размер))],
+    которых нет в контрольной точке или которые изменились после обработки.
+    settle - сколько секунд файл не должен меняться, чтобы считаться записанным.
+    """
+
+    def __init__(self, root, checkpoint, suffix='.txt', settle=SETTLE_SECONDS):
+        self.root = root
+        self.checkpoint = checkpoint
+        self.suffix = suffix
+        self.settle = settle
+        self._observed = {}
+
+    def poll(self, now=None):
+        now = time.time() if now is None else now
+        observed = {}
+        ready = []
+
+        for path in discover_cases(self.root, self.suffix):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Файл удален или переименован между обходом и stat
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            observed[path] = signature
+            if self.checkpoint.signature(path) == signature:
+                continue
+
+            # Еще пишется: изменен недавно или изменился с прошлого опроса
+            previous = self._observed.get(path)
+            if now - stat.st_mtime_ns / 1e9 < self.settle or (previous is not None and previous != signature):
+                continue
+            ready.append((path, signature))
+
+        self._observed = observed
+        return ready
+
+
+class CaseProcessor:
+    """
+    Анализ пакетов файлов: анализатор (workers=1) или пул процессов создается
+    один раз на все время работы и переиспользуется всеми пакетами.
+    """
+
+    def __init__(self, workers=1, event_lexicon='common', checks=None):
+        self.workers = workers
+        self.pool = None
+        self.analyzer = None
+        if workers <= 1:
+            self.analyzer = create_analyzer(event_lexicon, checks=checks)
+        else:
+            import multiprocessing
+
+            self.pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                             initargs=(event_lexicon, None, False, checks))
+
+    def analyze(self, paths):
+        """Результаты кейсов в порядке путей"""
+        if self.pool is None:
+            return [analyze_file_tracked(self.analyzer, path)[0] for path in paths]
+        # Небольшие пакеты - мелкими задачами, чтобы были заняты все процессы
+        chunksize = max(1, min(16, len(paths) // (self.workers * 4)))
+        return [result for result, _, _, _ in self.pool.imap(_analyze_in_worker, paths, chunksize)]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+def watch(root, checkpoint, processor, sink, interval=POLL_INTERVAL, settle=SETTLE_SECONDS,
+          batch_size=BATCH_SIZE, suffix='.txt', once=False, stop=None, log=None, stats=None):
+    """
+    Цикл наблюдения: опрос каталога, анализ готовых файлов пакетами по batch_size,
+    запись результатов в sink (modules/output_sinks.py), затем - контрольная точка.
+    Файл, который только "тронут" (mtime изменился, содержимое - нет), не анализируется.
+    once - обработать готовое и завершиться; stop - threading.Event для остановки.
+    Возвращает BatchStats.
+    """
+    watcher = FolderWatcher(root, checkpoint, suffix, settle)
+    stop = threading.Event() if stop is None else stop
+    stats = BatchStats() if stats is None else stats
+
+    while not stop.is_set():
+        ready = watcher.poll()
+
+        # Содержимое сверяется по sha256 до анализа: изменение во время анализа
+        # даст новый mtime, и файл будет обработан еще раз
+        todo = []
+        touched = []
+        for path, signature in ready:
+            try:
+                digest = file_sha256(path)
+            except OSError:
+                continue
+            if checkpoint.sha256(path) == digest:
+                touched.append((path, signature, digest))
+            else:
+                todo.append((path, signature, digest))
+        if touched:
+            checkpoint.mark(touched)
+
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            started = time.perf_counter()
+            for result in processor.analyze([path for path, _, _ in batch]):
+                stats.add(result)
+                sink.write_case({'result': result})
+            # Результаты на диске раньше контрольной точки: сбой между ними - повтор пакета, не потеря
+            sink.flush()
+            checkpoint.mark(batch)
+            if log:
+                log(f"📥 Пакет: {len(batch)} кейсов за {time.perf_counter() - started:.2f} с "
+                    f"(всего {stats.cases}, в контрольной точке {len(checkpoint)})")
+            if stop.is_set():
+                break
+
+        if once:
+            break
+        stop.wait(interval)
+
+    return stats
+
+
+def stop_on_signals(stop):
+    """SIGINT/SIGTERM завершают наблюдение после текущего пакета"""
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_: stop.set())
+
+
+# Тестирование модуля: поток входящих кейсов, перезапуск без повторной обработки
+if __name__ == "__main__":
+    import io
+    import json
+    import shutil
+    import tempfile
+
+    from modules.output_sinks import JsonSink
+
+    print("🧪 Тестирование наблюдения за папкой:")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        inbox = os.path.join(work_dir, 'inbox')
+        os.makedirs(inbox)
+        checkpoint_path = os.path.join(work_dir, 'checkpoint.sqlite')
+        processor = CaseProcessor()
+
+        def run(title):
+            output = io.StringIO()
+            checkpoint = Checkpoint(checkpoint_path)
+            try:
+                with JsonSink(output) as sink:
+                    stats = watch(inbox, checkpoint, processor, sink, settle=0, once=True)
+            finally:
+                checkpoint.close()
+            case_ids = [json.loads(line)['case_id'] for line in output.getvalue().splitlines()]
+            print(f"{title}: обработано {stats.cases} {[os.path.basename(case_id) for case_id in case_ids]}")
+
+        for number in (1, 2, 3):
+            shutil.copy(f'data/cases/case_{number}.txt', inbox)
+        run("Первый запуск")
+        run("Перезапуск без изменений")
+
+        os.utime(os.path.join(inbox, 'case_1.txt'))
+        with open(os.path.join(inbox, 'case_2.txt'), 'a', encoding='utf-8') as f:
+            f.write("\nПовторное назначение препарата привело к рецидиву.")
+        shutil.copy('data/cases/case_4.txt', inbox)
+        run("case_1 тронут, case_2 изменен, case_4 новый")
+        processor.close()
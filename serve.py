@@ -0,0 +1,58 @@
+# serve.py - HTTP-СЕРВИС АНАЛИЗА КЕЙСОВ
+import argparse
+import asyncio
+import os
+import sys
+
+from modules.case_context import CHECKS, checks_argument
+from modules.http_service import AnalysisService, serve
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="HTTP-сервис анализа кейсов (/analyze, /analyze/batch, /metrics)"
+    )
+    parser.add_argument('--host', default='127.0.0.1', help="адрес прослушивания")
+    parser.add_argument('--port', type=int, default=8080, help="порт")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="процессов анализа (по умолчанию - все ядра)")
+    parser.add_argument('--max-concurrency', type=int,
+                        help="кейсов в обработке одновременно (по умолчанию - 2 на процесс)")
+    parser.add_argument('--max-pending', type=int, default=256,
+                        help="запросов в очереди, сверх которых сервис отвечает 503")
+    parser.add_argument('--max-batch', type=int, default=1000, help="кейсов в одном пакете")
+    parser.add_argument('--events', choices=['common', 'basic'], default='common',
+                        help="словарь нежелательных явлений")
+    parser.add_argument('--checks', type=checks_argument, default=CHECKS, metavar='СПИСОК',
+                        help=f"проверки через запятую ({','.join(CHECKS)}) или all")
+    parser.add_argument('--cache', metavar='PATH', help="файл SQLite кэша результатов")
+    parser.add_argument('--instrument', action='store_true',
+                        help="замеры проверяльщиков (GET /metrics?format=prometheus)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    service = AnalysisService(workers=args.workers, max_concurrency=args.max_concurrency,
+                              max_pending=args.max_pending, max_batch=args.max_batch,
+                              event_lexicon=args.events, cache_path=args.cache,
+                              instrument=args.instrument, checks=args.checks)
+    print(f"⏳ Загрузка проверяльщиков в {service.workers} процессах...", file=sys.stderr)
+    service.warm_up()
+
+    def ready(server):
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"🌐 Сервис запущен: http://{host}:{port}", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(service, args.host, args.port, ready=ready, stop_signals=True))
+        print("🛑 Сервис остановлен", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("\n🛑 Сервис остановлен", file=sys.stderr)
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# signals.py - ВЫЯВЛЕНИЕ СИГНАЛОВ (PRR, ROR, IC)
+import argparse
+import csv
+import json
+import sys
+
+from modules.signal_detection import (COLUMNS, SignalCounts, compute_signals, signal_rows,
+                                      sort_signals)
+
+SORT_KEYS = ('prr', 'prr_lower', 'ror', 'ror_lower', 'ic', 'ic025', 'chi2', 'a')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Диспропорциональный анализ пар препарат × явление по результатам batch.py"
+    )
+    parser.add_argument('results', nargs='*',
+                        help="JSONL-файлы результатов batch.py / main.py --jsonl ('-' - stdin)")
+    parser.add_argument('--counts', metavar='PATH',
+                        help="файл .npz накопленных счетчиков: дополняется новыми результатами "
+                             "(уже учтенные case_id пропускаются)")
+    parser.add_argument('--all-drugs', action='store_true',
+                        help="учитывать все препараты кейса, а не только подозреваемый")
+    parser.add_argument('--min-count', type=int, default=3,
+                        help="минимальное число отчетов с парой (a)")
+    parser.add_argument('--sort', choices=SORT_KEYS, default='ror_lower', help="ключ сортировки")
+    parser.add_argument('--signals-only', action='store_true',
+                        help="только пары, удовлетворяющие критериям сигнала (a≥3, PRR≥2, χ²≥4)")
+    parser.add_argument('--top', type=int, help="вывести не больше N пар")
+    parser.add_argument('--format', choices=['table', 'csv', 'jsonl'], default='table',
+                        help="формат вывода")
+    parser.add_argument('--output', '-o', help="файл результата (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+    if not args.results and not args.counts:
+        parser.error("укажите файлы результатов и/или --counts")
+    return args
+
+
+def read_results(path):
+    """Результаты кейсов из JSONL (пустые строки пропускаются)"""
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def write_rows(rows, output, output_format):
+    if output_format == 'jsonl':
+        for row in rows:
+            output.write(json.dumps(row, ensure_ascii=False) + '\n')
+    elif output_format == 'csv':
+        writer = csv.DictWriter(output, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        def number(value):
+            return f"{value:.2f}" if value is not None else '-'
+
+        for row in rows:
+            mark = '🔴' if row['signal'] else '  '
+            output.write(
+                f"{mark} {row['drug']:<20} {row['event']:<32} a={row['a']:<5} "
+                f"PRR {number(row['prr']):>7} [{number(row['prr_lower'])}; {number(row['prr_upper'])}]  "
+                f"ROR {number(row['ror']):>7} [{number(row['ror_lower'])}; {number(row['ror_upper'])}]  "
+                f"IC {number(row['ic']):>6} [{number(row['ic025'])}; {number(row['ic975'])}]\n"
+            )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        counts = SignalCounts.open(args.counts, all_drugs=args.all_drugs)
+        for path in args.results:
+            added = counts.add_results(read_results(path))
+            print(f"📥 {path}: новых кейсов {added}", file=sys.stderr)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.counts and args.results:
+        counts.save(args.counts)
+    print(f"📊 {counts.report()}", file=sys.stderr)
+
+    table = sort_signals(compute_signals(counts, args.min_count), args.sort)
+    rows = signal_rows(table, signals_only=args.signals_only, limit=args.top)
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        write_rows(rows, output, args.format)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"🔎 Пар: {len(table['a'])}, сигналов: {int(table['signal'].sum())}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
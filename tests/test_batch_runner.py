@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from modules import batch_runner
+from modules.batch_runner import discover_cases, run_batch
+from modules.dedup import DuplicateIndex
+
+
+class DedupSignatureTest(unittest.TestCase):
+
+    def test_case_file_is_read_once(self):
+        paths = discover_cases('data/cases')
+        with tempfile.TemporaryDirectory() as work_dir:
+            copy = shutil.copy(paths[0], os.path.join(work_dir, 'copy.txt'))
+            with mock.patch.object(batch_runner, 'load_case_text', wraps=batch_runner.load_case_text) as load:
+                results = list(run_batch(paths + [copy], workers=1, dedup=DuplicateIndex()))
+
+        self.assertEqual(load.call_count, len(paths) + 1)
+        self.assertEqual(results[-1]['duplicates'][0]['case_id'], paths[0])
+
+    def test_unreadable_file_has_no_signature(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, 'missing.txt')
+            [result] = run_batch([path], workers=1, dedup=DuplicateIndex())
+
+        self.assertIn('error', result)
+        self.assertNotIn('duplicates', result)
+
+
+if __name__ == '__main__':
+    unittest.main()
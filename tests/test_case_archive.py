@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+
+from modules.batch_runner import read_case_text
+from modules.case_archive import CaseArchive, pack_directory
+
+
+class ArchiveTextTest(unittest.TestCase):
+
+    def test_text_matches_case_file(self):
+        texts = {
+            'crlf.txt': "Пациент госпитализирован.\r\nПрепарат отменен.\r\n",
+            'cr.txt': "Головная боль.\rТошнота.",
+            'lf.txt': "  Сыпь.\nЗуд.\n",
+        }
+        with tempfile.TemporaryDirectory() as work_dir:
+            cases_dir = os.path.join(work_dir, 'cases')
+            os.makedirs(cases_dir)
+            for name, text in texts.items():
+                with open(os.path.join(cases_dir, name), 'wb') as f:
+                    f.write(text.encode('utf-8'))
+
+            path = os.path.join(work_dir, 'cases.pvca')
+            self.assertEqual(pack_directory(cases_dir, path), len(texts))
+            with CaseArchive(path) as archive:
+                for case_id, text in archive:
+                    self.assertEqual(text, read_case_text(case_id))
+                    self.assertNotIn('\r', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
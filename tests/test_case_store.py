@@ -0,0 +1,86 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import cases
+from modules.adverse_events import UNKNOWN_EVENT
+from modules.case_store import CaseStore
+
+
+def _result(drug, causality):
+    return {'drug': drug, 'drugs': [drug], 'is_serious': False, 'seriousness_flags': [],
+            'completeness_score': 50.0,
+            'events': [{'event': 'сыпь', 'ime': False, 'is_expected': True, 'causality': causality}]}
+
+
+class CaseStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.store = CaseStore(os.path.join(self.work_dir.name, 'cases.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.work_dir.cleanup()
+
+    def test_duplicate_case_id_in_one_batch_keeps_last(self):
+        self.store.add('case_1', 'первая версия', _result('Аспирин', 'Возможная'))
+        self.store.add('case_2', 'другой кейс', _result('Ибупрофен', 'Возможная'))
+        self.store.add('case_1', 'вторая версия', _result('Парацетамол', 'Вероятная'))
+        self.store.flush()
+
+        self.assertEqual(self.store.written, 2)
+        self.assertEqual(self.store.count(), 2)
+        self.assertEqual(self.store.text('case_1'), 'вторая версия')
+        self.assertEqual(self.store.count(drug='Парацетамол'), 1)
+        self.assertEqual(self.store.count(drug='Аспирин'), 0)
+        self.assertEqual(self.store.count(causality='Вероятная'), 1)
+        self.assertEqual(self.store.count(text='вторая'), 1)
+        self.assertEqual(self.store.count(text='первая'), 0)
+
+    def test_replace_across_batches(self):
+        self.store.add('case_1', 'первая версия', _result('Аспирин', 'Возможная'))
+        self.store.flush()
+        self.store.add('case_1', 'вторая версия', _result('Парацетамол', 'Вероятная'))
+        self.store.flush()
+
+        self.assertEqual(self.store.count(), 1)
+        self.assertEqual(self.store.count(drug='Аспирин'), 0)
+
+    def test_placeholder_event_is_not_indexed(self):
+        placeholder = _result('Аспирин', 'Сомнительная')
+        placeholder['events'][0].update(event=UNKNOWN_EVENT, is_expected=False)
+        self.store.add('case_1', 'без явлений', placeholder)
+        self.store.add('case_2', 'с явлением', _result('Аспирин', 'Возможная'))
+        self.store.flush()
+
+        self.assertEqual(self.store.count(expected=False), 0)
+        self.assertEqual(self.store.count(event=UNKNOWN_EVENT), 0)
+        self.assertEqual(self.store.count(drug='Аспирин'), 2)
+
+    def test_placeholder_rows_of_older_store_are_removed(self):
+        self.store.add('case_1', 'без явлений', _result('Аспирин', 'Сомнительная'))
+        self.store.flush()
+        with self.store.db:
+            self.store.db.execute("UPDATE case_events SET event = ?, is_expected = 0", (UNKNOWN_EVENT,))
+        self.store.close()
+
+        self.store = CaseStore(os.path.join(self.work_dir.name, 'cases.db'))
+        self.assertEqual(self.store.count(expected=False), 0)
+
+
+class CasesCliTest(unittest.TestCase):
+
+    def test_missing_database_is_an_error(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, 'missing.db')
+            with self.assertRaises(SystemExit) as raised, contextlib.redirect_stderr(io.StringIO()):
+                cases.main(['--db', path, '--count'])
+            self.assertEqual(raised.exception.code, 2)
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
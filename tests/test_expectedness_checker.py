@@ -0,0 +1,22 @@
+import unittest
+
+from modules.expectedness_checker import ExpectednessChecker
+
+
+class CheckExpectednessTest(unittest.TestCase):
+
+    def test_result_is_a_copy(self):
+        checker = ExpectednessChecker()
+        drug = next(iter(checker.effect_index))
+        effect = next(iter(checker.effect_index[drug]['effects']))
+
+        for event in (effect, 'событие, которого нет в ИМП'):
+            result = checker.check_expectedness('', event, drug)
+            expected = dict(result)
+            result['is_expected'] = None
+            result['extra'] = True
+            self.assertEqual(checker.check_expectedness('', event, drug), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from modules.http_service import OTHER_ENDPOINT, LatencyRecorder, metrics_endpoint
+
+
+class MetricsEndpointTest(unittest.TestCase):
+
+    def test_unknown_requests_share_one_series(self):
+        recorder = LatencyRecorder()
+        for method, path in [('POST', '/analyze'), ('GET', '/x1'), ('GET', '/x2'), ('DELETE', '/analyze'),
+                             ('GET', '/a"b\n')]:
+            recorder.record(metrics_endpoint(method, path), 0.001, error=path != '/analyze')
+
+        self.assertEqual(set(recorder.snapshot()['endpoints']), {'POST /analyze', OTHER_ENDPOINT})
+        self.assertEqual(recorder.snapshot()['endpoints'][OTHER_ENDPOINT]['requests'], 4)
+
+    def test_prometheus_labels_are_escaped(self):
+        recorder = LatencyRecorder()
+        recorder.record('a"b\\c\nd', 0.001)
+        text = recorder.prometheus_text()
+        self.assertIn('endpoint="a\\"b\\\\c\\nd"', text)
+        self.assertTrue(all(line.startswith(('#', 'pv_http_')) for line in text.splitlines()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from modules.incremental import ResultStore
+
+RESULT = {'drug': 'Аспирин', 'drugs': ['Аспирин'], 'events': []}
+
+
+class ResultStoreFingerprintTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.work_dir.name, 'store.db')
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_result_of_other_code_version_is_stale(self):
+        store = ResultStore(self.path, fingerprint='v1')
+        store.put('case_1', 'hash', RESULT, set())
+        store.close()
+
+        store = ResultStore(self.path, fingerprint='v1')
+        self.assertEqual(store.get('case_1', 'hash'), RESULT)
+        store.close()
+
+        store = ResultStore(self.path, fingerprint='v2')
+        self.assertIsNone(store.get('case_1', 'hash'))
+        self.assertEqual(store.case_ids(), [])
+        self.assertEqual(store.cases_with_suspect(['Аспирин']), set())
+        store.close()
+
+    def test_store_without_fingerprint_column_is_migrated(self):
+        db = sqlite3.connect(self.path)
+        db.execute('CREATE TABLE cases (case_id TEXT PRIMARY KEY, text_hash TEXT NOT NULL, result TEXT NOT NULL)')
+        db.execute("INSERT INTO cases VALUES ('case_1', 'hash', '{}')")
+        db.commit()
+        db.close()
+
+        store = ResultStore(self.path, fingerprint='v1')
+        self.assertIsNone(store.get('case_1', 'hash'))
+        store.put('case_1', 'hash', RESULT, set())
+        self.assertEqual(store.get('case_1', 'hash'), RESULT)
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from modules import kb_snapshot
+
+
+class SnapshotCodeVersionTest(unittest.TestCase):
+
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.work_dir = work_dir.name
+        for patcher in (mock.patch.object(kb_snapshot, 'SNAPSHOT_DIR', os.path.join(self.work_dir, 'snapshots')),
+                        mock.patch.object(kb_snapshot, 'SNAPSHOTS_ENABLED', True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _load_with_code(self, code, load):
+        with mock.patch.object(kb_snapshot, '_snapshot_code', return_value=code):
+            return load()
+
+    def test_object_snapshot_is_rebuilt_when_code_changes(self):
+        builds = []
+
+        def load():
+            return kb_snapshot.load_object_snapshot('object', ['key'], lambda: builds.append(1) or len(builds))
+
+        self.assertEqual(self._load_with_code('v1', load), 1)
+        self.assertEqual(self._load_with_code('v1', load), 1)
+        self.assertEqual(self._load_with_code('v2', load), 2)
+
+    def test_json_snapshot_is_rebuilt_when_code_changes(self):
+        source_path = os.path.join(self.work_dir, 'source.json')
+        with open(source_path, 'w', encoding='utf-8') as f:
+            json.dump({'a': 1}, f)
+        builds = []
+
+        def load():
+            return kb_snapshot.load_json_snapshot(source_path, 'json', build=lambda data: builds.append(1) or data)
+
+        for code in ('v1', 'v1', 'v2'):
+            self.assertEqual(self._load_with_code(code, load), {'a': 1})
+        self.assertEqual(len(builds), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
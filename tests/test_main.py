@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StreamingCliTest(unittest.TestCase):
+
+    def test_jsonl_stream_with_fields_checks_and_output(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_path = os.path.join(work_dir, 'cases.jsonl')
+            output_path = os.path.join(work_dir, 'results.jsonl')
+            with open(input_path, 'w', encoding='utf-8') as f:
+                for number in (1, 3):
+                    with open(os.path.join(ROOT, 'data', 'cases', f'case_{number}.txt'), encoding='utf-8') as case:
+                        f.write(json.dumps({'id': f'case_{number}', 'narrative': case.read()},
+                                           ensure_ascii=False) + '\n')
+
+            subprocess.run(
+                [sys.executable, 'main.py', '--jsonl', input_path, '--text-field', 'narrative',
+                 '--id-field', 'id', '--checks', 'seriousness,expectedness', '-o', output_path],
+                cwd=ROOT, check=True, capture_output=True
+            )
+
+            with open(output_path, encoding='utf-8') as f:
+                results = [json.loads(line) for line in f]
+            self.assertEqual([result['case_id'] for result in results], ['case_1', 'case_3'])
+            self.assertTrue(all('is_serious' in result and 'drug' in result for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
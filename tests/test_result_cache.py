@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from modules.case_context import CaseAnalyzer
+from modules.incremental import text_hash
+from modules.result_cache import CachedAnalyzer, ResultCache
+
+# Окно события заканчивается на границе предложения (заглавная буква), в нижнем
+# регистре весь текст - одно предложение и отмена препарата попадает в окно
+TEXT = ("У пациента через 2 часа после приема препарата развилась артериальная гипертензия. "
+        "Проводилось наблюдение. Температура в норме. Пульс в норме. Анализы без отклонений. "
+        "Препарат отменен, наступило улучшение.")
+
+
+def _causality(context):
+    return [event['causality'] for event in context.summary()['events']]
+
+
+class CaseSensitiveKeysTest(unittest.TestCase):
+
+    def test_cache_key_keeps_case(self):
+        analyzer = CaseAnalyzer()
+        expected = [_causality(analyzer.context(text)) for text in (TEXT, TEXT.lower())]
+        self.assertNotEqual(expected[0], expected[1])
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            cached = CachedAnalyzer(analyzer, ResultCache(os.path.join(work_dir, 'cache.db')))
+            try:
+                self.assertEqual([_causality(cached.context(text)) for text in (TEXT, TEXT.lower())], expected)
+            finally:
+                cached.cache.close()
+
+    def test_store_hash_keeps_case(self):
+        self.assertNotEqual(text_hash(TEXT), text_hash(TEXT.lower()))
+        self.assertEqual(text_hash(TEXT), text_hash('  ' + TEXT + '\r\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import batch
+from modules.signal_detection import SignalCounts
+
+
+class SignalCountsTest(unittest.TestCase):
+
+    def test_error_results_are_skipped(self):
+        counts = SignalCounts()
+        added = counts.add_results([
+            {'case_id': 'bad.txt', 'error': "'utf-8' codec can't decode byte 0xff"},
+            {'case_id': 'good.txt', 'drug': 'Аспирин', 'drugs': ['Аспирин'],
+             'events': [{'event': 'крапивница'}]},
+        ])
+        self.assertEqual(added, 1)
+        self.assertEqual(counts.total, 1)
+        self.assertEqual(counts.drugs, ['Аспирин'])
+        self.assertNotIn('bad.txt', counts.case_ids)
+
+    def test_batch_with_bad_file_keeps_counts(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            cases_dir = os.path.join(work_dir, 'cases')
+            shutil.copytree('data/cases', cases_dir)
+            with open(os.path.join(cases_dir, 'broken.txt'), 'wb') as f:
+                f.write(b'\xff\xfe\x00 not utf-8')
+            signals_path = os.path.join(work_dir, 'signals.npz')
+
+            with contextlib.redirect_stderr(io.StringIO()):
+                batch.main([cases_dir, '--workers', '1', '--format', 'null', '--signals', signals_path])
+
+            counts = SignalCounts.open(signals_path)
+            self.assertEqual(counts.total, len(os.listdir('data/cases')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# watch.py - НАБЛЮДЕНИЕ ЗА ПАПКОЙ ВХОДЯЩИХ КЕЙСОВ
+import argparse
+import os
+import sys
+import threading
+
+from modules.case_context import CHECKS, checks_argument
+from modules.output_sinks import open_sink
+from modules.watcher import (BATCH_SIZE, POLL_INTERVAL, SETTLE_SECONDS, CaseProcessor, Checkpoint,
+                             stop_on_signals, watch)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Наблюдение за папкой: новые и измененные кейсы анализируются пакетами, "
+                    "обработанные файлы запоминаются в контрольной точке (результат - JSONL)"
+    )
+    parser.add_argument('root', help="каталог входящих кейсов")
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help="файл SQLite контрольной точки (по умолчанию <каталог>/.watch_checkpoint.sqlite)")
+    parser.add_argument('--output', '-o', help="файл результата - дополняется (по умолчанию stdout)")
+    parser.add_argument('--format', choices=['json', 'null'], default='json',
+                        help="формат результата: json - компактный JSONL, null - без вывода")
+    parser.add_argument('--suffix', default='.txt', help="расширение файлов кейсов")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="число процессов анализа (пул создается один раз)")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help="пауза между опросами каталога, с")
+    parser.add_argument('--settle', type=float, default=SETTLE_SECONDS,
+                        help="сколько секунд файл не должен меняться, чтобы считаться записанным")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="кейсов в пакете (после пакета - запись результатов и контрольной точки)")
+    parser.add_argument('--events', choices=['common', 'basic'], default='common',
+                        help="словарь нежелательных явлений")
+    parser.add_argument('--checks', type=checks_argument, default=CHECKS, metavar='СПИСОК',
+                        help=f"проверки через запятую ({','.join(CHECKS)}) или all")
+    parser.add_argument('--once', action='store_true',
+                        help="обработать готовые файлы и завершиться")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.root):
+        parser.error(f"каталог не найден: {args.root}")
+    if args.batch_size < 1:
+        parser.error("--batch-size должен быть положительным")
+    if args.checkpoint is None:
+        args.checkpoint = os.path.join(args.root, '.watch_checkpoint.sqlite')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    checkpoint = Checkpoint(args.checkpoint)
+    print(f"👀 Наблюдение за {args.root}: в контрольной точке {len(checkpoint)} файлов, "
+          f"процессов: {args.workers}", file=sys.stderr)
+
+    # Файл результата дополняется: после перезапуска новые результаты пишутся в конец
+    if args.output:
+        sink = open_sink(args.format, open(args.output, 'a', encoding='utf-8'))
+        sink.owns_stream = True
+    else:
+        sink = open_sink(args.format)
+
+    stop = threading.Event()
+    stop_on_signals(stop)
+    processor = CaseProcessor(args.workers, args.events, args.checks)
+    try:
+        stats = watch(args.root, checkpoint, processor, sink, interval=args.interval, settle=args.settle,
+                      batch_size=args.batch_size, suffix=args.suffix, once=args.once, stop=stop,
+                      log=lambda message: print(message, file=sys.stderr))
+    finally:
+        processor.close()
+        sink.close()
+        checkpoint.close()
+
+    if stop.is_set():
+        print("🛑 Наблюдение остановлено", file=sys.stderr)
+    print(f"📈 {stats.report()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()